@@ -12,7 +12,7 @@ Termux Compatible: Yes
 
 import socket
 import threading
-from queue import Queue
+from queue import Queue, SimpleQueue, Empty
 import ipaddress
 from datetime import datetime
 import time
@@ -23,6 +23,31 @@ import re
 import multiprocessing
 import subprocess
 import platform
+import argparse
+import socketserver
+import secrets
+import hmac
+import http.server
+import asyncio
+import errno
+import bisect
+import collections
+import heapq
+import select
+import shutil
+import struct
+import json
+import math
+import csv
+import sqlite3
+import ssl
+from array import array
+
+# resource is Unix-only; used to raise the open file limit for the async engine
+try:
+    import resource
+except ImportError:
+    resource = None
 
 # Try to import colorama, but work without it (Termux compatibility)
 try:
@@ -44,16 +69,170 @@ except ImportError:
 
 # Configuration
 CCTV_OUTPUT = "CCTV_Found.txt"
+RESULTS_BASENAME = "SuperFastScan_Results"
+SIGNATURES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "signatures.json")
 
 # Set a default timeout for socket connections
 socket.setdefaulttimeout(0.25)
 
-# Set to store detected IPs
-detected_ips = set()
+# Live CCTV_Found.txt writer for run_scanner()
+cctv_sink = None
+cctv_sink_lock = threading.Lock()
+
+# Pause/stop state of the scan in progress, driven by Ctrl+C and Ctrl+Z. A
+# signal handler can interrupt the main thread while it holds the lock an
+# Event needs, so handlers only post to signal_requests (SimpleQueue.put is
+# reentrant) and a helper thread applies the requests
+scan_control = None
+signal_requests = None
+
+# Probe pipeline defaults (connect and banner stages have separate budgets)
+ASYNC_CONCURRENCY = 5000
+ASYNC_BANNER_CONCURRENCY = 1000
+BANNER_THREADS = 100
+CONNECT_TIMEOUT = 0.5
+READ_TIMEOUT = 2
+MAX_RESPONSE_BYTES = 30000
+MAX_HEADER_BYTES = 8192
+
+# Keep-alive follow-ups: after a camera is fingerprinted, its signature's
+# follow-up paths are pipelined on the same connection to read the model and
+# firmware. Servers that close or cannot frame their responses are skipped,
+# and everything read for the follow-ups is capped at FOLLOW_UP_BYTES
+FOLLOW_UP_BYTES = 65536
+
+# HTTPS: ports in TLS_PORTS get a TLS handshake (certificate not verified)
+# before the banner GET. Sessions are kept per (host, port, SNI name) in a
+# bounded in-memory LRU so later handshakes with the same server can resume;
+# they are not saved, so a new run starts with full handshakes
+TLS_PORTS = [443, 8443]
+TLS_SESSION_CACHE_SIZE = 4096
+TLS_RECORD_BYTES = 16709  # Largest TLS record, header included
+
+# Probe outcomes reported by the engines
+OUTCOME_CAMERA = 'camera'
+OUTCOME_WEB = 'web'
+OUTCOME_OPEN = 'open'
+OUTCOME_REFUSED = 'refused'
+OUTCOME_TIMEOUT = 'timeout'
+OUTCOME_ERROR = 'error'
+OUTCOME_RESOURCE = 'resource'  # local limits: ephemeral ports, file descriptors, buffers
+OUTCOME_SKIPPED = 'skipped'  # dropped by the probe plan
+OUTCOME_DEAD = 'dead'  # in a block where the sampling pre-pass got no answer
+
+# Errnos that mean this host, not the network, is out of capacity
+RESOURCE_ERRNOS = {errno.EADDRNOTAVAIL, errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM}
+
+# Adaptive concurrency (AIMD): limits on in-flight connects per engine
+THREAD_CONCURRENCY_MAX = 500
+ASYNC_CONCURRENCY_START = 500
+CONCURRENCY_MIN = 10
+TIMEOUT_SPIKE = 0.2       # back off if the timeout ratio rises this far above its baseline
+LATENCY_SPIKE = 3.0       # back off if connect latency rises this far above its baseline
+BACKOFF_FACTOR = 0.5
+STATUS_INTERVAL = 5.0
+
+# Console: one thread owns the terminal and redraws a status line every
+# RENDER_INTERVAL seconds; probe threads only queue lines for it, and at
+# most RENDER_MAX_LINES are written per redraw (results files get them all)
+RENDER_INTERVAL = 0.25
+RENDER_MAX_LINES = 20
+RENDER_RATE_WINDOW = 5.0  # Seconds of history behind the rate shown
+
+# Work units: thread workers take lists of targets instead of one target
+# per queue round trip, sized from the measured probe rate so each list
+# keeps a worker busy for about CHUNK_SECONDS
+CHUNK_START = 8
+CHUNK_MAX = 256
+CHUNK_SECONDS = 0.25
+CHUNK_RETUNE_INTERVAL = 0.5
+
+# Adaptive timeouts: per-subnet RTO = SRTT + 4 * RTTVAR (as in TCP), clamped
+RTT_PREFIX = 24
+INITIAL_RTO = 1.0  # RFC 6298 initial RTO, used until a subnet has samples
+MIN_CONNECT_TIMEOUT = 0.05
+MAX_CONNECT_TIMEOUT = 3.0
+MIN_READ_TIMEOUT = 0.5
+MAX_READ_TIMEOUT = 8.0
+READ_RTO_FACTOR = 4
+
+# Metrics: latency histogram bucket bounds (seconds) and exported name prefix
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_PREFIX = "camerascanner_"
+
+# Ports probed on every address
+DEFAULT_PORTS = [80, 8080]
+
+# Probe plans: ports and HTTP paths are tried in order; hosts are scheduled
+# PLAN_WINDOW at a time, one port per round, so a host can be dropped after
+# its first camera (or refused port) without waiting on it
+DEFAULT_PATHS = ['/']
+CAMERA_PORTS = [80, 8080, 8000, 81, 88, 554, 37777]
+PLAN_WINDOW = 8192
 
-# Global control flags
-stop_scan = False
-pause_scan = False
+# Sampling pre-pass: a few addresses of every /SAMPLE_PREFIX block are
+# probed first, and blocks where none answers (no SYN-ACK, no RST) are
+# skipped or probed last. The sample is sized so that a block where at
+# least SAMPLE_DENSITY of the addresses answer is kept with probability
+# SAMPLE_CONFIDENCE
+SAMPLE_PREFIX = 24
+SAMPLE_CONFIDENCE = 0.95
+SAMPLE_DENSITY = 0.1
+SAMPLE_WINDOW = 256
+SAMPLE_REPORT_LIMIT = 10
+
+# Checkpoints: progress is tracked per shard of addresses and saved periodically
+FAST_CHECKPOINT = "SuperFastScan.checkpoint.json"
+SCANNER_CHECKPOINT = "CCTV_Scan.checkpoint.json"
+SHARD_SIZE = 256
+CHECKPOINT_INTERVAL = 10.0
+
+# Multi-process mode: shards are spread over this many worker processes
+SCAN_PROCESSES = multiprocessing.cpu_count()
+
+# Distributed mode: a coordinator leases shards to remote workers over
+# JSON lines on TCP; a lease expires without a heartbeat for LEASE_TIMEOUT.
+# It listens on loopback unless given another address, and every request
+# must carry the shared token (random per run unless set in COORDINATOR_TOKEN_ENV)
+COORDINATOR_HOST = '127.0.0.1'
+COORDINATOR_PORT = 7878
+COORDINATOR_TOKEN_ENV = 'CAMERASCANNER_TOKEN'
+LEASE_TIMEOUT = 30.0
+HEARTBEAT_INTERVAL = 5.0
+
+# Host cache for incremental re-inventory; entries expire after CACHE_TTL seconds
+HOST_CACHE = "CameraScanner_cache.db"
+CACHE_TTL = 3 * 24 * 3600
+
+# Result writer: hits are flushed after this many results or seconds
+FLUSH_COUNT = 100
+FLUSH_INTERVAL = 1.0
+
+# Detected state is one bit per address (and port) in pages that each cover
+# a /BITMAP_PAGE_PREFIX, allocated on first use: 8 KB per port for a /16,
+# 2 MB per port for a /8. Probed state needs no bitmap: Checkpoint already
+# answers it per shard (watermark, finished shards and per-shard counters),
+# which resumes just as well in a fraction of the memory
+BITMAP_PAGE_PREFIX = 16
+
+# Do-not-touch inventory: addresses listed in this file (when it exists) are
+# never probed, on top of any --exclude lists
+EXCLUDE_FILE = "CameraScanner_exclude.txt"
+
+# Path tracing: every TTL of a path is probed at once with unprivileged UDP
+# (ICMP replies come back on the socket's error queue), for many targets in
+# parallel. Targets in the same /TRACE_SHARE_PREFIX as one already traced
+# only probe around its distance, then back towards us until their path
+# joins it, and reuse its hops from there
+TRACE_DEFAULT_TARGET = "google.com"
+TRACE_MAX_HOPS = 30
+TRACE_TIMEOUT = 1.0
+TRACE_RATE = 2000  # Probes per second
+TRACE_RETRIES = 1
+TRACE_SHARE_PREFIX = 24
+TRACE_SHARE_WINDOW = 3  # TTLs probed either side of the shared distance, and per step back
+TRACE_BASE_PORT = 33434
+TRACE_MAX_TARGETS = 4096
 
 
 def print_banner():
@@ -80,6 +259,353 @@ def validate_ip(ip_str):
         return False
 
 
+def int_to_ip(ip_int):
+    """Convert an integer address to dotted-quad notation"""
+    return socket.inet_ntoa(struct.pack('!I', ip_int))
+
+
+def ip_to_int(ip):
+    """Convert a dotted-quad address to an integer"""
+    return struct.unpack('!I', socket.inet_aton(ip))[0]
+
+
+def parse_target_spec(spec):
+    """Parse a single IP, CIDR or start-end range into an inclusive (start, end) pair"""
+    spec = spec.strip()
+    if '/' in spec:
+        network = ipaddress.IPv4Network(spec, strict=False)
+        return int(network.network_address), int(network.broadcast_address)
+    if '-' in spec:
+        start, end = (int(ipaddress.IPv4Address(part.strip())) for part in spec.split('-', 1))
+        if start > end:
+            raise ValueError(f"start IP must be less than end IP: {spec}")
+        return start, end
+    ip_int = int(ipaddress.IPv4Address(spec))
+    return ip_int, ip_int
+
+
+def read_target_file(path):
+    """Yield target specs from a file (one or more per line, # comments allowed)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            for spec in line.replace(',', ' ').split():
+                yield spec
+
+
+class TargetSpace:
+    """Sorted, merged address ranges that are expanded lazily into integers"""
+    
+    def __init__(self, ranges):
+        self.ranges = []
+        for start, end in sorted(ranges):
+            if self.ranges and start <= self.ranges[-1][1] + 1:
+                if end > self.ranges[-1][1]:
+                    self.ranges[-1] = (self.ranges[-1][0], end)
+            else:
+                self.ranges.append((start, end))
+        
+        # offsets[i] is the flat index of the first address in ranges[i]
+        self.offsets = []
+        total = 0
+        for start, end in self.ranges:
+            self.offsets.append(total)
+            total += end - start + 1
+        self.total = total
+    
+    @classmethod
+    def from_specs(cls, specs):
+        """Build a target space from IP/CIDR/range specs and @file references"""
+        ranges = []
+        for spec in specs:
+            if spec.startswith('@'):
+                ranges.extend(parse_target_spec(s) for s in read_target_file(spec[1:]))
+            else:
+                ranges.append(parse_target_spec(spec))
+        return cls(ranges)
+    
+    def __len__(self):
+        return self.total
+    
+    def address_at(self, index):
+        """Return the integer address at a flat index"""
+        i = bisect.bisect_right(self.offsets, index) - 1
+        return self.ranges[i][0] + (index - self.offsets[i])
+    
+    def index_of(self, ip_int):
+        """Return the flat index of an integer address in the space"""
+        i = bisect.bisect_right(self.ranges, (ip_int, 0xFFFFFFFF)) - 1
+        return self.offsets[i] + (ip_int - self.ranges[i][0])
+    
+    def __contains__(self, ip_int):
+        i = bisect.bisect_right(self.ranges, (ip_int, 0xFFFFFFFF)) - 1
+        return i >= 0 and ip_int <= self.ranges[i][1]
+    
+    def _overlapping(self, start, end):
+        """Yield this space's ranges that overlap [start, end]"""
+        i = max(bisect.bisect_right(self.ranges, (start, 0xFFFFFFFF)) - 1, 0)
+        while i < len(self.ranges) and self.ranges[i][0] <= end:
+            if self.ranges[i][1] >= start:
+                yield self.ranges[i]
+            i += 1
+    
+    def subtract(self, other):
+        """Return a new space without the addresses of `other`, cutting whole ranges at a time"""
+        ranges = []
+        for start, end in self.ranges:
+            for skip_start, skip_end in other._overlapping(start, end):
+                if skip_start > start:
+                    ranges.append((start, skip_start - 1))
+                start = skip_end + 1
+            if start <= end:
+                ranges.append((start, end))
+        return TargetSpace(ranges)
+    
+    def intersect(self, other):
+        """Return a new space with only the addresses that are also in `other`"""
+        ranges = []
+        for start, end in self.ranges:
+            for keep_start, keep_end in other._overlapping(start, end):
+                ranges.append((max(start, keep_start), min(end, keep_end)))
+        return TargetSpace(ranges)
+    
+    def iter_addresses(self, start=0, stop=None):
+        """Lazily yield integer addresses for flat indexes [start, stop)"""
+        stop = self.total if stop is None else min(stop, self.total)
+        if start >= stop:
+            return
+        i = bisect.bisect_right(self.offsets, start) - 1
+        index = start
+        while index < stop:
+            first, last = self.ranges[i]
+            offset = self.offsets[i]
+            begin = first + (index - offset)
+            end = min(last, first + (stop - 1 - offset))
+            yield from range(begin, end + 1)
+            index += end - begin + 1
+            i += 1
+
+
+def apply_target_lists(space, exclude=(), include=()):
+    """Keep addresses on the include list files, drop those on the exclude lists; returns (space, removed count)"""
+    exclude = list(exclude)
+    if os.path.exists(EXCLUDE_FILE) and EXCLUDE_FILE not in exclude:
+        exclude.append(EXCLUDE_FILE)
+    total = len(space)
+    if include:
+        space = space.intersect(TargetSpace.from_specs('@' + path for path in include))
+    if exclude:
+        space = space.subtract(TargetSpace.from_specs('@' + path for path in exclude))
+    return space, total - len(space)
+
+
+def iter_probe_targets(space, ports):
+    """Lazily yield (ip_int, port) probe targets for every address in a space"""
+    for ip_int in space.iter_addresses():
+        for port in ports:
+            yield ip_int, port
+
+
+class ProbePlan:
+    """Ordered ports and HTTP paths to try on every host, and when to give up on a host early"""
+    
+    def __init__(self, ports=None, paths=None, stop_on_hit=True, stop_on_refused=False, dead_blocks=None,
+                 follow_up=False):
+        self.ports = list(dict.fromkeys(ports or DEFAULT_PORTS))
+        self.paths = list(paths or DEFAULT_PATHS)
+        self.stop_on_hit = stop_on_hit
+        self.stop_on_refused = stop_on_refused
+        self.dead_blocks = dead_blocks
+        self.follow_up = follow_up  # Pipeline the signature's follow-up paths after a camera
+    
+    @classmethod
+    def from_settings(cls, settings):
+        dead_blocks = settings.get('dead_blocks')
+        return cls(settings.get('ports'), settings.get('paths'), settings.get('stop_on_hit', True),
+                   settings.get('stop_on_refused', False),
+                   DeadBlocks.from_settings(dead_blocks) if dead_blocks else None, settings.get('follow_up', False))
+    
+    def settings(self):
+        """Plain dict for checkpoint settings"""
+        return {'ports': self.ports, 'paths': self.paths, 'stop_on_hit': self.stop_on_hit,
+                'stop_on_refused': self.stop_on_refused,
+                'dead_blocks': self.dead_blocks.settings() if self.dead_blocks else None,
+                'follow_up': self.follow_up}
+    
+    def stops_after(self, outcome):
+        """Whether a probe outcome ends probing of the rest of the host's ports"""
+        return ((self.stop_on_hit and outcome == OUTCOME_CAMERA) or
+                (self.stop_on_refused and outcome == OUTCOME_REFUSED))
+    
+    def describe(self):
+        stops = [name for name, on in (('first camera', self.stop_on_hit),
+                                       ('first refused port', self.stop_on_refused)) if on]
+        text = f"ports {','.join(map(str, self.ports))}"
+        if self.paths != DEFAULT_PATHS:
+            text += f", paths {' '.join(self.paths)}"
+        if self.follow_up:
+            text += ", keep-alive follow-ups"
+        if self.dead_blocks:
+            text += (f", {len(self.dead_blocks)} dead /{self.dead_blocks.prefix} blocks "
+                     f"{'probed last' if self.dead_blocks.demote else 'skipped'}")
+        return text + (f", stop after {' or '.join(stops)}" if stops else "")
+
+
+class PlanScheduler:
+    """Applies a ProbePlan to a scan: reorders targets into port rounds and drops finished hosts"""
+    
+    def __init__(self, plan, on_skip=None, window=PLAN_WINDOW):
+        self.plan = plan
+        self.on_skip = on_skip
+        self.window = window
+        self.stopped = set()
+    
+    def probe_done(self, ip_int, port, outcome=None):
+        if self.plan.stops_after(outcome):
+            self.stopped.add(ip_int)
+    
+    def schedule(self, targets):
+        """Turn address-major (ip_int, port) targets into rounds of one port per host"""
+        if self.plan.dead_blocks:
+            targets = self._dead_blocks(targets)
+        if not (self.plan.stop_on_hit or self.plan.stop_on_refused):
+            yield from targets
+            return
+        
+        # A whole window of hosts gets its first port before any host gets
+        # its second, so earlier answers are usually in by the next round
+        hosts = []
+        for ip_int, port in targets:
+            if hosts and hosts[-1][0] == ip_int:
+                hosts[-1][1].append(port)
+                continue
+            if len(hosts) == self.window:
+                yield from self._rounds(hosts)
+                hosts = []
+            hosts.append((ip_int, [port]))
+        yield from self._rounds(hosts)
+    
+    def _rounds(self, hosts):
+        self.stopped = set()
+        rounds = max((len(ports) for _, ports in hosts), default=0)
+        for index in range(rounds):
+            for ip_int, ports in hosts:
+                if index >= len(ports):
+                    continue
+                if ip_int not in self.stopped:
+                    yield ip_int, ports[index]
+                elif self.on_skip:
+                    self.on_skip(ip_int, ports[index], OUTCOME_SKIPPED)
+    
+    def _dead_blocks(self, targets):
+        """Drop targets in dead blocks, or hold them back until every other target is out"""
+        dead = self.plan.dead_blocks
+        # Held-back targets are kept as [first ip, last ip, ports] runs
+        held = []
+        current, ports = None, []
+        for ip_int, port in targets:
+            if ip_int not in dead:
+                yield ip_int, port
+            elif not dead.demote:
+                if self.on_skip:
+                    self.on_skip(ip_int, port, OUTCOME_DEAD)
+            elif ip_int == current:
+                ports.append(port)
+            else:
+                self._hold(held, current, ports)
+                current, ports = ip_int, [port]
+        self._hold(held, current, ports)
+        
+        for first, last, ports in held:
+            for ip_int in range(first, last + 1):
+                for port in ports:
+                    yield ip_int, port
+    
+    @staticmethod
+    def _hold(held, ip_int, ports):
+        if ip_int is None:
+            return
+        if held and held[-1][1] == ip_int - 1 and held[-1][2] == ports:
+            held[-1][1] = ip_int
+        else:
+            held.append([ip_int, ip_int, ports])
+
+
+class DeadBlocks:
+    """Address blocks (one per /prefix) where no sampled address answered"""
+    
+    def __init__(self, prefix=SAMPLE_PREFIX, blocks=(), demote=False):
+        self.prefix = prefix
+        self.shift = 32 - prefix
+        self.blocks = set(blocks)
+        self.demote = demote
+    
+    @classmethod
+    def from_settings(cls, settings):
+        blocks = (block for start, end in settings['blocks'] for block in range(start, end + 1))
+        return cls(settings['prefix'], blocks, settings.get('demote', False))
+    
+    def settings(self):
+        """Plain dict for checkpoint settings; blocks are stored as [start, end] runs"""
+        return {'prefix': self.prefix, 'blocks': self.runs(), 'demote': self.demote}
+    
+    def __len__(self):
+        return len(self.blocks)
+    
+    def __contains__(self, ip_int):
+        return ip_int >> self.shift in self.blocks
+    
+    def runs(self):
+        """Dead blocks as merged [start, end] runs of block numbers"""
+        runs = []
+        for block in sorted(self.blocks):
+            if runs and runs[-1][1] == block - 1:
+                runs[-1][1] = block
+            else:
+                runs.append([block, block])
+        return runs
+    
+    def networks(self):
+        """Dead address space as the fewest CIDR networks"""
+        for start, end in self.runs():
+            yield from ipaddress.summarize_address_range(ipaddress.IPv4Address(start << self.shift),
+                                                         ipaddress.IPv4Address(((end + 1) << self.shift) - 1))
+
+
+def iter_blocks(space, prefix=SAMPLE_PREFIX):
+    """Yield (block, [(first, last), ...]) for every /prefix block the space touches, clipped to the space"""
+    shift = 32 - prefix
+    block, parts = None, []
+    for start, end in space.ranges:
+        while start <= end:
+            current = start >> shift
+            last = min(end, ((current + 1) << shift) - 1)
+            if current != block:
+                if parts:
+                    yield block, parts
+                block, parts = current, []
+            parts.append((start, last))
+            start = last + 1
+    if parts:
+        yield block, parts
+
+
+def sample_size(addresses, confidence=SAMPLE_CONFIDENCE, density=SAMPLE_DENSITY):
+    """Smallest sample that hits a block where `density` of the addresses answer with probability `confidence`"""
+    if density >= 1:
+        return min(1, addresses)
+    wanted = math.ceil(math.log(1 - confidence) / math.log(1 - density))
+    return max(1, min(addresses, wanted))
+
+
+def sample_addresses(parts, count):
+    """Pick `count` addresses spread evenly over a block's ranges"""
+    addresses = TargetSpace(parts)
+    total = len(addresses)
+    # Centre each pick in its stride so .0 (rarely a host) is not always sampled
+    return [addresses.address_at((2 * i + 1) * total // (2 * count)) for i in range(count)]
+
+
 def get_default_gateway():
     """Get the default gateway (router) IP address"""
     try:
@@ -122,118 +648,3284 @@ def get_default_gateway():
                     if validate_ip(gateway):
                         return gateway
         
-        return "Not Found"
-    except:
-        return "Not Found"
+        return "Not Found"
+    except:
+        return "Not Found"
+
+
+def get_local_ip():
+    """Get local IP address"""
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect(("8.8.8.8", 80))
+        local_ip = s.getsockname()[0]
+        s.close()
+        return local_ip
+    except:
+        return "Not Found"
+
+
+TITLE_RE = re.compile(rb'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+TITLE_END_RE = re.compile(rb'</title', re.IGNORECASE)
+STATUS_RE = re.compile(rb'HTTP/\d(?:\.\d)?\s+(\d{3})')
+HEAD_END_RE = re.compile(rb'\r\n\r\n')
+CONTENT_LENGTH_RE = re.compile(rb'\r\ncontent-length:[ \t]*(\d+)', re.IGNORECASE)
+CHUNKED_RE = re.compile(rb'\r\ntransfer-encoding:[^\r\n]*chunked', re.IGNORECASE)
+CONNECTION_CLOSE_RE = re.compile(rb'\r\nconnection:[^\r\n]*close', re.IGNORECASE)
+
+
+def parse_http_response(response):
+    """Split a raw HTTP response (bytes or memoryview) into status, headers and title"""
+    head_end = HEAD_END_RE.search(response)
+    head = bytes(response[:head_end.start()] if head_end else response[:MAX_HEADER_BYTES])
+    lines = head.split(b'\r\n')
+    
+    status_match = STATUS_RE.match(lines[0])
+    status = int(status_match.group(1)) if status_match else None
+    
+    headers = {}
+    if status is not None:
+        for line in lines[1:]:
+            name, sep, value = line.partition(b':')
+            if sep:
+                headers[name.strip().decode('latin-1').lower()] = value.strip().decode('latin-1')
+    
+    title_match = TITLE_RE.search(response)
+    title = title_match.group(1).decode('utf-8', errors='ignore').strip() if title_match else "No Title Found"
+    
+    return status, headers, title
+
+
+class ResponseReader:
+    """Preallocated receive buffer that tracks headers as bytes and stops early"""
+    
+    def __init__(self, budget=MAX_RESPONSE_BYTES, matcher=None, certificate=None):
+        self.buffer = bytearray(budget)
+        self.view = memoryview(self.buffer)
+        self.length = 0
+        self.head_end = -1
+        self.body_length = None
+        self.chunked = False
+        self.progress = matcher.progress(certificate) if matcher is not None else None
+        self.done = budget <= 0
+    
+    def free(self):
+        """Writable view of the unused part of the buffer, for recv_into()"""
+        return self.view[self.length:]
+    
+    def response(self):
+        """View of the bytes received so far"""
+        return self.view[:self.length]
+    
+    def feed(self, count):
+        """Account for `count` bytes written into free(); returns True once reading can stop"""
+        if count <= 0:
+            self.done = True
+            return True
+        
+        previous = self.length
+        self.length += count
+        if self.length >= len(self.buffer):
+            self.done = True
+            return True
+        if self.progress is not None:
+            self.progress.feed(self.buffer, self.length)
+        
+        if self.head_end == -1:
+            end = self.buffer.find(b'\r\n\r\n', max(0, previous - 3), self.length)
+            if end == -1:
+                return False
+            self.head_end = end + 4
+            length_match = CONTENT_LENGTH_RE.search(self.buffer, 0, end + 2)
+            if length_match:
+                self.body_length = int(length_match.group(1))
+            # Keep-alive servers do not close after a chunked body, so its last chunk ends the read
+            self.chunked = CHUNKED_RE.search(self.buffer, 0, end + 2) is not None
+            if self.progress is not None:
+                self.progress.headers(bytes(self.buffer[:self.head_end]))
+        
+        # Headers are complete: stop once the body is complete, or once no
+        # later bytes can change which signature matches
+        if self.body_length is not None and self.length >= self.head_end + self.body_length:
+            self.done = True
+        elif self.chunked and self.buffer.endswith(b'0\r\n\r\n', self.head_end, self.length):
+            self.done = True
+        elif self.progress is not None and self.progress.settled():
+            self.done = True
+        return self.done
+
+
+def response_end(data, start=0):
+    """Offset just past the HTTP response starting at data[start], or None if more bytes are needed"""
+    # Raises ValueError for a response that only ends when the server closes
+    head_end = data.find(b'\r\n\r\n', start)
+    if head_end == -1:
+        return None
+    head = bytes(data[start:head_end + 2])
+    head_end += 4
+    
+    if CHUNKED_RE.search(head):
+        position = head_end
+        while True:
+            line_end = data.find(b'\r\n', position)
+            if line_end == -1:
+                return None
+            size = int(bytes(data[position:line_end]).split(b';')[0], 16)
+            if size == 0:
+                # The last chunk is followed by optional trailers and an empty line
+                end = data.find(b'\r\n\r\n', line_end)
+                return None if end == -1 else end + 4
+            position = line_end + 2 + size + 2
+            if position > len(data):
+                return None
+    
+    length_match = CONTENT_LENGTH_RE.search(head)
+    if length_match:
+        end = head_end + int(length_match.group(1))
+        return end if end <= len(data) else None
+    
+    status_match = STATUS_RE.match(head)
+    if status_match and (status_match.group(1).startswith(b'1') or status_match.group(1) in (b'204', b'304')):
+        return head_end
+    raise ValueError("response length is unknown")
+
+
+def dechunk(response):
+    """Complete chunked response with its chunks joined, so patterns can match across them"""
+    head_end = response.find(b'\r\n\r\n') + 4
+    if not CHUNKED_RE.search(response, 0, head_end - 2):
+        return response
+    body = []
+    position = head_end
+    while True:
+        line_end = response.find(b'\r\n', position)
+        size = int(response[position:line_end].split(b';')[0], 16)
+        if size == 0:
+            return response[:head_end] + b''.join(body)
+        body.append(response[line_end + 2:line_end + 2 + size])
+        position = line_end + 2 + size + 2
+
+
+def keeps_alive(response):
+    """True if the server will keep the connection open after this response and it can be framed"""
+    if not response.startswith(b'HTTP/1.1 '):
+        return False
+    head_end = response.find(b'\r\n\r\n')
+    if head_end == -1 or CONNECTION_CLOSE_RE.search(response, 0, head_end + 2):
+        return False
+    try:
+        response_end(response)
+    except ValueError:
+        return False
+    return True
+
+
+class PipelineReader:
+    """Splits a keep-alive byte stream into the responses to pipelined requests"""
+    
+    def __init__(self, expected, budget=FOLLOW_UP_BYTES):
+        self.data = bytearray()
+        self.responses = []
+        self.expected = expected
+        self.budget = budget
+        self.received = 0
+        self.done = expected <= 0
+    
+    def feed(self, data):
+        """Add received bytes; returns True once every response is in or reading must stop"""
+        if not data:
+            self.done = True
+            return True
+        
+        self.data += data
+        self.received += len(data)
+        while not self.done:
+            try:
+                end = response_end(self.data)
+            except ValueError:
+                self.done = True
+                break
+            if end is None:
+                self.done = self.received >= self.budget
+                break
+            self.responses.append(dechunk(bytes(self.data[:end])))
+            del self.data[:end]
+            self.done = len(self.responses) >= self.expected
+        return self.done
+
+
+def compile_literals(literals):
+    """Compile substrings into one regex that finds all of them in a single scan"""
+    literals = sorted(set(literals), key=len, reverse=True)
+    if not literals:
+        return None, {}
+    
+    # The zero-width lookahead is tried at every offset and captures the
+    # longest literal starting there; shorter literals starting at the same
+    # offset are its prefixes and are implied by it
+    escaped = [re.escape(literal) for literal in literals]
+    if isinstance(literals[0], bytes):
+        pattern = re.compile(b'(?=(' + b'|'.join(escaped) + b'))')
+    else:
+        pattern = re.compile('(?=(' + '|'.join(escaped) + '))')
+    implied = {literal: {other for other in literals if literal.startswith(other)} for literal in literals}
+    return pattern, implied
+
+
+def find_literals(compiled, text, start=0, end=None):
+    """Return the set of compiled literals that occur in text[start:end]"""
+    pattern, implied = compiled
+    found = set()
+    if pattern is not None:
+        for match in pattern.finditer(text, start, len(text) if end is None else end):
+            found |= implied[match.group(1)]
+    return found
+
+
+class SignatureMatcher:
+    """Fingerprint rules compiled into one regex pass per response field"""
+    
+    def __init__(self, rules):
+        self.rules = []
+        self.follow_ups = {}
+        title_literals, body_literals, header_literals, cert_literals = [], [], {}, []
+        
+        for rule in rules:
+            # The first rule of a type that lists follow-ups or details defines them
+            if (rule.get('follow_up') or rule.get('details')) and rule['type'] not in self.follow_ups:
+                self.follow_ups[rule['type']] = {
+                    'paths': list(rule.get('follow_up', [])),
+                    'details': {name: [re.compile(pattern.encode('utf-8')) for pattern in patterns]
+                                for name, patterns in rule.get('details', {}).items()},
+                }
+            compiled = {
+                'type': rule['type'],
+                'vendor': rule.get('vendor'),
+                'title': [t.lower() for t in rule.get('title', [])],
+                'body': [b.encode('utf-8') for b in rule.get('body', [])],
+                'header': {name.lower(): [v.lower() for v in values]
+                           for name, values in rule.get('header', {}).items()},
+                'status': set(rule.get('status', [])),
+                'cert': [c.lower() for c in rule.get('cert', [])],
+            }
+            title_literals.extend(compiled['title'])
+            cert_literals.extend(compiled['cert'])
+            body_literals.extend(compiled['body'])
+            for name, values in compiled['header'].items():
+                header_literals.setdefault(name, []).extend(values)
+            self.rules.append(compiled)
+        
+        # A body literal can straddle two reads by at most this many bytes
+        self.body_overlap = max((len(literal) for literal in body_literals), default=1) - 1
+        
+        self.title_literals = compile_literals(title_literals)
+        self.body_literals = compile_literals(body_literals)
+        self.header_literals = {name: compile_literals(values) for name, values in header_literals.items()}
+        self.cert_literals = compile_literals(cert_literals)
+    
+    def find_cert(self, certificate):
+        """Certificate literals found in a certificate's subject and issuer"""
+        if not certificate:
+            return set()
+        names = '\n'.join(name for name in (certificate['subject'], certificate['issuer']) if name)
+        return find_literals(self.cert_literals, names.lower())
+    
+    def find_headers(self, headers):
+        """Header literals found in each parsed header"""
+        return {name: find_literals(compiled, headers.get(name, '').lower())
+                for name, compiled in self.header_literals.items()}
+    
+    def match(self, response, vendor_only=False, certificate=None):
+        """Fingerprint a raw response and optional TLS certificate; returns a dict with the rule's type or None"""
+        status, headers, title = parse_http_response(response)
+        
+        found_title = find_literals(self.title_literals, title.lower())
+        found_cert = self.find_cert(certificate)
+        found_body = find_literals(self.body_literals, response)
+        found_headers = self.find_headers(headers)
+        
+        fingerprint = {
+            'status': status,
+            'title': title,
+            'server': headers.get('server', "Unknown"),
+            'type': None,
+            'vendor': None,
+        }
+        
+        for rule in self.rules:
+            if vendor_only and not rule['vendor']:
+                continue
+            if rule['status'] and status not in rule['status']:
+                continue
+            if rule['title'] and found_title.isdisjoint(rule['title']):
+                continue
+            if rule['body'] and found_body.isdisjoint(rule['body']):
+                continue
+            if any(found_headers[name].isdisjoint(values) for name, values in rule['header'].items()):
+                continue
+            if rule['cert'] and found_cert.isdisjoint(rule['cert']):
+                continue
+            fingerprint['type'] = rule['type']
+            fingerprint['vendor'] = rule['vendor']
+            break
+        
+        return fingerprint
+    
+    def progress(self, certificate=None):
+        """Start fingerprinting a response as it arrives"""
+        return MatchProgress(self, certificate)
+    
+    def settled(self, progress):
+        """True once no later bytes of a partial response can change which rule matches"""
+        for rule in self.rules:
+            if rule['status'] and progress.status not in rule['status']:
+                continue
+            if any(progress.found_headers[name].isdisjoint(values) for name, values in rule['header'].items()):
+                continue
+            if rule['cert'] and progress.found_cert.isdisjoint(rule['cert']):
+                continue
+            if rule['title'] and progress.found_title is not None and progress.found_title.isdisjoint(rule['title']):
+                continue
+            # The rule has not failed: it decides the result if it already
+            # matches, and otherwise later bytes may still make it match
+            if rule['title'] and progress.found_title is None:
+                return False
+            return not rule['body'] or not progress.found_body.isdisjoint(rule['body'])
+        return True
+    
+    def follow_up_paths(self, camera_type):
+        """Paths to request after a response fingerprinted as camera_type"""
+        follow_up = self.follow_ups.get(camera_type)
+        return follow_up['paths'] if follow_up else []
+    
+    def details(self, camera_type, responses):
+        """Detail fields (model, firmware...) from the first response each pattern matches"""
+        follow_up = self.follow_ups.get(camera_type)
+        if not follow_up:
+            return {}
+        found = {}
+        for name, patterns in follow_up['details'].items():
+            for response in responses:
+                match = next(filter(None, (pattern.search(response) for pattern in patterns)), None)
+                if match:
+                    found[name] = match.group(1).decode('utf-8', errors='ignore').strip()
+                    break
+        return found
+
+
+class MatchProgress:
+    """Signature literals found so far in a response that is still arriving; every byte is scanned once"""
+    
+    def __init__(self, matcher, certificate=None):
+        self.matcher = matcher
+        self.found_cert = matcher.find_cert(certificate)
+        self.found_body = set()
+        self.scanned = 0
+        # Unknown until the headers are in and the title has closed
+        self.status = None
+        self.found_headers = None
+        self.found_title = None
+        self.title_closed = False
+    
+    def headers(self, head):
+        """Take the complete response headers"""
+        self.status, headers, _ = parse_http_response(head)
+        self.found_headers = self.matcher.find_headers(headers)
+    
+    def feed(self, buffer, length):
+        """Scan the bytes of buffer[:length] that arrived since the last call"""
+        start = max(0, self.scanned - self.matcher.body_overlap)
+        self.found_body |= find_literals(self.matcher.body_literals, buffer, start, length)
+        if self.found_title is None:
+            if not self.title_closed:
+                self.title_closed = TITLE_END_RE.search(buffer, max(0, self.scanned - 7), length) is not None
+            if self.title_closed:
+                title_match = TITLE_RE.search(buffer, 0, length)
+                if title_match:
+                    title = title_match.group(1).decode('utf-8', errors='ignore').strip()
+                    self.found_title = find_literals(self.matcher.title_literals, title.lower())
+        self.scanned = length
+    
+    def settled(self):
+        return self.found_headers is not None and self.matcher.settled(self)
+
+
+def load_signatures(path=SIGNATURES_FILE):
+    """Load and compile the fingerprint database"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            rules = json.load(f)['signatures']
+    except (OSError, ValueError, KeyError) as e:
+        print(f"{Fore.RED}[!] Could not load signatures from {path}: {e}{Style.RESET_ALL}")
+        rules = []
+    return SignatureMatcher(rules)
+
+
+_matcher = None
+
+
+def get_matcher():
+    """Return the shared signature matcher, loading it on first use"""
+    global _matcher
+    if _matcher is None:
+        _matcher = load_signatures()
+    return _matcher
+
+
+def build_url(ip, port, path='/', tls=False):
+    """Build the web UI URL for an IP and port"""
+    scheme, default_port = ('https', 443) if tls else ('http', 80)
+    url = f"{scheme}://{ip}:{port}" if port != default_port else f"{scheme}://{ip}"
+    return url if path == '/' else url + path
+
+
+def make_result(ip, port, response, path='/', certificate=None):
+    """Build a result dict for a camera response, or None if it is not a camera"""
+    fingerprint = get_matcher().match(response, certificate=certificate)
+    
+    # Only keep cameras (not regular web servers)
+    if not fingerprint['type']:
+        return None
+    
+    result = {
+        'ip': ip,
+        'port': port,
+        'title': fingerprint['title'],
+        'server': fingerprint['server'],
+        'url': build_url(ip, port, path, tls=certificate is not None),
+        'type': fingerprint['type']
+    }
+    if certificate is not None:
+        result['tls_subject'] = certificate['subject']
+        result['tls_issuer'] = certificate['issuer']
+    return result
+
+
+def raise_file_limit(wanted):
+    """Raise the soft open-file limit so the async engine can hold many sockets"""
+    if resource is None:
+        return wanted
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard != resource.RLIM_INFINITY:
+            wanted = min(wanted, hard)
+        if soft != resource.RLIM_INFINITY and soft < wanted:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+            soft = wanted
+        return soft if soft != resource.RLIM_INFINITY else wanted
+    except (ValueError, OSError):
+        return wanted
+
+
+def build_request(ip, path='/', keep_alive=False):
+    """Build the banner GET request for an IP"""
+    connection = 'keep-alive' if keep_alive else 'close'
+    return f'GET {path} HTTP/1.1\r\nHost: {ip}\r\nConnection: {connection}\r\n\r\n'.encode()
+
+
+CERT_NAME_OIDS = {'2.5.4.3': 'CN', '2.5.4.6': 'C', '2.5.4.7': 'L', '2.5.4.8': 'ST', '2.5.4.10': 'O', '2.5.4.11': 'OU'}
+
+
+def der_element(data, position):
+    """Read the DER element at position; returns (tag, content start, content end)"""
+    tag = data[position]
+    length = data[position + 1]
+    position += 2
+    if length & 0x80:
+        count = length & 0x7f
+        length = int.from_bytes(data[position:position + count], 'big')
+        position += count
+    if position + length > len(data):
+        raise ValueError("truncated DER element")
+    return tag, position, position + length
+
+
+def der_children(data, start, end):
+    """Yield (tag, content start, content end) for each element in data[start:end]"""
+    while start < end:
+        tag, content_start, start = der_element(data, start)
+        yield tag, content_start, start
+
+
+def der_oid(value):
+    """Dotted form of a DER object identifier"""
+    parts = [value[0] // 40, value[0] % 40]
+    number = 0
+    for byte in value[1:]:
+        number = number << 7 | byte & 0x7f
+        if not byte & 0x80:
+            parts.append(number)
+            number = 0
+    return '.'.join(map(str, parts))
+
+
+def der_name(data, start, end):
+    """Format an X.509 Name as 'CN=..., O=...' (common attributes only)"""
+    fields = []
+    for _, set_start, set_end in der_children(data, start, end):
+        for _, pair_start, pair_end in der_children(data, set_start, set_end):
+            (_, oid_start, oid_end), (tag, value_start, value_end) = list(der_children(data, pair_start, pair_end))[:2]
+            name = CERT_NAME_OIDS.get(der_oid(data[oid_start:oid_end]))
+            if name:
+                encoding = 'utf-16-be' if tag == 0x1e else 'utf-8'  # BMPString
+                fields.append(f"{name}={data[value_start:value_end].decode(encoding, errors='replace')}")
+    return ', '.join(fields)
+
+
+def certificate_names(der):
+    """Subject and issuer of a DER certificate (ssl gives neither when verification is off)"""
+    try:
+        _, certificate_start, _ = der_element(der, 0)
+        _, tbs_start, tbs_end = der_element(der, certificate_start)
+        fields = list(der_children(der, tbs_start, tbs_end))
+        if fields[0][0] == 0xa0:  # Explicit version
+            fields = fields[1:]
+        # serialNumber, signature, issuer, validity, subject
+        _, issuer_start, issuer_end = fields[2]
+        _, subject_start, subject_end = fields[4]
+        return der_name(der, subject_start, subject_end), der_name(der, issuer_start, issuer_end)
+    except (IndexError, ValueError):
+        return None, None
+
+
+_tls_context = None
+
+
+def get_tls_context():
+    """Return the shared client context: no verification, and old protocol versions allowed"""
+    # Sessions can only be resumed by the context that made them, so every
+    # probe uses this one
+    global _tls_context
+    if _tls_context is None:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        context.options |= getattr(ssl, 'OP_LEGACY_SERVER_CONNECT', 0)
+        # Camera firmware often ships old TLS stacks and small keys
+        try:
+            context.minimum_version = ssl.TLSVersion.TLSv1
+            context.set_ciphers('DEFAULT:@SECLEVEL=0')
+        except (ValueError, ssl.SSLError):
+            pass
+        _tls_context = context
+    return _tls_context
+
+
+class TlsSessionCache:
+    """Bounded LRU of TLS sessions by (host, port, SNI name), so later handshakes with a server can resume"""
+    
+    def __init__(self, capacity=TLS_SESSION_CACHE_SIZE):
+        self.capacity = capacity
+        self.sessions = collections.OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, ip, port, server_hostname=None):
+        """Session to offer to ip:port under an SNI name, or None"""
+        key = (ip_to_int(ip), port, server_hostname)
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is not None:
+                self.sessions.move_to_end(key)
+            return session
+    
+    def put(self, ip, port, session, server_hostname=None):
+        """Remember the session a finished exchange with ip:port ended with"""
+        if session is None:
+            return
+        key = (ip_to_int(ip), port, server_hostname)
+        with self.lock:
+            self.sessions[key] = session
+            self.sessions.move_to_end(key)
+            while len(self.sessions) > self.capacity:
+                self.sessions.popitem(last=False)
+    
+    def __len__(self):
+        return len(self.sessions)
+
+
+tls_sessions = TlsSessionCache()
+
+
+def tls_certificate(tls, metrics=None):
+    """Subject and issuer after a handshake on an SSLSocket or SSLObject; counts resumed handshakes"""
+    if metrics is not None:
+        metrics.inc('tls_handshakes_total', resumed='yes' if tls.session_reused else 'no')
+    der = tls.getpeercert(binary_form=True)
+    subject, issuer = certificate_names(der) if der else (None, None)
+    return {'subject': subject, 'issuer': issuer}
+
+
+class ScanControl:
+    """Pause, resume and stop for a running scan, built on events so waiting costs nothing"""
+    
+    def __init__(self, events=threading):
+        # Pass `multiprocessing` to share the control with worker processes
+        self.running = events.Event()  # Cleared while paused
+        self.running.set()
+        self.stopped = events.Event()
+    
+    @property
+    def paused(self):
+        return not self.running.is_set()
+    
+    def pause(self):
+        if not self.stopped.is_set():
+            self.running.clear()
+    
+    def resume(self):
+        self.running.set()
+    
+    def toggle_pause(self):
+        """Pause a running scan or resume a paused one; returns True if now paused"""
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+        return self.paused
+    
+    def stop(self):
+        """Stop handing out new probes; probes already in flight still finish"""
+        self.stopped.set()
+        self.running.set()  # Wake anything waiting out a pause
+    
+    def wait(self):
+        """Block while paused; returns False once the scan is stopped"""
+        if not self.running.is_set():  # Event.wait() takes a lock even when set
+            self.running.wait()
+        return not self.stopped.is_set()
+    
+    def gate(self, targets):
+        """Pass targets through while running, hold them while paused and end on stop"""
+        for target in targets:
+            if not self.wait():
+                return
+            yield target
+
+
+class ChunkSizer:
+    """Batches targets into work units sized so each keeps one worker busy for about CHUNK_SECONDS"""
+    
+    def __init__(self, controller, size=CHUNK_START, maximum=CHUNK_MAX):
+        self.controller = controller
+        self.size = size
+        self.maximum = maximum
+        self.done = 0
+        self.window_start = time.monotonic()
+    
+    def chunk_done(self, count):
+        # Unlocked: a lost update only nudges the rate estimate
+        self.done += count
+    
+    def _retune(self):
+        now = time.monotonic()
+        elapsed = now - self.window_start
+        if elapsed < CHUNK_RETUNE_INTERVAL:
+            return
+        # Probes per second per worker, times the time one unit should take
+        per_worker = self.done / elapsed / max(1, int(self.controller.limit))
+        self.size = max(1, min(self.maximum, int(per_worker * CHUNK_SECONDS)))
+        self.done = 0
+        self.window_start = now
+    
+    def chunks(self, targets):
+        """Group an iterable of targets into lists of the current unit size"""
+        chunk = []
+        for target in targets:
+            chunk.append(target)
+            if len(chunk) >= self.size:
+                yield chunk
+                chunk = []
+                self._retune()
+        if chunk:
+            yield chunk
+
+
+class ConcurrencyController:
+    """AIMD limit on in-flight probes, driven by timeouts, local resource errors and latency"""
+    
+    def __init__(self, initial, minimum=CONCURRENCY_MIN, maximum=ASYNC_CONCURRENCY):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.step = max(1, int(self.limit) // 10)
+        self.in_flight = 0
+        self.cond = threading.Condition()
+        self.async_waiters = collections.deque()
+        
+        # Baselines describe the target network when it is not overloaded
+        self.timeout_baseline = None
+        self.latency_baseline = None
+        self._reset_window()
+    
+    def _reset_window(self):
+        self.samples = 0
+        self.timeouts = 0
+        self.resource_errors = 0
+        self.latency_total = 0.0
+        self.latency_samples = 0
+    
+    def acquire(self):
+        """Block until a probe slot is free (thread engines)"""
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait()
+            self.in_flight += 1
+    
+    def try_acquire(self):
+        with self.cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+    
+    async def acquire_async(self):
+        """Wait until a probe slot is free (async engine; must stay on one event loop)"""
+        while not self.try_acquire():
+            waiter = asyncio.get_running_loop().create_future()
+            self.async_waiters.append(waiter)
+            await waiter
+    
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify()
+            self._wake_async(1)
+    
+    def _wake_async(self, count):
+        while count and self.async_waiters:
+            waiter = self.async_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                count -= 1
+    
+    def record(self, outcome, latency=None):
+        """Feed one connect outcome (and its latency when it succeeded)"""
+        with self.cond:
+            self.samples += 1
+            if outcome == OUTCOME_TIMEOUT:
+                self.timeouts += 1
+            elif outcome == OUTCOME_RESOURCE:
+                self.resource_errors += 1
+            if latency is not None:
+                self.latency_total += latency
+                self.latency_samples += 1
+            
+            # Local resource errors mean back off now; otherwise decide once per window
+            if self.resource_errors or self.samples >= max(CONCURRENCY_MIN, int(self.limit)):
+                self._adjust()
+    
+    def _adjust(self):
+        timeout_ratio = self.timeouts / self.samples
+        latency = self.latency_total / self.latency_samples if self.latency_samples else None
+        
+        congested = self.resource_errors > 0
+        if self.timeout_baseline is not None and timeout_ratio > self.timeout_baseline + TIMEOUT_SPIKE:
+            congested = True
+        if latency is not None and self.latency_baseline and latency > self.latency_baseline * LATENCY_SPIKE:
+            congested = True
+        
+        if congested:
+            self.limit = max(self.minimum, self.limit * BACKOFF_FACTOR)
+        else:
+            # Dead address space times out no matter what, so the baseline
+            # tracks the healthy timeout ratio rather than assuming zero
+            if self.timeout_baseline is None:
+                self.timeout_baseline = timeout_ratio
+            else:
+                self.timeout_baseline = 0.8 * self.timeout_baseline + 0.2 * timeout_ratio
+            if latency is not None:
+                if self.latency_baseline is None:
+                    self.latency_baseline = latency
+                else:
+                    self.latency_baseline = 0.8 * self.latency_baseline + 0.2 * latency
+            
+            grown = min(self.maximum, self.limit + self.step)
+            if int(grown) > int(self.limit):
+                self.cond.notify(int(grown) - int(self.limit))
+                self._wake_async(int(grown) - int(self.limit))
+            self.limit = grown
+        
+        self._reset_window()
+
+
+class RttEstimator:
+    """Per-subnet smoothed RTT and variance (RFC 6298) that set connect/read timeouts"""
+    
+    def __init__(self, prefix=RTT_PREFIX, connect_timeout=INITIAL_RTO, read_timeout=READ_TIMEOUT):
+        self.shift = 32 - prefix
+        self.default_connect = connect_timeout
+        self.default_read = read_timeout
+        self.subnets = {}
+    
+    def sample(self, ip_int, rtt):
+        """Feed the handshake time of a completed connect (SYN-ACK or RST)"""
+        # Lost updates from concurrent workers only drop a sample, so no lock
+        key = ip_int >> self.shift
+        state = self.subnets.get(key)
+        if state is None:
+            self.subnets[key] = [rtt, rtt / 2]
+        else:
+            srtt, rttvar = state
+            state[1] = 0.75 * rttvar + 0.25 * abs(srtt - rtt)
+            state[0] = 0.875 * srtt + 0.125 * rtt
+    
+    def rto(self, ip_int):
+        """Retransmission-style timeout for the subnet, or None if it has no samples yet"""
+        state = self.subnets.get(ip_int >> self.shift)
+        if state is None:
+            return None
+        return state[0] + 4 * state[1]
+    
+    def connect_timeout(self, ip_int):
+        rto = self.rto(ip_int)
+        if rto is None:
+            return self.default_connect
+        return min(MAX_CONNECT_TIMEOUT, max(MIN_CONNECT_TIMEOUT, rto))
+    
+    def read_timeout(self, ip_int):
+        rto = self.rto(ip_int)
+        if rto is None:
+            return self.default_read
+        return min(MAX_READ_TIMEOUT, max(MIN_READ_TIMEOUT, rto * READ_RTO_FACTOR))
+
+
+class ConsoleRenderer:
+    """Owns the console during a scan: probe threads queue lines, one thread writes them under a status line"""
+    
+    def __init__(self, status=None, quiet=False, stream=None, interval=RENDER_INTERVAL, live=None):
+        # status() returns {'done', 'total', 'unit', 'hits'} and, when probes
+        # are counted as they finish, 'probes' for the rate
+        self.status = status
+        self.quiet = quiet
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self.controller = None  # Set by the engine for the concurrency figures
+        self.lines = SimpleQueue()
+        self.done = threading.Event()
+        self.thread = None
+        # A terminal gets one status line redrawn in place; anything else a
+        # status line every STATUS_INTERVAL
+        self.live = self.stream.isatty() if live is None else live
+        self.showing = False
+        self.samples = collections.deque()
+        self.last_status = time.monotonic()
+    
+    def print(self, text):
+        """Queue a line for the next redraw; never blocks"""
+        if not self.quiet:
+            self.lines.put(text)
+    
+    def start(self):
+        if not self.quiet and self.thread is None:
+            self.done.clear()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        return self
+    
+    def stop(self):
+        """Write the lines still queued and clear the status line"""
+        self.done.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+    
+    def _run(self):
+        while not self.done.wait(self.interval):
+            self._draw()
+        self._draw(final=True)
+    
+    def _status_line(self):
+        state = self.status()
+        now = time.monotonic()
+        count = state.get('probes', state['done'])
+        self.samples.append((now, count))
+        while now - self.samples[0][0] > RENDER_RATE_WINDOW:
+            self.samples.popleft()
+        first_time, first_count = self.samples[0]
+        rate = (count - first_count) / (now - first_time) if now > first_time else 0.0
+        percent = 100.0 * state['done'] / state['total'] if state['total'] else 100.0
+        parts = [f"{state['done']}/{state['total']} {state['unit']} ({percent:.1f}%)",
+                 f"{rate:.0f} {'probes' if 'probes' in state else state['unit']}/sec",
+                 f"{state['hits']} cameras"]
+        if self.controller is not None:
+            parts.append(f"concurrency {int(self.controller.limit)} ({self.controller.in_flight} in flight)")
+        return "[i] " + " | ".join(parts)
+    
+    def _draw(self, final=False):
+        lines = []
+        hidden = 0
+        while True:
+            try:
+                text = self.lines.get_nowait()
+            except Empty:
+                break
+            if final or len(lines) < RENDER_MAX_LINES:
+                lines.append(text)
+            else:
+                hidden += 1
+        if hidden:
+            lines.append(f"{Fore.CYAN}[i] {hidden} more lines not shown (results are still saved){Style.RESET_ALL}")
+        
+        out = []
+        if self.showing:
+            out.append('\r\033[K')
+            self.showing = False
+        out.extend(line + '\n' for line in lines)
+        if not final and self.status is not None:
+            text = self._status_line()
+            if self.live:
+                # Longer than the terminal would wrap, and \r only goes back one row
+                width = shutil.get_terminal_size().columns - 1
+                out.append(f"{Fore.CYAN}{text[:width]}{Style.RESET_ALL}")
+                self.showing = True
+            elif time.monotonic() - self.last_status >= STATUS_INTERVAL:
+                out.append(f"{Fore.CYAN}{text}{Style.RESET_ALL}\n")
+                self.last_status = time.monotonic()
+        if out:
+            try:
+                self.stream.write(''.join(out))
+                self.stream.flush()
+            except (OSError, ValueError):
+                pass
+
+
+def metric_name(name, labels):
+    """Prometheus-style series name, e.g. connects_total{outcome="open"}"""
+    if not labels:
+        return name
+    
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return name + '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels) + '}'
+
+
+class Metrics:
+    """Thread-safe scan counters, sampled gauges and latency histograms"""
+    
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters = collections.Counter()  # (name, labels) -> value
+        self.gauges = {}  # (name, labels) -> function returning the current value
+        self.histograms = {}  # name -> [count per bucket (last one is +Inf), sum]
+        self.callbacks = []
+        self.server = None
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+    
+    def inc(self, name, value=1, **labels):
+        """Add to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] += value
+    
+    def observe(self, name, value):
+        """Record one sample in a histogram"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += value
+    
+    def gauge(self, name, read, **labels):
+        """Register a function that is sampled whenever the metrics are read"""
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = read
+    
+    def _collect(self):
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items(), key=lambda item: item[0])
+            histograms = sorted((name, list(counts), total) for name, (counts, total) in self.histograms.items())
+        sampled = []
+        for key, read in gauges:
+            try:
+                sampled.append((key, read()))
+            except Exception:
+                pass
+        return counters, sampled, histograms
+    
+    def snapshot(self):
+        """Current values as {'counters': ..., 'gauges': ..., 'histograms': ...}"""
+        counters, gauges, histograms = self._collect()
+        snapshot = {
+            'counters': {metric_name(name, labels): value for (name, labels), value in counters},
+            'gauges': {metric_name(name, labels): value for (name, labels), value in gauges},
+            'histograms': {},
+        }
+        for name, counts, total in histograms:
+            # Cumulative counts per upper bound, as in Prometheus
+            cumulative = {}
+            running = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                running += count
+                cumulative[str(bound)] = running
+            snapshot['histograms'][name] = {'buckets': cumulative, 'sum': total, 'count': running}
+        return snapshot
+    
+    def prometheus(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        counters, gauges, histograms = self._collect()
+        lines = []
+        typed = set()
+        for kind, series in (('counter', counters), ('gauge', gauges)):
+            for (name, labels), value in series:
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {METRICS_PREFIX}{name} {kind}")
+                lines.append(f"{METRICS_PREFIX}{metric_name(name, labels)} {value}")
+        for name, counts, total in histograms:
+            lines.append(f"# TYPE {METRICS_PREFIX}{name} histogram")
+            running = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                running += count
+                le = '+Inf' if bound == float('inf') else str(bound)
+                lines.append(f'{METRICS_PREFIX}{name}_bucket{{le="{le}"}} {running}')
+            lines.append(f"{METRICS_PREFIX}{name}_sum {total}")
+            lines.append(f"{METRICS_PREFIX}{name}_count {running}")
+        return '\n'.join(lines) + '\n'
+    
+    def add_callback(self, callback, interval=STATUS_INTERVAL):
+        """Call `callback(snapshot)` every `interval` seconds, and once more on close()"""
+        def run():
+            while not self.stopped.wait(interval):
+                self._notify(callback)
+        
+        self.callbacks.append(callback)
+        threading.Thread(target=run, daemon=True).start()
+    
+    def _notify(self, callback):
+        try:
+            callback(self.snapshot())
+        except Exception as e:
+            print(f"{Fore.RED}[!] Metrics callback failed: {e}{Style.RESET_ALL}")
+    
+    def serve(self, port, host='127.0.0.1'):
+        """Expose GET /metrics over HTTP on a background thread; returns the bound (host, port)"""
+        self.server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.metrics = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server.server_address[:2]
+    
+    def close(self):
+        """Stop the periodic callbacks (after a final call) and the HTTP endpoint"""
+        self.stopped.set()
+        for callback in self.callbacks:
+            self._notify(callback)
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """Serves Metrics.prometheus() at /metrics"""
+    timeout = 10  # Overrides the short global socket timeout
+    
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.metrics.prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass  # Scrapes would flood the console
+
+
+def register_engine_gauges(metrics, controller, banner_depth, target_depth=None):
+    """Expose an engine's concurrency and queue depths as gauges"""
+    metrics.gauge('in_flight_probes', lambda: controller.in_flight)
+    metrics.gauge('concurrency_limit', lambda: int(controller.limit))
+    metrics.gauge('queue_depth', banner_depth, queue='banner')
+    if target_depth is not None:
+        metrics.gauge('queue_depth', target_depth, queue='targets')
+
+
+def connect_outcome(err):
+    """Map a connect errno (0 for success) to a probe outcome"""
+    if err == 0:
+        return OUTCOME_OPEN
+    if err == errno.ECONNREFUSED:
+        return OUTCOME_REFUSED
+    if err in (errno.ETIMEDOUT, errno.EAGAIN, errno.EWOULDBLOCK, errno.EINPROGRESS):
+        return OUTCOME_TIMEOUT
+    if err in RESOURCE_ERRNOS:
+        return OUTCOME_RESOURCE
+    return OUTCOME_ERROR
+
+
+def banner_outcome(reader, result):
+    """Outcome of a banner fetch: camera, other web service, or no data"""
+    if result:
+        return OUTCOME_CAMERA
+    return OUTCOME_WEB if reader is not None and reader.length else OUTCOME_OPEN
+
+
+def fetch_banner(sock, ip, port, read_timeout=READ_TIMEOUT, byte_budget=MAX_RESPONSE_BYTES, metrics=None,
+                 paths=DEFAULT_PATHS, follow_up=False, controller=None, rtt=None):
+    """Banner stage: request each path in turn until one is a camera; returns (outcome, result or None)"""
+    outcome = OUTCOME_OPEN
+    for index, path in enumerate(paths):
+        if index:
+            # Later paths need a fresh connection (requests say Connection: close),
+            # which takes a concurrency slot and a measured timeout like any connect
+            if controller is not None:
+                controller.acquire()
+            timeout = rtt.connect_timeout(ip_to_int(ip)) if rtt is not None else read_timeout
+            started = time.monotonic()
+            try:
+                sock = socket.create_connection((ip, port), timeout)
+            except OSError:
+                break
+            finally:
+                if controller is not None:
+                    controller.release()
+            if rtt is not None:
+                rtt.sample(ip_to_int(ip), time.monotonic() - started)
+        path_outcome, result = fetch_path(sock, ip, port, path, read_timeout, byte_budget, metrics, follow_up)
+        if path_outcome != OUTCOME_OPEN:
+            outcome = path_outcome
+        if result:
+            return outcome, result
+    return outcome, None
+
+
+def fetch_path(sock, ip, port, path='/', read_timeout=READ_TIMEOUT, byte_budget=MAX_RESPONSE_BYTES, metrics=None,
+               follow_up=False):
+    """Request one path on a connected socket and close it; returns (outcome, result or None)"""
+    reader = None
+    result = None
+    try:
+        sock.settimeout(read_timeout)
+        certificate = None
+        if port in TLS_PORTS:
+            # wrap_socket takes over the socket and closes it if the handshake fails
+            sock = get_tls_context().wrap_socket(sock, session=tls_sessions.get(ip, port))
+            certificate = tls_certificate(sock, metrics)
+        sock.sendall(build_request(ip, path, keep_alive=follow_up))
+        
+        reader = ResponseReader(byte_budget, get_matcher(), certificate)
+        while not reader.done:
+            try:
+                reader.feed(sock.recv_into(reader.free()))
+            except OSError:
+                break
+        
+        if certificate is not None:
+            # TLS 1.3 session tickets arrive after the handshake, with the response
+            tls_sessions.put(ip, port, sock.session)
+        if reader.length:
+            result = make_result(ip, port, reader.response(), path, certificate)
+        if result and follow_up:
+            result.update(fetch_details(sock, ip, result['type'], bytes(reader.response()), metrics))
+    except OSError:
+        pass
+    finally:
+        sock.close()
+        if metrics is not None and reader is not None:
+            metrics.inc('bytes_read_total', reader.length)
+    return banner_outcome(reader, result), result
+
+
+def follow_up_requests(ip, paths):
+    """Pipelined GETs for follow-up paths; the last one asks the server to close"""
+    return b''.join(build_request(ip, path, keep_alive=index < len(paths) - 1) for index, path in enumerate(paths))
+
+
+def fetch_details(sock, ip, camera_type, response, metrics=None):
+    """Pipeline a camera type's follow-up paths on the banner's keep-alive connection; returns its details"""
+    matcher = get_matcher()
+    paths = matcher.follow_up_paths(camera_type)
+    responses = [response]
+    if paths and keeps_alive(response):
+        # The banner response is framed again first, which also skips any of
+        # its body the banner reader stopped short of
+        pipeline = PipelineReader(len(paths) + 1, len(response) + FOLLOW_UP_BYTES)
+        pipeline.feed(response)
+        try:
+            sock.sendall(follow_up_requests(ip, paths))
+            while not pipeline.done:
+                pipeline.feed(sock.recv(FOLLOW_UP_BYTES))
+        except OSError:
+            pass
+        responses.extend(pipeline.responses[1:])
+        if metrics is not None:
+            metrics.inc('follow_up_requests_total', len(paths))
+            metrics.inc('follow_up_responses_total', len(pipeline.responses[1:]))
+            metrics.inc('bytes_read_total', pipeline.received - len(response))
+    return matcher.details(camera_type, responses)
+
+
+async def async_fetch_details(stream, ip, camera_type, response, read_timeout=READ_TIMEOUT, metrics=None):
+    """Pipeline a camera type's follow-up paths on the banner's keep-alive connection; returns its details"""
+    matcher = get_matcher()
+    paths = matcher.follow_up_paths(camera_type)
+    responses = [response]
+    if paths and keeps_alive(response):
+        pipeline = PipelineReader(len(paths) + 1, len(response) + FOLLOW_UP_BYTES)
+        pipeline.feed(response)
+        try:
+            await asyncio.wait_for(stream.sendall(follow_up_requests(ip, paths)), read_timeout)
+            while not pipeline.done:
+                pipeline.feed(await asyncio.wait_for(stream.recv(FOLLOW_UP_BYTES), read_timeout))
+        except (asyncio.TimeoutError, OSError):
+            pass
+        responses.extend(pipeline.responses[1:])
+        if metrics is not None:
+            metrics.inc('follow_up_requests_total', len(paths))
+            metrics.inc('follow_up_responses_total', len(pipeline.responses[1:]))
+            metrics.inc('bytes_read_total', pipeline.received - len(response))
+    return matcher.details(camera_type, responses)
+
+
+class AsyncSocketStream:
+    """A connected non-blocking socket driven by the event loop"""
+    
+    def __init__(self, sock):
+        self.sock = sock
+        self.loop = asyncio.get_running_loop()
+    
+    def sendall(self, data):
+        return self.loop.sock_sendall(self.sock, data)
+    
+    def recv_into(self, buffer):
+        return self.loop.sock_recv_into(self.sock, buffer)
+    
+    def recv(self, size):
+        return self.loop.sock_recv(self.sock, size)
+    
+    def close(self):
+        self.sock.close()
+
+
+class AsyncTlsStream(AsyncSocketStream):
+    """TLS client over a non-blocking socket, through memory BIOs so a cached session can be offered"""
+    
+    def __init__(self, sock, session=None):
+        super().__init__(sock)
+        self.incoming = ssl.MemoryBIO()
+        self.outgoing = ssl.MemoryBIO()
+        self.tls = get_tls_context().wrap_bio(self.incoming, self.outgoing, session=session)
+    
+    async def _run(self, operation, *args):
+        # Retry the operation until OpenSSL has the records it needs, sending
+        # whatever it produced along the way
+        while True:
+            try:
+                result = operation(*args)
+            except ssl.SSLWantReadError:
+                await self._flush()
+                data = await self.loop.sock_recv(self.sock, TLS_RECORD_BYTES)
+                if data:
+                    self.incoming.write(data)
+                else:
+                    self.incoming.write_eof()
+                continue
+            await self._flush()
+            return result
+    
+    async def _flush(self):
+        data = self.outgoing.read()
+        if data:
+            await self.loop.sock_sendall(self.sock, data)
+    
+    async def handshake(self):
+        await self._run(self.tls.do_handshake)
+    
+    async def sendall(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[await self._run(self.tls.write, view):]
+    
+    async def recv_into(self, buffer):
+        try:
+            return await self._run(self.tls.read, len(buffer), buffer)
+        except (ssl.SSLZeroReturnError, ssl.SSLEOFError):
+            return 0
+    
+    async def recv(self, size):
+        try:
+            return await self._run(self.tls.read, size)
+        except (ssl.SSLZeroReturnError, ssl.SSLEOFError):
+            return b''
+
+
+async def async_connect(ip, port, connect_timeout=CONNECT_TIMEOUT):
+    """Connect stage: return (connected non-blocking socket or None, outcome)"""
+    loop = asyncio.get_running_loop()
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    except OSError as e:
+        return None, connect_outcome(e.errno)
+    sock.setblocking(False)
+    try:
+        await asyncio.wait_for(loop.sock_connect(sock, (ip, port)), connect_timeout)
+        return sock, OUTCOME_OPEN
+    except asyncio.TimeoutError:
+        sock.close()
+        return None, OUTCOME_TIMEOUT
+    except OSError as e:
+        sock.close()
+        return None, connect_outcome(e.errno)
+
+
+async def async_fetch_banner(sock, ip, port, read_timeout=READ_TIMEOUT, byte_budget=MAX_RESPONSE_BYTES,
+                             metrics=None, paths=DEFAULT_PATHS, follow_up=False, controller=None, rtt=None):
+    """Banner stage: request each path in turn until one is a camera; returns (outcome, result or None)"""
+    outcome = OUTCOME_OPEN
+    for index, path in enumerate(paths):
+        if index:
+            # Later paths need a fresh connection (requests say Connection: close),
+            # which takes a concurrency slot and a measured timeout like any connect
+            if controller is not None:
+                await controller.acquire_async()
+            timeout = rtt.connect_timeout(ip_to_int(ip)) if rtt is not None else read_timeout
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            try:
+                sock, _ = await async_connect(ip, port, timeout)
+            finally:
+                if controller is not None:
+                    controller.release()
+            if sock is None:
+                break
+            if rtt is not None:
+                rtt.sample(ip_to_int(ip), loop.time() - started)
+        path_outcome, result = await async_fetch_path(sock, ip, port, path, read_timeout, byte_budget, metrics,
+                                                      follow_up)
+        if path_outcome != OUTCOME_OPEN:
+            outcome = path_outcome
+        if result:
+            return outcome, result
+    return outcome, None
+
+
+async def async_fetch_path(sock, ip, port, path='/', read_timeout=READ_TIMEOUT, byte_budget=MAX_RESPONSE_BYTES,
+                           metrics=None, follow_up=False):
+    """Request one path on a connected non-blocking socket and close it; returns (outcome, result or None)"""
+    stream = AsyncSocketStream(sock)
+    reader = None
+    result = None
+    try:
+        certificate = None
+        if port in TLS_PORTS:
+            stream = AsyncTlsStream(sock, tls_sessions.get(ip, port))
+            await asyncio.wait_for(stream.handshake(), read_timeout)
+            certificate = tls_certificate(stream.tls, metrics)
+        await asyncio.wait_for(stream.sendall(build_request(ip, path, keep_alive=follow_up)), read_timeout)
+        
+        reader = ResponseReader(byte_budget, get_matcher(), certificate)
+        while not reader.done:
+            try:
+                reader.feed(await asyncio.wait_for(stream.recv_into(reader.free()), read_timeout))
+            except (asyncio.TimeoutError, OSError):
+                break
+        
+        if certificate is not None:
+            # TLS 1.3 session tickets arrive after the handshake, with the response
+            tls_sessions.put(ip, port, stream.tls.session)
+        if reader.length:
+            result = make_result(ip, port, reader.response(), path, certificate)
+        if result and follow_up:
+            result.update(await async_fetch_details(stream, ip, result['type'], bytes(reader.response()),
+                                                    read_timeout, metrics))
+    except (asyncio.TimeoutError, OSError):
+        pass
+    finally:
+        stream.close()
+        if metrics is not None and reader is not None:
+            metrics.inc('bytes_read_total', reader.length)
+    return banner_outcome(reader, result), result
+
+
+async def async_scan(targets, on_result, connect_concurrency=ASYNC_CONCURRENCY,
+                     banner_concurrency=ASYNC_BANNER_CONCURRENCY, byte_budget=MAX_RESPONSE_BYTES,
+                     on_probe_done=None, controller=None, rtt=None, metrics=None, paths=DEFAULT_PATHS,
+                     control=None, follow_up=False):
+    """Run the two-stage connect/banner pipeline over (ip_int, port) targets"""
+    loop = asyncio.get_running_loop()
+    if controller is None:
+        controller = ConcurrencyController(ASYNC_CONCURRENCY_START, maximum=connect_concurrency)
+    if rtt is None:
+        rtt = RttEstimator()
+    # Connected sockets wait here for a banner worker; when it is full the
+    # connect stage blocks instead of piling up open sockets
+    handoff = asyncio.Queue(maxsize=banner_concurrency)
+    # Bounds connect-stage tasks, including those parked on a full handoff;
+    # they give back their controller slot first so follow-up paths can connect
+    connect_tasks = asyncio.Semaphore(connect_concurrency)
+    pending = set()
+    if metrics is not None:
+        register_engine_gauges(metrics, controller, handoff.qsize)
+    
+    def probe_done(ip_int, port, outcome):
+        if metrics is not None:
+            metrics.inc('probes_total', outcome=outcome)
+        if on_probe_done:
+            on_probe_done(ip_int, port, outcome)
+    
+    async def connect_stage(ip_int, port):
+        try:
+            try:
+                started = loop.time()
+                sock, outcome = await async_connect(int_to_ip(ip_int), port, rtt.connect_timeout(ip_int))
+                elapsed = loop.time() - started
+            finally:
+                controller.release()
+            if outcome in (OUTCOME_OPEN, OUTCOME_REFUSED):
+                rtt.sample(ip_int, elapsed)
+            controller.record(outcome, elapsed if sock is not None else None)
+            if metrics is not None:
+                metrics.inc('connects_total', outcome=outcome)
+                metrics.observe('connect_latency_seconds', elapsed)
+            if sock is not None:
+                await handoff.put((sock, ip_int, port))
+            else:
+                probe_done(ip_int, port, outcome)
+        finally:
+            connect_tasks.release()
+    
+    async def banner_worker():
+        while True:
+            sock, ip_int, port = await handoff.get()
+            outcome = OUTCOME_ERROR
+            started = loop.time()
+            try:
+                outcome, result = await async_fetch_banner(sock, int_to_ip(ip_int), port, rtt.read_timeout(ip_int),
+                                                           byte_budget, metrics, paths, follow_up, controller, rtt)
+                if result:
+                    if metrics is not None:
+                        metrics.inc('fingerprints_total', type=result['type'])
+                    on_result(result)
+            finally:
+                handoff.task_done()
+                if metrics is not None:
+                    metrics.observe('banner_latency_seconds', loop.time() - started)
+                probe_done(ip_int, port, outcome)
+    
+    workers = [asyncio.ensure_future(banner_worker()) for _ in range(banner_concurrency)]
+    
+    async def dispatch(ip_int, port):
+        """Start one probe; returns False once the scan is stopping"""
+        if control is not None:
+            if control.paused:
+                # Wait off the event loop so probes already in flight still complete
+                await loop.run_in_executor(None, control.wait)
+            if control.stopped.is_set():
+                return False
+        if metrics is not None:
+            metrics.inc('targets_queued_total')
+        await connect_tasks.acquire()
+        await controller.acquire_async()
+        if metrics is not None:
+            metrics.inc('connects_attempted_total')
+        task = asyncio.ensure_future(connect_stage(ip_int, port))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        return True
+    
+    # Targets are pulled lazily so only the controller's current limit of
+    # connects exists at a time; an async iterable is for targets whose
+    # generation waits on I/O, such as shard leases
+    if hasattr(targets, '__aiter__'):
+        async for ip_int, port in targets:
+            if not await dispatch(ip_int, port):
+                break
+    else:
+        for ip_int, port in targets:
+            if not await dispatch(ip_int, port):
+                break
+    
+    if pending:
+        await asyncio.wait(pending)
+    await handoff.join()
+    
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+
+def fit_file_limit(connect_concurrency, banner_concurrency):
+    """Raise the fd limit for both async stages; returns the (connect, banner) concurrency that fits"""
+    limit = raise_file_limit(connect_concurrency + 2 * banner_concurrency + 256)
+    banner_concurrency = max(1, min(banner_concurrency, (limit - 256) // 3))
+    connect_concurrency = max(1, min(connect_concurrency, limit - 256 - 2 * banner_concurrency))
+    return connect_concurrency, banner_concurrency
+
+
+def run_async_scan(targets, on_result, connect_concurrency=ASYNC_CONCURRENCY,
+                   banner_concurrency=ASYNC_BANNER_CONCURRENCY, byte_budget=MAX_RESPONSE_BYTES,
+                   on_probe_done=None, rtt=None, metrics=None, paths=DEFAULT_PATHS, control=None, follow_up=False,
+                   renderer=None):
+    """Run the async engine to completion, keeping both stages under the fd limit"""
+    connect_concurrency, banner_concurrency = fit_file_limit(connect_concurrency, banner_concurrency)
+    
+    controller = ConcurrencyController(ASYNC_CONCURRENCY_START, minimum=min(CONCURRENCY_MIN, connect_concurrency),
+                                       maximum=connect_concurrency)
+    if renderer is not None:
+        renderer.controller = controller
+        renderer.start()
+    asyncio.run(async_scan(targets, on_result, connect_concurrency, banner_concurrency, byte_budget,
+                           on_probe_done, controller, rtt, metrics, paths, control, follow_up))
+    return controller
+
+
+async def async_sample_blocks(space, port, prefix=SAMPLE_PREFIX, confidence=SAMPLE_CONFIDENCE,
+                              density=SAMPLE_DENSITY, connect_timeout=INITIAL_RTO, concurrency=ASYNC_CONCURRENCY):
+    """Connect to a sample of every block; returns (dead blocks, dead addresses, blocks sampled, probes sent)"""
+    limit = asyncio.Semaphore(concurrency)
+    alive = set()
+    pending = set()
+    sizes = {}
+    probes = 0
+    
+    async def probe(block, ip_int):
+        try:
+            sock, outcome = await async_connect(int_to_ip(ip_int), port, connect_timeout)
+            if sock is not None:
+                sock.close()
+            # Running out of local resources proves nothing, so it keeps the block
+            if outcome in (OUTCOME_OPEN, OUTCOME_REFUSED, OUTCOME_RESOURCE):
+                alive.add(block)
+        finally:
+            limit.release()
+    
+    # Blocks are sampled a window at a time, one address per block per
+    # round, so a block that has already answered gets no more probes
+    blocks = iter_blocks(space, prefix)
+    while True:
+        window = []
+        for block, parts in blocks:
+            addresses = sum(last - first + 1 for first, last in parts)
+            sizes[block] = addresses
+            window.append((block, sample_addresses(parts, sample_size(addresses, confidence, density))))
+            if len(window) == SAMPLE_WINDOW:
+                break
+        if not window:
+            break
+        for index in range(max(len(sample) for _, sample in window)):
+            for block, sample in window:
+                if index >= len(sample) or block in alive:
+                    continue
+                await limit.acquire()
+                probes += 1
+                task = asyncio.ensure_future(probe(block, sample[index]))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+    
+    if pending:
+        await asyncio.wait(pending)
+    dead = [block for block in sizes if block not in alive]
+    return dead, sum(sizes[block] for block in dead), len(sizes), probes
+
+
+def sample_blocks(space, plan, prefix=SAMPLE_PREFIX, confidence=SAMPLE_CONFIDENCE, density=SAMPLE_DENSITY,
+                  demote=False, file=None, quiet=False):
+    """Sampling pre-pass over a target space; returns DeadBlocks for the probe plan and prints what it found"""
+    file = file or sys.stdout
+    
+    def note(text):
+        if not quiet:
+            print(text, file=file)
+    
+    concurrency, _ = fit_file_limit(ASYNC_CONCURRENCY, 0)
+    note(f"{Fore.YELLOW}[*] Sampling /{prefix} blocks on port {plan.ports[0]} "
+         f"({confidence:.0%} sure to keep a block where {density:.0%} of addresses answer)...{Style.RESET_ALL}")
+    start_time = time.time()
+    blocks, addresses, sampled, probes = asyncio.run(
+        async_sample_blocks(space, plan.ports[0], prefix, confidence, density, concurrency=concurrency))
+    dead = DeadBlocks(prefix, blocks, demote)
+    
+    note(f"{Fore.CYAN}[i] Sampled {sampled} blocks with {probes} probes in {time.time() - start_time:.2f}s"
+         f"{Style.RESET_ALL}")
+    if not dead:
+        note(f"{Fore.CYAN}[i] Every block answered; nothing to skip{Style.RESET_ALL}")
+        return dead
+    action = 'probed last' if demote else 'skipped'
+    note(f"{Fore.GREEN}[✓] {len(dead)} dead blocks ({addresses} of {len(space)} addresses) will be {action}:"
+         f"{Style.RESET_ALL}")
+    networks = list(dead.networks())
+    for network in networks[:SAMPLE_REPORT_LIMIT]:
+        note(f"    {network}")
+    if len(networks) > SAMPLE_REPORT_LIMIT:
+        note(f"    ... and {len(networks) - SAMPLE_REPORT_LIMIT} more")
+    return dead
+
+
+DETAIL_FIELDS = ['model', 'firmware']  # Added to results by keep-alive follow-ups when found
+TLS_FIELDS = ['tls_subject', 'tls_issuer']  # Added to results from the certificate of a TLS port
+RESULT_FIELDS = ['ip', 'port', 'title', 'server', 'url', 'type'] + DETAIL_FIELDS + TLS_FIELDS
+
+
+class ResultSink:
+    """Background writer thread fed by a queue, flushing by count or interval"""
+    
+    extension = ''
+    
+    def __init__(self, path, flush_count=FLUSH_COUNT, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_count = flush_count
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.opened = False
+        self.queue = Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def put(self, result):
+        """Hand a result to the writer thread (never blocks the probe path)"""
+        self.queue.put_nowait(result)
+    
+    def close(self):
+        """Write everything still queued and close the output"""
+        self.queue.put(None)
+        self.thread.join()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            # Idle writers block; a pending batch waits at most until its deadline
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                result = self.queue.get(timeout=timeout)
+            except Empty:
+                result = False
+            
+            if result:
+                batch.append(result)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            
+            if batch and (result is None or result is False or len(batch) >= self.flush_count):
+                self._flush(batch)
+                batch = []
+                deadline = None
+            
+            if result is None:
+                break
+        
+        if self.opened:
+            try:
+                self.close_output()
+            except Exception as e:
+                print(f"{Fore.RED}[!] Error closing {self.path}: {e}{Style.RESET_ALL}")
+    
+    def _flush(self, batch):
+        try:
+            # Outputs are created on the first hit so empty scans leave no file
+            if not self.opened:
+                self.open_output()
+                self.opened = True
+            self.write_batch(batch)
+            self.written += len(batch)
+        except Exception as e:
+            print(f"{Fore.RED}[!] Error writing results to {self.path}: {e}{Style.RESET_ALL}")
+    
+    def open_output(self):
+        raise NotImplementedError
+    
+    def write_batch(self, batch):
+        raise NotImplementedError
+    
+    def close_output(self):
+        raise NotImplementedError
+
+
+class TextSink(ResultSink):
+    """Human-readable report in the SuperFastScan_Results.txt layout"""
+    
+    extension = '.txt'
+    
+    def open_output(self):
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.file.write("="*60 + "\n")
+        self.file.write("SUPER FAST SCAN - CAMERAS FOUND\n")
+        self.file.write("="*60 + "\n\n")
+    
+    def write_batch(self, batch):
+        for r in batch:
+            self.file.write(f"IP: {r['ip']}:{r['port']}\n")
+            self.file.write(f"Title: {r['title']}\n")
+            self.file.write(f"Server: {r['server']}\n")
+            self.file.write(f"Type: {r['type']}\n")
+            for field in DETAIL_FIELDS:
+                if r.get(field):
+                    self.file.write(f"{field.title()}: {r[field]}\n")
+            self.file.write(f"URL: {r['url']}\n")
+            self.file.write("-"*60 + "\n\n")
+        self.file.flush()
+    
+    def close_output(self):
+        self.file.close()
+
+
+class CctvSink(TextSink):
+    """Appending report in the CCTV_Found.txt layout used by run_scanner()"""
+    
+    def open_output(self):
+        self.file = open(self.path, 'a', encoding='utf-8')
+    
+    def write_batch(self, batch):
+        for r in batch:
+            self.file.write(f"{'='*60}\n")
+            self.file.write(f"Camera Type: {r['type']}\n")
+            self.file.write(f"IP Address: {r['ip']}\n")
+            self.file.write(f"Port: {r['port']}\n")
+            self.file.write(f"URL: {r['url']}\n")
+            self.file.write(f"Detection Time: {r['time']}\n")
+            self.file.write(f"{'='*60}\n\n")
+        self.file.flush()
+
+
+class JsonlSink(ResultSink):
+    """One JSON object per line"""
+    
+    extension = '.jsonl'
+    
+    def open_output(self):
+        self.file = open(self.path, 'w', encoding='utf-8')
+    
+    def write_batch(self, batch):
+        self.file.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in batch))
+        self.file.flush()
+    
+    def close_output(self):
+        self.file.close()
+
+
+class CsvSink(ResultSink):
+    """CSV with a header row"""
+    
+    extension = '.csv'
+    
+    def open_output(self):
+        self.file = open(self.path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+        self.writer.writeheader()
+    
+    def write_batch(self, batch):
+        self.writer.writerows(batch)
+        self.file.flush()
+    
+    def close_output(self):
+        self.file.close()
+
+
+class SqliteSink(ResultSink):
+    """SQLite database in WAL mode, one transaction per batch"""
+    
+    extension = '.db'
+    columns = {field: 'INTEGER' if field == 'port' else 'TEXT' for field in RESULT_FIELDS}
+    
+    def open_output(self):
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            + ", ".join(f"{field} {kind}" for field, kind in self.columns.items()) + ", found_at REAL)")
+        # Databases written by older versions lack the newer columns
+        existing = {row[1] for row in self.db.execute("PRAGMA table_info(results)")}
+        with self.db:
+            for field, kind in self.columns.items():
+                if field not in existing:
+                    self.db.execute(f"ALTER TABLE results ADD COLUMN {field} {kind}")
+        self.insert = (f"INSERT INTO results ({', '.join(self.columns)}, found_at) "
+                       f"VALUES ({', '.join('?' * (len(self.columns) + 1))})")
+    
+    def write_batch(self, batch):
+        now = time.time()
+        with self.db:
+            self.db.executemany(self.insert, [tuple(r.get(field) for field in RESULT_FIELDS) + (now,) for r in batch])
+    
+    def close_output(self):
+        self.db.close()
+
+
+SINKS = {
+    'txt': TextSink,
+    'jsonl': JsonlSink,
+    'csv': CsvSink,
+    'sqlite': SqliteSink,
+}
+
+
+def open_sink(fmt='txt', path=None):
+    """Start a result writer for an output format"""
+    sink_class = SINKS[fmt]
+    return sink_class(path or RESULTS_BASENAME + sink_class.extension)
+
+
+class AddressBitmap:
+    """Thread-safe set of integer addresses, or of (address, port) pairs, kept as bits in lazily allocated pages"""
+    
+    def __init__(self, ports=None):
+        # Without ports the keys are addresses; with them, every address has
+        # one bit per listed port and pairs on other ports go to a plain set
+        self.ports = None if ports is None else list(ports)
+        self.slots = {port: slot for slot, port in enumerate(self.ports or [])}
+        self.width = 1 if ports is None else len(self.ports)
+        self.page_shift = 32 - BITMAP_PAGE_PREFIX
+        self.page_bytes = ((1 << self.page_shift) * self.width + 7) // 8
+        self.pages = {}
+        self.others = set()
+        self.count = 0
+        self.lock = threading.Lock()
+    
+    def _position(self, key):
+        """Return (page number, bit) for a key, or None if it is kept in the plain set"""
+        if self.ports is None:
+            ip_int, slot = key, 0
+        else:
+            ip_int, port = key
+            slot = self.slots.get(port)
+            if slot is None:
+                return None
+        offset = ip_int & ((1 << self.page_shift) - 1)
+        return ip_int >> self.page_shift, offset * self.width + slot
+    
+    def add(self, key):
+        """Set a key; returns False if it was already set"""
+        position = self._position(key)
+        with self.lock:
+            if position is None:
+                if key in self.others:
+                    return False
+                self.others.add(key)
+            else:
+                number, bit = position
+                page = self.pages.get(number)
+                if page is None:
+                    page = self.pages[number] = bytearray(self.page_bytes)
+                mask = 1 << (bit & 7)
+                if page[bit >> 3] & mask:
+                    return False
+                page[bit >> 3] |= mask
+            self.count += 1
+            return True
+    
+    def __contains__(self, key):
+        position = self._position(key)
+        if position is None:
+            return key in self.others
+        page = self.pages.get(position[0])
+        return page is not None and bool(page[position[1] >> 3] & (1 << (position[1] & 7)))
+    
+    def __len__(self):
+        return self.count
+
+
+class ResultIndex:
+    """Scan results stored column-wise: address and port arrays plus interned strings, one entry per (ip, port)"""
+    
+    def __init__(self, ports=None, results=()):
+        self.addresses = array('I')
+        self.ports = array('H')
+        # columns[field][row] is an id into `values`; 0 means the row has no such field
+        self.columns = {}
+        self.values = [None]
+        self.value_ids = {}
+        self.keys = AddressBitmap(ports or [])
+        self.lock = threading.Lock()
+        for result in results:
+            self.add(result)
+    
+    def _intern(self, value, ip):
+        # URLs repeat once the address is taken out of them
+        if isinstance(value, str) and ip in value:
+            value = tuple(value.split(ip, 1))
+        value_id = self.value_ids.get(value)
+        if value_id is None:
+            value_id = self.value_ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+    
+    def add(self, result):
+        """Index a result; returns False if its (ip, port) is already indexed"""
+        ip = result['ip']
+        ip_int = ip_to_int(ip)
+        if not self.keys.add((ip_int, result['port'])):
+            return False
+        with self.lock:
+            row = len(self.addresses)
+            self.addresses.append(ip_int)
+            self.ports.append(result['port'])
+            for field, value in result.items():
+                if field in ('ip', 'port'):
+                    continue
+                column = self.columns.get(field)
+                if column is None:
+                    column = self.columns[field] = array('I', [0]) * row
+                column.append(self._intern(value, ip))
+            for column in self.columns.values():
+                if len(column) == row:
+                    column.append(0)
+        return True
+    
+    def result(self, row):
+        """Rebuild the result dict stored at a row"""
+        with self.lock:
+            ip = int_to_ip(self.addresses[row])
+            result = {'ip': ip, 'port': self.ports[row]}
+            for field, column in self.columns.items():
+                if column[row]:
+                    value = self.values[column[row]]
+                    result[field] = ip.join(value) if isinstance(value, tuple) else value
+        return result
+    
+    def __contains__(self, key):
+        return key in self.keys
+    
+    def __len__(self):
+        return len(self.addresses)
+    
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.result(row)
+
+
+# Addresses of cameras found by run_scanner()
+detected_ips = AddressBitmap()
+
+
+class Checkpoint:
+    """Tracks completed shards of a target space and saves scan state atomically"""
+    
+    def __init__(self, path, space, ports, state=None, shard_size=SHARD_SIZE, interval=CHECKPOINT_INTERVAL):
+        state = state or {}
+        self.path = path
+        self.space = space
+        self.ports = list(ports)
+        self.shard_size = state.get('shard_size', shard_size)
+        self.interval = interval
+        self.settings = dict(state.get('settings', {}))
+        
+        # Every shard below the watermark is done; `completed` holds the
+        # finished shards above it (workers finish out of order)
+        self.watermark = state.get('watermark', 0)
+        self.completed = set(state.get('completed', []))
+        self.results = ResultIndex(self.ports, state.get('results', []))
+        self.remaining = {}
+        self.shard_count = (len(space) + self.shard_size - 1) // self.shard_size
+        self.last_save = time.monotonic()
+        self.lock = threading.Lock()
+        # Periodic saves run on a writer thread so the probe path (and the
+        # event loop) never waits for the JSON dump and fsync
+        self.save_lock = threading.Lock()
+        self.save_due = threading.Event()
+        self.writer = None
+        self.closed = False
+    
+    @classmethod
+    def load(cls, path, interval=CHECKPOINT_INTERVAL):
+        """Rebuild a checkpoint (and its target space) from a state file"""
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        space = TargetSpace([tuple(r) for r in state['ranges']])
+        return cls(path, space, state['ports'], state, interval=interval)
+    
+    def pending_addresses(self):
+        """Number of addresses in shards that still need probing"""
+        done = (self.watermark + len(self.completed)) * self.shard_size
+        last = self.shard_count - 1
+        if last >= 0 and (last < self.watermark or last in self.completed):
+            # The last shard may be short
+            done -= self.shard_size - (len(self.space) - last * self.shard_size)
+        return len(self.space) - done
+    
+    def iter_targets(self):
+        """Lazily yield (ip_int, port) targets for every unfinished shard"""
+        for shard in range(self.watermark, self.shard_count):
+            if shard in self.completed:
+                continue
+            start = shard * self.shard_size
+            for ip_int in self.space.iter_addresses(start, start + self.shard_size):
+                for port in self.ports:
+                    yield ip_int, port
+    
+    def add_result(self, result):
+        """Record an emitted result so it survives a restart; returns False for a duplicate"""
+        return self.results.add(result)
+    
+    def probe_done(self, ip_int, port, outcome=None):
+        """Count one finished probe; saves the checkpoint every `interval` seconds"""
+        shard = self.space.index_of(ip_int) // self.shard_size
+        with self.lock:
+            if shard not in self.remaining:
+                addresses = min(self.shard_size, len(self.space) - shard * self.shard_size)
+                self.remaining[shard] = addresses * len(self.ports)
+            self.remaining[shard] -= 1
+            if self.remaining[shard] == 0:
+                del self.remaining[shard]
+                self._complete(shard)
+            self._schedule_save()
+    
+    def shard_done(self, shard):
+        """Mark a whole shard finished (reported by a worker process)"""
+        with self.lock:
+            self.remaining.pop(shard, None)
+            self._complete(shard)
+            self._schedule_save()
+    
+    def _schedule_save(self):
+        # Called with the lock held; wakes the writer thread once per interval
+        now = time.monotonic()
+        if now - self.last_save < self.interval:
+            return
+        self.last_save = now
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write_loop, daemon=True)
+            self.writer.start()
+        self.save_due.set()
+    
+    def _write_loop(self):
+        while True:
+            self.save_due.wait()
+            self.save_due.clear()
+            if self.closed:
+                break
+            self.save()
+    
+    def _complete(self, shard):
+        self.completed.add(shard)
+        while self.watermark in self.completed:
+            self.completed.discard(self.watermark)
+            self.watermark += 1
+    
+    def pending_shards(self):
+        """Unfinished shards as merged [start, end] runs of shard numbers"""
+        runs = []
+        start = self.watermark
+        for shard in sorted(self.completed) + [self.shard_count]:
+            if shard > start:
+                runs.append((start, shard - 1))
+            start = shard + 1
+        return runs
+    
+    def save(self):
+        """Write the state file atomically (temp file + rename)"""
+        with self.save_lock:
+            if not self.closed:
+                self._write()
+    
+    def _write(self):
+        with self.lock:
+            state = {
+                'version': 1,
+                'ranges': self.space.ranges,
+                'ports': self.ports,
+                'shard_size': self.shard_size,
+                'watermark': self.watermark,
+                'completed': sorted(self.completed),
+                'results': list(self.results),
+                'settings': self.settings,
+                'saved': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            self.last_save = time.monotonic()
+        
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"{Fore.RED}[!] Could not save checkpoint {self.path}: {e}{Style.RESET_ALL}")
+    
+    def finish(self):
+        """Remove the state file once the scan has completed"""
+        # A periodic save still running would write the file back
+        with self.save_lock:
+            self.closed = True
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        self.save_due.set()
+
+
+class HostCache:
+    """On-disk SQLite cache of the last fingerprint per (ip, port) for incremental scans"""
+    
+    def __init__(self, path=HOST_CACHE, ttl=CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.pending = []
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS hosts ("
+            "ip INTEGER, port INTEGER, type TEXT, title TEXT, server TEXT, url TEXT, "
+            "first_seen REAL, last_seen REAL, PRIMARY KEY (ip, port)) WITHOUT ROWID")
+        
+        # Expired entries are dropped, so anything left is fresh
+        with self.db:
+            self.evicted = self.db.execute(
+                "DELETE FROM hosts WHERE last_seen < ?", (time.time() - ttl,)).rowcount
+        
+        self.answered = set()
+        self.cameras = {}
+        self.camera_ips = {}
+        self.verified = set()
+        self.seen = {}
+    
+    def load(self, space, ports):
+        """Load cached entries for a target space before planning the scan"""
+        ports = set(ports)
+        for start, end in space.ranges:
+            rows = self.db.execute(
+                "SELECT ip, port, type, title, server FROM hosts WHERE ip BETWEEN ? AND ?", (start, end))
+            for ip_int, port, camera_type, title, server in rows:
+                if port not in ports:
+                    continue
+                if camera_type:
+                    self.cameras[(ip_int, port)] = (camera_type, title, server)
+                else:
+                    self.answered.add((ip_int, port))
+        self.camera_ips = {}
+        for ip_int, port in self.cameras:
+            self.camera_ips.setdefault(ip_int, set()).add(port)
+    
+    def filter_targets(self, targets, on_skip=None):
+        """Yield only targets that need probing; known cameras are re-verified on their port only"""
+        for ip_int, port in targets:
+            camera_ports = self.camera_ips.get(ip_int)
+            if camera_ports is not None:
+                probe = port in camera_ports
+                if probe:
+                    self.verified.add((ip_int, port))
+            else:
+                probe = (ip_int, port) not in self.answered
+            
+            if probe:
+                yield ip_int, port
+            elif on_skip:
+                on_skip(ip_int, port, 'cached')
+    
+    def add_result(self, ip_int, result):
+        """Record a camera seen in this run"""
+        with self.lock:
+            self.seen[(ip_int, result['port'])] = (result['type'], result['title'], result['server'])
+            self.pending.append((ip_int, result['port'], result['type'], result['title'],
+                                 result['server'], result['url']))
+        self._maybe_flush()
+    
+    def probe_done(self, ip_int, port, outcome=None):
+        """Record a host that answered but is not a camera; silent hosts are not cached"""
+        if outcome not in (OUTCOME_WEB, OUTCOME_OPEN):
+            return
+        with self.lock:
+            self.pending.append((ip_int, port, None, None, None, None))
+        self._maybe_flush()
+    
+    def _maybe_flush(self):
+        if len(self.pending) >= FLUSH_COUNT:
+            self.flush()
+    
+    def flush(self):
+        """Write recorded entries in one transaction"""
+        with self.lock:
+            batch, self.pending = self.pending, []
+            if not batch:
+                return
+            now = time.time()
+            with self.db:
+                self.db.executemany(
+                    "INSERT INTO hosts VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (ip, port) DO UPDATE SET type = excluded.type, title = excluded.title, "
+                    "server = excluded.server, url = excluded.url, last_seen = excluded.last_seen",
+                    [row + (now, now) for row in batch])
+    
+    def diff(self):
+        """Compare this run with the cache: returns (new, changed, gone) lists of (ip, port, ...)"""
+        new, changed, gone = [], [], []
+        for key, current in self.seen.items():
+            previous = self.cameras.get(key)
+            if previous is None:
+                new.append(key + current)
+            elif previous != current:
+                changed.append(key + previous + current)
+        # Only cameras re-probed in this run can be gone (a resumed run skips
+        # shards that were finished before the restart)
+        for key in self.verified:
+            if key not in self.seen:
+                gone.append(key + self.cameras[key])
+        return new, changed, gone
+    
+    def close(self, gone=()):
+        """Flush, forget devices that are gone and close the database"""
+        self.flush()
+        with self.lock:
+            with self.db:
+                self.db.executemany("DELETE FROM hosts WHERE ip = ? AND port = ? AND type IS NOT NULL",
+                                    [(ip_int, port) for ip_int, port, *_ in gone])
+            self.db.close()
+
+
+IP_RECVERR = getattr(socket, 'IP_RECVERR', 11)
+MSG_ERRQUEUE = getattr(socket, 'MSG_ERRQUEUE', 0x2000)
+SO_EE_ORIGIN_ICMP = 2
+ICMP_DEST_UNREACH = 3
+
+
+class UdpTraceBackend:
+    """Unprivileged UDP probes whose ICMP replies are read from the socket error queue (Linux IP_RECVERR)"""
+    
+    def __init__(self, base_port=TRACE_BASE_PORT):
+        if not sys.platform.startswith('linux'):
+            raise OSError("in-process tracing needs Linux (IP_RECVERR)")
+        self.base_port = base_port
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.IPPROTO_IP, IP_RECVERR, 1)
+        self.sock.setblocking(False)
+        self.poller = select.poll()
+        self.poller.register(self.sock, select.POLLERR)
+    
+    def send(self, target, ttl):
+        """Send one probe; the destination port carries the TTL"""
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, ttl)
+        # An ICMP error still pending on the socket fails the next send, once
+        for _ in range(2):
+            try:
+                self.sock.sendto(b'', (target, self.base_port + ttl))
+                return
+            except OSError:
+                continue
+    
+    def receive(self, timeout):
+        """Wait up to `timeout` seconds for ICMP replies; returns [(target, ttl, hop address, reached)]"""
+        replies = []
+        if not self.poller.poll(max(0.0, timeout) * 1000):
+            return replies
+        while True:
+            try:
+                _, ancdata, _, address = self.sock.recvmsg(512, 512, MSG_ERRQUEUE)
+            except OSError:  # Error queue drained
+                break
+            for level, kind, data in ancdata:
+                if level != socket.IPPROTO_IP or kind != IP_RECVERR or len(data) < 24:
+                    continue
+                # struct sock_extended_err, then the sockaddr_in of the hop that answered
+                _, origin, icmp_type, _, _, _, _ = struct.unpack_from('=IBBBBII', data)
+                if origin != SO_EE_ORIGIN_ICMP:
+                    continue
+                hop = socket.inet_ntoa(data[20:24])
+                target, port = address[:2]
+                replies.append((target, port - self.base_port, hop, icmp_type == ICMP_DEST_UNREACH and hop == target))
+        return replies
+    
+    def close(self):
+        self.sock.close()
+
+
+class SimulatedTraceBackend:
+    """Replays a fixed topology, {target: [hop address or None, ...]}, to test the tracer without a network"""
+    
+    def __init__(self, paths, hop_delay=0.001):
+        # A reachable target's path ends with the target, which also answers
+        # every longer TTL; None is a hop that never answers
+        self.paths = paths
+        self.hop_delay = hop_delay
+        self.pending = []  # Heap of (due, target, ttl, hop)
+        self.sent = 0
+    
+    def send(self, target, ttl):
+        self.sent += 1
+        path = self.paths.get(target, [])
+        if ttl > len(path) and not (path and path[-1] == target):
+            return
+        index = min(ttl, len(path)) - 1
+        if path[index] is not None:
+            heapq.heappush(self.pending, (time.monotonic() + self.hop_delay * (index + 1), target, ttl, path[index]))
+    
+    def receive(self, timeout):
+        due = self.pending[0][0] - time.monotonic() if self.pending else timeout
+        time.sleep(max(0.0, min(timeout, due)))
+        replies = []
+        now = time.monotonic()
+        while self.pending and self.pending[0][0] <= now:
+            _, target, ttl, hop = heapq.heappop(self.pending)
+            replies.append((target, ttl, hop, hop == target))
+        return replies
+    
+    def close(self):
+        pass
+
+
+class PathTracer:
+    """Traces many targets at once, probing every TTL of a path in parallel and sharing common hops"""
+    
+    def __init__(self, backend=None, max_hops=TRACE_MAX_HOPS, timeout=TRACE_TIMEOUT, rate=TRACE_RATE,
+                 retries=TRACE_RETRIES, share_prefix=TRACE_SHARE_PREFIX, share_window=TRACE_SHARE_WINDOW):
+        self.backend = backend or UdpTraceBackend()
+        self.max_hops = max_hops
+        self.timeout = timeout
+        self.rate = rate
+        self.retries = retries
+        self.shift = 32 - share_prefix
+        self.share_window = share_window
+        self.probes = 0
+    
+    def trace(self, targets):
+        """Trace every target (IP strings); returns {target: trace dict} in the order given"""
+        targets = list(dict.fromkeys(targets))
+        self.hops = {target: {} for target in targets}  # ttl -> (address, rtt)
+        self.probed = {target: set() for target in targets}
+        self.distance = {}
+        self.sent_at = {}
+        self.joined = {}  # Follower -> (reference, first TTL it probed itself)
+        
+        # The first target of every prefix is traced in full
+        references = {}
+        followers = []
+        for target in targets:
+            key = ip_to_int(target) >> self.shift
+            if key in references:
+                followers.append((target, references[key]))
+            else:
+                references[key] = target
+        self._round([(target, ttl) for target in references.values() for ttl in range(1, self.max_hops + 1)])
+        
+        # The others probe a window around their reference's distance, then
+        # step back until one of their hops is the reference's hop at the
+        # same TTL; below that the paths are taken to be the same
+        probes = []
+        for target, reference in followers:
+            centre = self.distance.get(reference) or max(self.hops[reference], default=None)
+            if centre is None:
+                low, high = 1, self.max_hops  # Nothing to follow
+            else:
+                low, high = max(1, centre - self.share_window), min(self.max_hops, centre + self.share_window)
+            probes.extend((target, ttl) for ttl in range(low, high + 1))
+        
+        pending = dict(followers)
+        while probes:
+            self._round(probes)
+            probes = []
+            for target, reference in list(pending.items()):
+                probed = self.probed[target]
+                low, high = min(probed), max(probed)
+                if target not in self.distance and high < self.max_hops:
+                    probes.extend((target, ttl) for ttl in range(high + 1, self.max_hops + 1))
+                if self._joins(target, reference):
+                    self.joined[target] = (reference, low)
+                    del pending[target]
+                elif low > 1:
+                    probes.extend((target, ttl) for ttl in range(max(1, low - self.share_window), low))
+                else:
+                    del pending[target]
+        
+        # Hops that stayed silent below the farthest answer get another try
+        for _ in range(self.retries):
+            probes = []
+            for target in targets:
+                last = self.distance.get(target) or max(self.hops[target], default=0)
+                probes.extend((target, ttl) for ttl in sorted(self.probed[target])
+                              if ttl < last and ttl not in self.hops[target])
+            if not probes:
+                break
+            self._round(probes)
+        
+        return {target: self._result(target) for target in targets}
+    
+    def _joins(self, target, reference):
+        hops, reference_hops = self.hops[target], self.hops[reference]
+        return any(ttl in reference_hops and hops[ttl][0] == reference_hops[ttl][0] for ttl in hops)
+    
+    def _round(self, probes):
+        """Send probes paced at self.rate, collecting replies until all are in or self.timeout passes"""
+        waiting = set()
+        interval = 1.0 / self.rate
+        next_send = time.monotonic()
+        for target, ttl in probes:
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                self._collect(delay, waiting)
+            self.backend.send(target, ttl)
+            self.sent_at[(target, ttl)] = time.monotonic()
+            self.probed[target].add(ttl)
+            waiting.add((target, ttl))
+            self.probes += 1
+            next_send += interval
+        
+        deadline = time.monotonic() + self.timeout
+        while waiting:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._collect(remaining, waiting)
+    
+    def _collect(self, timeout, waiting):
+        for target, ttl, address, reached in self.backend.receive(timeout):
+            sent = self.sent_at.get((target, ttl))
+            if sent is None:
+                continue  # Late reply to an earlier trace
+            waiting.discard((target, ttl))
+            self.hops[target].setdefault(ttl, (address, round(time.monotonic() - sent, 6)))
+            if reached and ttl < self.distance.get(target, self.max_hops + 1):
+                self.distance[target] = ttl
+    
+    def _result(self, target):
+        distance = self.distance.get(target)
+        reference, first_own = self.joined.get(target, (None, 1))
+        hops = []
+        for ttl in range(1, (distance or max(self.hops[target], default=0)) + 1):
+            shared = ttl < first_own
+            address, rtt = self.hops[reference if shared else target].get(ttl, (None, None))
+            hops.append({'ttl': ttl, 'address': address, 'rtt': rtt, 'shared': shared})
+        return {'target': target, 'reached': distance is not None, 'distance': distance, 'hops': hops}
+    
+    def close(self):
+        self.backend.close()
+
+
+def resolve_trace_targets(specs, limit=TRACE_MAX_TARGETS):
+    """Expand IPs, CIDRs, ranges, @files and hostnames into at most `limit` addresses to trace"""
+    targets = []
+    for spec in specs:
+        if spec.startswith('@'):
+            targets.extend(resolve_trace_targets(read_target_file(spec[1:]), limit))
+            continue
+        try:
+            start, end = parse_target_spec(spec)
+        except ValueError:
+            targets.append(socket.gethostbyname(spec))
+            continue
+        targets.extend(int_to_ip(ip_int) for ip_int in range(start, min(end, start + limit - 1) + 1))
+    return list(dict.fromkeys(targets))[:limit]
+
+
+def print_trace(trace):
+    """Print one trace, hop by hop"""
+    if trace['reached']:
+        status = f"{Fore.GREEN}reached in {trace['distance']} hops"
+    else:
+        status = f"{Fore.RED}not reached"
+    print(f"{Fore.CYAN}[→] {trace['target']}{Style.RESET_ALL} - {status}{Style.RESET_ALL}")
+    for hop in trace['hops']:
+        if hop['address'] is None:
+            print(f"{Fore.RED}    {hop['ttl']:2d}  *{Style.RESET_ALL}")
+        else:
+            color = Fore.WHITE if hop['shared'] else Fore.GREEN
+            shared = " (shared)" if hop['shared'] else ""
+            print(f"{color}    {hop['ttl']:2d}  {hop['address']:<15}  {hop['rtt'] * 1000:7.1f} ms{shared}{Style.RESET_ALL}")
+
+
+def trace_route():
+    """Trace the paths to one or more targets at once"""
+    print(f"\n{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}[🔍] TRACE ROUTE MODE [🔍]{Style.RESET_ALL}")
+    print(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}\n")
+    
+    text = input(f"{Fore.GREEN}Targets (IP, CIDR, range, hostname or @file) [{TRACE_DEFAULT_TARGET}]: "
+                 f"{Style.RESET_ALL}").strip()
+    try:
+        targets = resolve_trace_targets(text.split() or [TRACE_DEFAULT_TARGET])
+    except (ValueError, OSError) as e:
+        print(f"{Fore.RED}[!] {e}{Style.RESET_ALL}")
+        return
+    
+    try:
+        tracer = PathTracer()
+    except OSError as e:
+        # No IP_RECVERR (Windows, macOS): fall back to the system tool, one target
+        print(f"{Fore.YELLOW}[!] {e} - using the system traceroute for {targets[0]}{Style.RESET_ALL}\n")
+        trace_route_command(targets[0])
+        return
+    
+    print(f"{Fore.YELLOW}[*] Tracing {len(targets)} target(s)...{Style.RESET_ALL}")
+    print(f"{Fore.CYAN}{'─'*50}{Style.RESET_ALL}\n")
+    
+    start_time = time.time()
+    try:
+        traces = tracer.trace(targets)
+    finally:
+        tracer.close()
+    elapsed = time.time() - start_time
+    
+    for trace in traces.values():
+        print_trace(trace)
+        print()
+    
+    reached = sum(1 for trace in traces.values() if trace['reached'])
+    shared = sum(1 for trace in traces.values() for hop in trace['hops'] if hop['shared'])
+    print(f"{Fore.CYAN}{'─'*50}{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}[✓] Trace complete!{Style.RESET_ALL}")
+    print(f"{Fore.CYAN}[i] {reached}/{len(traces)} targets reached, {tracer.probes} probes, "
+          f"{shared} hops shared, {elapsed:.2f} seconds{Style.RESET_ALL}")
+    print(f"\n{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
+
+
+def trace_route_command(target):
+    """Trace one target with the system traceroute/tracepath/tracert, colouring its output"""
+    try:
+        # Only used where in-process tracing is unavailable (Windows, macOS),
+        # which both ship their tool
+        if platform.system() == "Windows":
+            cmd = ['tracert', '-d', '-h', '30', '-w', '1000', target]
+        else:
+            cmd = ['traceroute', '-n', '-m', '30', '-w', '1', target]
+        
+        # Run the command and display output in real-time
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        
+        hop_count = 0
+        for line in iter(process.stdout.readline, ''):
+            if line:
+                line = line.strip()
+                
+                # Color code the output
+                if '*' in line or 'timeout' in line.lower():
+                    print(f"{Fore.RED}{line}{Style.RESET_ALL}")
+                elif 'ms' in line.lower() or 'Tracing' in line or 'traceroute' in line:
+                    # Highlight successful hops
+                    if any(char.isdigit() for char in line) and ('ms' in line.lower() or '<' in line):
+                        hop_count += 1
+                        print(f"{Fore.GREEN}[Hop {hop_count:2d}] {line}{Style.RESET_ALL}")
+                    else:
+                        print(f"{Fore.CYAN}{line}{Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.WHITE}{line}{Style.RESET_ALL}")
+        
+        process.wait()
+        
+        print(f"\n{Fore.CYAN}{'─'*50}{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}[✓] Trace complete!{Style.RESET_ALL}")
+        
+        if hop_count > 0:
+            print(f"{Fore.CYAN}[i] Total hops: {hop_count}{Style.RESET_ALL}")
+        
+    except FileNotFoundError:
+        print(f"{Fore.RED}[!] Traceroute command not found on this system{Style.RESET_ALL}")
+        print(f"{Fore.YELLOW}[i] For Termux, install: pkg install inetutils{Style.RESET_ALL}")
+        print(f"{Fore.YELLOW}[i] Or install: pkg install traceroute{Style.RESET_ALL}")
+    except Exception as e:
+        print(f"{Fore.RED}[!] Error: {e}{Style.RESET_ALL}")
+    
+    print(f"\n{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
+
+
+def thread_scan(targets, on_result, byte_budget=MAX_RESPONSE_BYTES, on_probe_done=None,
+                max_threads=THREAD_CONCURRENCY_MAX, rtt=None, metrics=None, paths=DEFAULT_PATHS, control=None,
+                follow_up=False, renderer=None):
+    """Scan (ip_int, port) targets with separate connect and banner thread pools"""
+    # Start from the old CPU-based thread count; the controller adapts it to
+    # what the network actually sustains
+    cpu_count = multiprocessing.cpu_count()
+    banner_threads = min(BANNER_THREADS, max_threads)
+    controller = ConcurrencyController(min(max_threads, cpu_count * 50), minimum=min(CONCURRENCY_MIN, max_threads),
+                                       maximum=max_threads)
+    if rtt is None:
+        rtt = RttEstimator()
+    
+    if renderer is not None:
+        renderer.print(f"{Fore.CYAN}[i] CPU Cores: {cpu_count}{Style.RESET_ALL}")
+        renderer.print(f"{Fore.CYAN}[i] Threads: {max_threads} connect + {banner_threads} banner "
+                       f"(adaptive limit starts at {int(controller.limit)}){Style.RESET_ALL}")
+        renderer.print(f"{Fore.YELLOW}[*] Starting super fast scan...{Style.RESET_ALL}\n")
+    
+    # Work units of several targets each, so the queue's lock is taken once
+    # per unit rather than once per probe. Bounded so the target generator
+    # only runs ahead of the workers by a little, keeping memory flat for
+    # any range size
+    scan_queue = Queue(maxsize=max_threads)
+    sizer = ChunkSizer(controller)
+    # Bounded so a backlog of slow HTTP servers holds back the connect stage
+    # instead of piling up open sockets
+    banner_queue = Queue(maxsize=banner_threads)
+    if metrics is not None:
+        register_engine_gauges(metrics, controller, banner_queue.qsize, scan_queue.qsize)
+    
+    def probe_done(ip_int, port, outcome):
+        if metrics is not None:
+            metrics.inc('probes_total', outcome=outcome)
+        if on_probe_done:
+            on_probe_done(ip_int, port, outcome)
+    
+    # Connect stage: the connected socket is handed over, not reopened
+    def connect(ip_int, port):
+        outcome = OUTCOME_ERROR
+        sock = None
+        controller.acquire()
+        if metrics is not None:
+            metrics.inc('connects_attempted_total')
+        started = time.monotonic()
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(rtt.connect_timeout(ip_int))  # Per-subnet timeout
+            outcome = connect_outcome(sock.connect_ex((int_to_ip(ip_int), port)))
+            latency = time.monotonic() - started
+            if outcome in (OUTCOME_OPEN, OUTCOME_REFUSED):
+                rtt.sample(ip_int, latency)
+        except OSError as e:
+            outcome = connect_outcome(e.errno)
+            latency = None
+        finally:
+            controller.release()
+        controller.record(outcome, latency if outcome == OUTCOME_OPEN else None)
+        if metrics is not None:
+            metrics.inc('connects_total', outcome=outcome)
+            metrics.observe('connect_latency_seconds', time.monotonic() - started)
+        
+        if outcome == OUTCOME_OPEN:
+            banner_queue.put((sock, ip_int, port))
+        elif sock is not None:
+            sock.close()
+        if outcome != OUTCOME_OPEN:
+            probe_done(ip_int, port, outcome)
+    
+    def connect_worker():
+        while True:
+            chunk = scan_queue.get()
+            for ip_int, port in chunk:
+                if control is not None and not control.wait():
+                    break  # Stopping: the rest of the unit is dropped, not probed
+                connect(ip_int, port)
+            sizer.chunk_done(len(chunk))
+            scan_queue.task_done()
+    
+    # Banner stage: fetch and classify on the connect stage's socket
+    def banner_worker():
+        while True:
+            sock, ip_int, port = banner_queue.get()
+            outcome = OUTCOME_ERROR
+            started = time.monotonic()
+            try:
+                outcome, camera = fetch_banner(sock, int_to_ip(ip_int), port, rtt.read_timeout(ip_int),
+                                               byte_budget, metrics, paths, follow_up, controller, rtt)
+                if camera:
+                    if metrics is not None:
+                        metrics.inc('fingerprints_total', type=camera['type'])
+                    on_result(camera)
+            except Exception:
+                pass
+            if metrics is not None:
+                metrics.observe('banner_latency_seconds', time.monotonic() - started)
+            probe_done(ip_int, port, outcome)
+            banner_queue.task_done()
+    
+    # Start threads
+    threads = []
+    for _ in range(max_threads):
+        t = threading.Thread(target=connect_worker, daemon=True)
+        t.start()
+        threads.append(t)
+    for _ in range(banner_threads):
+        t = threading.Thread(target=banner_worker, daemon=True)
+        t.start()
+        threads.append(t)
+    
+    # Feed IP:port combinations as the workers free up queue slots
+    if renderer is not None:
+        renderer.controller = controller
+        renderer.start()
+    start_time = time.time()
+    if control is not None:
+        targets = control.gate(targets)
+    for chunk in sizer.chunks(targets):
+        scan_queue.put(chunk)
+        if metrics is not None:
+            metrics.inc('targets_queued_total', len(chunk))
+    
+    # Wait for both stages to drain
+    scan_queue.join()
+    banner_queue.join()
+    return time.time() - start_time
+
+
+def scan_shards(space, plan, shard_size, claim, on_result, on_shard_done, concurrency=ASYNC_CONCURRENCY,
+                metrics=None, control=None):
+    """Run the async engine over shards handed out one at a time by `claim()` until it returns None"""
+    ports = plan.ports
+    remaining = {}
+    counts = collections.Counter()
+    
+    def shard_targets(start, count):
+        for ip_int in space.iter_addresses(start, start + count):
+            for port in ports:
+                yield ip_int, port
+    
+    # Shards are claimed one at a time so fast workers take over the
+    # remainder of a range instead of idling behind a slow one. Port rounds
+    # are scheduled within a shard, so the next shard is only claimed once
+    # this one's targets are all out; a claim may be a round trip to the
+    # coordinator, so it runs off the event loop
+    async def targets():
+        loop = asyncio.get_running_loop()
+        while True:
+            shard = await loop.run_in_executor(None, claim)
+            if shard is None:
+                return
+            start = shard * shard_size
+            count = min(shard_size, len(space) - start)
+            remaining[shard] = count * len(ports)
+            for target in scheduler.schedule(shard_targets(start, count)):
+                yield target
+    
+    def probe_done(ip_int, port, outcome):
+        scheduler.probe_done(ip_int, port, outcome)
+        counts[outcome] += 1
+        shard = space.index_of(ip_int) // shard_size
+        remaining[shard] -= 1
+        if remaining[shard] == 0:
+            del remaining[shard]
+            on_shard_done(shard, dict(counts))
+            counts.clear()
+    
+    scheduler = PlanScheduler(plan, on_skip=probe_done, window=shard_size)
+    run_async_scan(targets(), on_result, connect_concurrency=concurrency,
+                   banner_concurrency=max(1, ASYNC_BANNER_CONCURRENCY * concurrency // ASYNC_CONCURRENCY),
+                   on_probe_done=probe_done, metrics=metrics, paths=plan.paths,
+                   control=control, follow_up=plan.follow_up)
+
+
+def shard_worker(ranges, plan, pending, cursor, messages, shard_size, concurrency, control=None):
+    """Worker process: scan shards claimed from a shared cursor"""
+    # Messages to the parent: ('result', dict), ('shard', shard, outcome
+    # counts) for every finished shard, and ('exit', None) at the end
+    pending = TargetSpace(pending)
+    
+    # Ctrl+C and Ctrl+Z reach the whole process group; the parent turns
+    # them into `control` changes, and terminates workers if it has to
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, 'SIGTSTP'):
+        signal.signal(signal.SIGTSTP, signal.SIG_IGN)
+    
+    def claim():
+        with cursor.get_lock():
+            index = cursor.value
+            cursor.value += 1
+        return pending.address_at(index) if index < len(pending) else None
+    
+    try:
+        scan_shards(TargetSpace(ranges), plan, shard_size, claim,
+                    lambda result: messages.put(('result', result)),
+                    lambda shard, counts: messages.put(('shard', shard, counts)), concurrency, control=control)
+    finally:
+        messages.put(('exit', None))
+
+
+def sharded_scan(checkpoint, on_result, processes=SCAN_PROCESSES, plan=None, control=None, renderer=None):
+    """Spread a checkpoint's unfinished shards over worker processes; returns (elapsed, outcome counts)"""
+    # `control` must be a ScanControl(multiprocessing) to reach the workers
+    plan = plan or ProbePlan(checkpoint.ports)
+    pending = checkpoint.pending_shards()
+    shards = sum(end - start + 1 for start, end in pending)
+    processes = max(1, min(processes, shards))
+    concurrency = max(CONCURRENCY_MIN, ASYNC_CONCURRENCY // processes)
+    
+    # With a renderer, its thread owns the console (and -q silences it)
+    say = print if renderer is None else renderer.print
+    say(f"{Fore.CYAN}[i] Worker processes: {processes} (asyncio engine, up to {concurrency} probes each){Style.RESET_ALL}")
+    say(f"{Fore.CYAN}[i] Shards: {shards} of {checkpoint.shard_size} addresses{Style.RESET_ALL}")
+    say(f"{Fore.YELLOW}[*] Starting super fast scan...{Style.RESET_ALL}\n")
+    
+    cursor = multiprocessing.Value('q', 0)
+    messages = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=shard_worker,
+                                       args=(checkpoint.space.ranges, plan, pending, cursor,
+                                             messages, checkpoint.shard_size, concurrency, control),
+                                       daemon=True)
+               for _ in range(processes)]
+    
+    counts = collections.Counter()
+    finished = 0
+    running = len(workers)
+    start_time = time.time()
+    for worker in workers:
+        worker.start()
+    if renderer is not None:
+        renderer.start()
+    try:
+        while running:
+            try:
+                message = messages.get(timeout=STATUS_INTERVAL)
+            except Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    say(f"{Fore.RED}[!] Worker processes exited unexpectedly{Style.RESET_ALL}")
+                    break
+                if renderer is None:  # Otherwise its status line shows the progress
+                    elapsed = time.time() - start_time
+                    print(f"{Fore.CYAN}[i] Shards done: {finished}/{shards} "
+                          f"({sum(counts.values()) / elapsed:.0f} probes/sec){Style.RESET_ALL}")
+                continue
+            
+            kind = message[0]
+            if kind == 'result':
+                on_result(message[1])
+            elif kind == 'shard':
+                checkpoint.shard_done(message[1])
+                counts.update(message[2])
+                finished += 1
+            elif kind == 'exit':
+                running -= 1
+    finally:
+        for worker in workers:
+            worker.join(timeout=1.0)
+            if worker.is_alive():
+                worker.terminate()
+    return time.time() - start_time, counts
+
+
+def parse_address(text, default_host=COORDINATOR_HOST):
+    """Parse 'host:port' or a bare port into a (host, port) tuple"""
+    host, _, port = text.strip().rpartition(':')
+    return host or default_host, int(port)
+
+
+class Coordinator:
+    """Hands out a checkpoint's unfinished shards to remote workers under heartbeat-renewed leases"""
+    
+    def __init__(self, checkpoint, on_result, lease_timeout=LEASE_TIMEOUT, plan=None, control=None, token=None):
+        self.checkpoint = checkpoint
+        self.on_result = on_result
+        self.token = token or os.environ.get(COORDINATOR_TOKEN_ENV) or secrets.token_urlsafe(16)
+        self.plan = plan or ProbePlan(checkpoint.ports)
+        self.lease_timeout = lease_timeout
+        self.control = control or ScanControl()
+        pending = checkpoint.pending_shards()
+        self.fresh = (shard for start, end in pending for shard in range(start, end + 1))
+        self.expired = collections.deque()
+        self.leases = {}  # shard -> [worker, deadline]
+        self.total = sum(end - start + 1 for start, end in pending)
+        self.finished = 0
+        self.counts = collections.Counter()
+        self.workers = {}  # worker -> last message time
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        if not self.total:
+            self.done.set()
+    
+    def authorized(self, message):
+        """Whether a request carries the shared token"""
+        token = message.get('token')
+        return isinstance(token, str) and hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8'))
+    
+    def handle(self, message):
+        """Answer one worker request"""
+        op = message['op']
+        worker = message['worker']
+        now = time.monotonic()
+        with self.lock:
+            # Any message from a worker counts as a heartbeat for its leases
+            self.workers[worker] = now
+            for lease in self.leases.values():
+                if lease[0] == worker:
+                    lease[1] = now + self.lease_timeout
+            if op == 'hello':
+                return {'ranges': self.checkpoint.space.ranges, 'plan': self.plan.settings(),
+                        'shard_size': self.checkpoint.shard_size}
+            if op == 'heartbeat':
+                return {'ok': True}
+            if op == 'lease':
+                return self._lease(worker, now)
+            if op == 'done':
+                shard = int(message['shard'])
+                self.leases.pop(shard, None)
+                # A shard re-issued after an expired lease may be finished twice
+                if self._is_done(shard):
+                    return {'ok': True}
+                self.checkpoint.shard_done(shard)
+                self.finished += 1
+                self.counts.update(message.get('counts', {}))
+                if self.finished == self.total or (self.control.stopped.is_set() and not self.leases):
+                    self.done.set()
+                return {'ok': True}
+        if op == 'result':
+            self.on_result(message['result'])
+            return {'ok': True}
+        raise ValueError(f"unknown op {op!r}")
+    
+    def _is_done(self, shard):
+        return shard < self.checkpoint.watermark or shard in self.checkpoint.completed
+    
+    def _lease(self, worker, now):
+        self.expire(now)
+        if self.control.stopped.is_set():
+            # Workers finish the shards they hold, then leave
+            return {'shard': None, 'done': True, 'stopped': True}
+        if self.control.paused:
+            return {'shard': None, 'wait': 1.0}
+        
+        shard = None
+        while self.expired and shard is None:
+            shard = self.expired.popleft()
+            if self._is_done(shard):
+                shard = None
+        if shard is None:
+            shard = next(self.fresh, None)
+        if shard is None:
+            if self.finished == self.total:
+                return {'shard': None, 'done': True}
+            # Everything is leased; ask again in case a lease expires
+            return {'shard': None, 'wait': 1.0}
+        
+        self.leases[shard] = [worker, now + self.lease_timeout]
+        return {'shard': shard}
+    
+    def expire(self, now):
+        """Take back leases whose worker stopped heartbeating (call with the lock held)"""
+        for shard, (owner, deadline) in list(self.leases.items()):
+            if deadline < now:
+                print(f"{Fore.YELLOW}[!] Lease on shard {shard} expired ({owner}), re-issuing{Style.RESET_ALL}")
+                del self.leases[shard]
+                self.expired.append(shard)
 
 
-def get_local_ip():
-    """Get local IP address"""
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        local_ip = s.getsockname()[0]
-        s.close()
-        return local_ip
-    except:
-        return "Not Found"
+class CoordinatorHandler(socketserver.StreamRequestHandler):
+    """One worker connection: a JSON request per line, a JSON reply per line"""
+    timeout = LEASE_TIMEOUT  # Overrides the short global socket timeout
+    
+    def handle(self):
+        coordinator = self.server.coordinator
+        with coordinator.lock:
+            coordinator.connections += 1
+        try:
+            for line in self.rfile:
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict) or not coordinator.authorized(message):
+                        # Nothing from a connection without the token is acted on
+                        self.wfile.write(b'{"error": "invalid token"}\n')
+                        break
+                    reply = coordinator.handle(message)
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {'error': str(e)}
+                self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+        except OSError:
+            pass
+        finally:
+            with coordinator.lock:
+                coordinator.connections -= 1
+
+
+class CoordinatorServer(socketserver.ThreadingTCPServer):
+    """TCP server sharing one Coordinator between worker connections"""
+    allow_reuse_address = True
+    daemon_threads = True
+    
+    def __init__(self, address, coordinator):
+        super().__init__(address, CoordinatorHandler)
+        self.coordinator = coordinator
 
 
-def extract_title(html_content):
-    """Extract title from HTML content"""
+def coordinate_scan(checkpoint, on_result, address=(COORDINATOR_HOST, COORDINATOR_PORT), plan=None, control=None,
+                    renderer=None, token=None):
+    """Serve a checkpoint's shards to remote workers until all are done; returns (elapsed, outcome counts)"""
+    coordinator = Coordinator(checkpoint, on_result, plan=plan, control=control, token=token)
+    server = CoordinatorServer(address, coordinator)
+    host, port = server.server_address[:2]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    print(f"{Fore.CYAN}[i] Coordinator listening on {host}:{port} - {coordinator.total} shards to lease{Style.RESET_ALL}")
+    print(f"{Fore.CYAN}[i] Start workers with: python CameraScanner.py --worker <this-host>:{port} "
+          f"--token {coordinator.token}{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}[*] Waiting for workers...{Style.RESET_ALL}\n")
+    
+    if renderer is not None:
+        renderer.start()
+    start_time = time.time()
     try:
-        match = re.search(r'<title[^>]*>(.*?)</title>', html_content, re.IGNORECASE | re.DOTALL)
-        if match:
-            return match.group(1).strip()
-        return "No Title Found"
-    except:
-        return "Error Extracting Title"
+        while not coordinator.done.wait(STATUS_INTERVAL):
+            with coordinator.lock:
+                now = time.monotonic()
+                active = sum(1 for seen in coordinator.workers.values() if now - seen < coordinator.lease_timeout)
+                if coordinator.control.stopped.is_set():
+                    coordinator.expire(now)
+                    if not coordinator.leases:
+                        break
+                leased = len(coordinator.leases)
+            status = (f"{Fore.CYAN}[i] Shards done: {coordinator.finished}/{coordinator.total} "
+                      f"({leased} leased, {active} workers){Style.RESET_ALL}")
+            if renderer is not None:
+                renderer.print(status)
+            else:
+                print(status)
+        elapsed = time.time() - start_time
+        
+        # Give connected workers a moment to hear that the scan is over
+        deadline = time.monotonic() + 2 * HEARTBEAT_INTERVAL
+        while coordinator.connections and time.monotonic() < deadline:
+            time.sleep(0.1)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return elapsed, coordinator.counts
 
 
-def trace_route():
-    """Trace route to a domain/IP"""
-    print(f"\n{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
-    print(f"{Fore.YELLOW}[🔍] TRACE ROUTE MODE [🔍]{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}\n")
+class CoordinatorClient:
+    """A worker's connection to the coordinator; safe to share between threads"""
     
-    # Automatically use google.com as target
-    target = "google.com"
+    def __init__(self, address, worker_id, token, timeout=LEASE_TIMEOUT):
+        self.sock = socket.create_connection(address, timeout=timeout)
+        self.file = self.sock.makefile('rwb')
+        self.worker_id = worker_id
+        self.token = token
+        self.lock = threading.Lock()
     
-    print(f"{Fore.GREEN}[i] Target: {Fore.CYAN}{target}{Style.RESET_ALL}")
-    print(f"{Fore.YELLOW}[*] Tracing route to {Fore.CYAN}{target}{Style.RESET_ALL}")
-    print(f"{Fore.YELLOW}[*] Please wait...{Style.RESET_ALL}\n")
-    print(f"{Fore.CYAN}{'─'*50}{Style.RESET_ALL}\n")
+    def call(self, message):
+        """Send one request and wait for its reply"""
+        data = json.dumps(dict(message, worker=self.worker_id, token=self.token)).encode('utf-8') + b'\n'
+        with self.lock:
+            self.file.write(data)
+            self.file.flush()
+            line = self.file.readline()
+        if not line:
+            raise ConnectionError("coordinator closed the connection")
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise ValueError(reply['error'])
+        return reply
     
+    def close(self):
+        try:
+            self.file.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def run_worker(address, token, concurrency=ASYNC_CONCURRENCY, worker_id=None, metrics=None, control=None):
+    """Scan shards leased from a coordinator, streaming results back, until the scan is done"""
+    control = control or ScanControl()
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
     try:
-        system = platform.system()
-        
-        if system == "Windows":
-            # Windows tracert command (fast mode with max 30 hops)
-            cmd = ['tracert', '-d', '-h', '30', '-w', '1000', target]
-        else:
-            # Linux/macOS/Termux traceroute command
-            # Try multiple commands in order of preference
-            cmd = None
-            
-            # Try traceroute first
+        client = CoordinatorClient(address, worker_id, token)
+        config = client.call({'op': 'hello'})
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}[!] Cannot reach coordinator {address[0]}:{address[1]}: {e}{Style.RESET_ALL}")
+        return
+    
+    space = TargetSpace([tuple(r) for r in config['ranges']])
+    plan = ProbePlan.from_settings(config['plan'])
+    print(f"{Fore.GREEN}[✓] Worker {worker_id} joined coordinator {address[0]}:{address[1]}{Style.RESET_ALL}")
+    
+    # Results and shard completions go out in order on a sender thread, so
+    # the probe loop never waits on the coordinator; it heartbeats when idle
+    uplink = Queue()
+    lost = threading.Event()
+    
+    def sender():
+        while True:
             try:
-                result = subprocess.run(['traceroute', '--version'], capture_output=True, timeout=2)
-                cmd = ['traceroute', '-n', '-m', '30', '-w', '1', target]
-            except:
-                pass
-            
-            # Try tracepath as fallback
-            if cmd is None:
-                try:
-                    result = subprocess.run(['tracepath', '-V'], capture_output=True, timeout=2)
-                    cmd = ['tracepath', '-n', target]
-                except:
-                    pass
-            
-            # If nothing works, default to traceroute (will show error if not found)
-            if cmd is None:
-                cmd = ['traceroute', '-n', '-m', '30', '-w', '1', target]
-        
-        # Run the command and display output in real-time
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        
-        hop_count = 0
-        for line in iter(process.stdout.readline, ''):
-            if line:
-                line = line.strip()
-                
-                # Color code the output
-                if '*' in line or 'timeout' in line.lower():
-                    print(f"{Fore.RED}{line}{Style.RESET_ALL}")
-                elif 'ms' in line.lower() or 'Tracing' in line or 'traceroute' in line:
-                    # Highlight successful hops
-                    if any(char.isdigit() for char in line) and ('ms' in line.lower() or '<' in line):
-                        hop_count += 1
-                        print(f"{Fore.GREEN}[Hop {hop_count:2d}] {line}{Style.RESET_ALL}")
-                    else:
-                        print(f"{Fore.CYAN}{line}{Style.RESET_ALL}")
-                else:
-                    print(f"{Fore.WHITE}{line}{Style.RESET_ALL}")
+                message = uplink.get(timeout=HEARTBEAT_INTERVAL)
+            except Empty:
+                message = {'op': 'heartbeat'}
+            if message is None:
+                return
+            try:
+                client.call(message)
+            except (OSError, ValueError) as e:
+                print(f"{Fore.RED}[!] Lost connection to coordinator: {e}{Style.RESET_ALL}")
+                lost.set()
+                return
+    
+    thread = threading.Thread(target=sender, daemon=True)
+    thread.start()
+    
+    state = {'done': False, 'stopped': False, 'wait': 0}
+    
+    def claim():
+        if lost.is_set() or control.stopped.is_set():
+            return None
+        reply = client.call({'op': 'lease'})
+        state['done'] = reply.get('done', False)
+        state['stopped'] = reply.get('stopped', False)
+        state['wait'] = reply.get('wait', 0)
+        return reply['shard']
+    
+    def shard_done(shard, counts):
+        uplink.put({'op': 'done', 'shard': shard, 'counts': counts})
+        print(f"{Fore.CYAN}[i] Shard {shard} done{Style.RESET_ALL}")
+    
+    try:
+        while not state['done'] and not lost.is_set() and not control.stopped.is_set():
+            scan_shards(space, plan, config['shard_size'], claim,
+                        lambda result: uplink.put({'op': 'result', 'result': result}), shard_done, concurrency,
+                        metrics, control)
+            if state['wait']:
+                control.stopped.wait(state['wait'])
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}[!] Lost connection to coordinator: {e}{Style.RESET_ALL}")
+    finally:
+        uplink.put(None)
+        thread.join()
+        client.close()
+    if state['stopped']:
+        print(f"{Fore.YELLOW}[*] Coordinator stopped the scan{Style.RESET_ALL}")
+    elif state['done']:
+        print(f"{Fore.GREEN}[✓] Coordinator reports the scan complete{Style.RESET_ALL}")
+    elif control.stopped.is_set():
+        print(f"{Fore.YELLOW}[*] Worker stopped; its unfinished shard goes back to the coordinator{Style.RESET_ALL}")
+
+
+def parse_ports(text):
+    """Parse a port list like '80,8080,8000-8010'; 'camera' stands for CAMERA_PORTS, 'https' for TLS_PORTS"""
+    ports = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if part.lower() == 'camera':
+            ports.extend(CAMERA_PORTS)
+            continue
+        if part.lower() == 'https':
+            ports.extend(TLS_PORTS)
+            continue
+        first, _, last = part.partition('-')
+        first, last = int(first), int(last or first)
+        if not 0 < first <= last <= 65535:
+            raise ValueError(f"invalid port range {part!r}")
+        ports.extend(range(first, last + 1))
+    if not ports:
+        raise ValueError("no ports given")
+    return list(dict.fromkeys(ports))
+
+
+class Scanner:
+    """Importable scanner: iterate over it (or `async for` it) to get result dicts as they arrive"""
+    
+    def __init__(self, targets, ports=None, engine='asyncio', concurrency=None, connect_timeout=INITIAL_RTO,
+                 read_timeout=READ_TIMEOUT, byte_budget=MAX_RESPONSE_BYTES, metrics=None, plan=None, renderer=None,
+                 exclude=(), include=()):
+        if isinstance(targets, str):
+            targets = [targets]
+        if not isinstance(targets, TargetSpace):
+            targets = TargetSpace.from_specs(targets)
+        if engine not in ('asyncio', 'threads'):
+            raise ValueError(f"unknown engine {engine!r}")
+        # Do-not-touch lists (and EXCLUDE_FILE) are cut out here so no caller can skip them
+        self.space, self.excluded = apply_target_lists(targets, exclude, include)
+        self.plan = plan or ProbePlan(ports)
+        self.scheduler = PlanScheduler(self.plan, on_skip=self.probe_done)
+        self.engine = engine
+        self.concurrency = concurrency
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.byte_budget = byte_budget
+        self.metrics = metrics
+        self.renderer = renderer
+        self.counts = collections.Counter()
+        self.counts_lock = threading.Lock()
+        self.control = ScanControl()
+    
+    def stop(self):
+        """Stop handing out new targets; probes already in flight still finish"""
+        self.control.stop()
+    
+    def pause(self):
+        """Hold back new targets until resume(); probes already in flight still finish"""
+        self.control.pause()
+    
+    def resume(self):
+        self.control.resume()
+    
+    def targets(self):
+        # The engines apply pause and stop from self.control as they pull targets
+        self.scheduler = PlanScheduler(self.plan, on_skip=self.probe_done)
+        return self.scheduler.schedule(iter_probe_targets(self.space, self.plan.ports))
+    
+    def probe_done(self, ip_int, port, outcome):
+        self.scheduler.probe_done(ip_int, port, outcome)
+        with self.counts_lock:
+            self.counts[outcome] += 1
+    
+    def run(self, on_result):
+        """Scan to completion in the calling thread, passing every result to `on_result`"""
+        rtt = RttEstimator(connect_timeout=self.connect_timeout, read_timeout=self.read_timeout)
+        if self.engine == 'threads':
+            thread_scan(self.targets(), on_result, self.byte_budget, self.probe_done,
+                        self.concurrency or THREAD_CONCURRENCY_MAX, rtt, metrics=self.metrics,
+                        paths=self.plan.paths, control=self.control, follow_up=self.plan.follow_up,
+                        renderer=self.renderer)
+        else:
+            run_async_scan(self.targets(), on_result, self.concurrency or ASYNC_CONCURRENCY,
+                           byte_budget=self.byte_budget, on_probe_done=self.probe_done, rtt=rtt,
+                           metrics=self.metrics, paths=self.plan.paths, control=self.control,
+                           follow_up=self.plan.follow_up, renderer=self.renderer)
+    
+    def __iter__(self):
+        # The engine runs on a background thread; leaving the loop early stops it
+        results = Queue()
+        finished = object()
+        errors = []
         
-        process.wait()
+        def worker():
+            try:
+                self.run(results.put)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                results.put(finished)
         
-        print(f"\n{Fore.CYAN}{'─'*50}{Style.RESET_ALL}")
-        print(f"{Fore.GREEN}[✓] Trace complete!{Style.RESET_ALL}")
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        try:
+            while True:
+                result = results.get()
+                if result is finished:
+                    break
+                yield result
+        finally:
+            self.stop()
+            thread.join()
+        if errors:
+            raise errors[0]
+    
+    async def __aiter__(self):
+        # Runs the async engine on the caller's event loop
+        connect_concurrency, banner_concurrency = fit_file_limit(self.concurrency or ASYNC_CONCURRENCY,
+                                                                 ASYNC_BANNER_CONCURRENCY)
+        controller = ConcurrencyController(ASYNC_CONCURRENCY_START,
+                                           minimum=min(CONCURRENCY_MIN, connect_concurrency),
+                                           maximum=connect_concurrency)
+        if self.renderer is not None:
+            self.renderer.controller = controller
+            self.renderer.start()
+        rtt = RttEstimator(connect_timeout=self.connect_timeout, read_timeout=self.read_timeout)
+        results = asyncio.Queue()
+        finished = object()
         
-        if hop_count > 0:
-            print(f"{Fore.CYAN}[i] Total hops: {hop_count}{Style.RESET_ALL}")
+        async def worker():
+            try:
+                await async_scan(self.targets(), results.put_nowait, connect_concurrency, banner_concurrency,
+                                 self.byte_budget, self.probe_done, controller, rtt, self.metrics, self.plan.paths,
+                                 self.control, self.plan.follow_up)
+            finally:
+                results.put_nowait(finished)
         
-    except FileNotFoundError:
-        print(f"{Fore.RED}[!] Traceroute command not found on this system{Style.RESET_ALL}")
-        print(f"{Fore.YELLOW}[i] For Termux, install: pkg install inetutils{Style.RESET_ALL}")
-        print(f"{Fore.YELLOW}[i] Or install: pkg install traceroute{Style.RESET_ALL}")
-    except Exception as e:
-        print(f"{Fore.RED}[!] Error: {e}{Style.RESET_ALL}")
-    
-    print(f"\n{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
+        task = asyncio.ensure_future(worker())
+        try:
+            while True:
+                result = await results.get()
+                if result is finished:
+                    break
+                yield result
+            await task
+        finally:
+            # Leaving early drains the probes in flight instead of abandoning sockets
+            self.stop()
+            await asyncio.gather(task, return_exceptions=True)
 
 
-def super_fast_scan():
+def super_fast_scan(metrics=None):
     """Super fast scan with full threading power"""
     print(f"\n{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
     print(f"{Fore.RED}[⚡] SUPER FAST SCAN MODE [⚡]{Style.RESET_ALL}")
@@ -244,159 +3936,238 @@ def super_fast_scan():
     
     print(f"{Fore.CYAN}Examples:{Style.RESET_ALL}")
     print(f"  Single IP: 192.168.1.1")
-    print(f"  IP Range: 192.168.1.1 to 192.168.1.255\n")
+    print(f"  IP Range: 192.168.1.1 to 192.168.1.255")
+    print(f"  CIDR: 10.0.0.0/16 (no End IP needed)")
+    print(f"  Range file: @ranges.txt (one IP/CIDR/start-end per line)\n")
     
-    # Get start IP
+    # Offer to continue an interrupted scan
+    if os.path.exists(FAST_CHECKPOINT):
+        answer = input(f"{Fore.YELLOW}[?] Found an unfinished scan. Resume it? (Y/n): {Style.RESET_ALL}").strip().lower()
+        if answer not in ('n', 'no'):
+            resume_scan(FAST_CHECKPOINT, metrics)
+            return
+    
+    # Get start IP, CIDR or range file
     while True:
         start_ip = input(f"{Fore.GREEN}Enter Start IP: {Style.RESET_ALL}").strip()
-        if not validate_ip(start_ip):
-            print(f"{Fore.RED}[!] Invalid IP address format!{Style.RESET_ALL}")
+        if validate_ip(start_ip):
+            break
+        try:
+            space = TargetSpace.from_specs([start_ip])
+        except (ValueError, OSError) as e:
+            print(f"{Fore.RED}[!] Invalid IP address format! ({e}){Style.RESET_ALL}")
             continue
         break
     
-    # Get end IP (optional)
-    end_ip = input(f"{Fore.GREEN}Enter End IP (press Enter for single IP): {Style.RESET_ALL}").strip()
-    
-    # Generate IP list
-    ip_list = []
-    if not end_ip:
-        ip_list = [start_ip]
-    else:
-        if not validate_ip(end_ip):
-            print(f"{Fore.RED}[!] Invalid End IP! Scanning single IP only.{Style.RESET_ALL}")
-            ip_list = [start_ip]
-        else:
-            start_int = int(ipaddress.IPv4Address(start_ip))
-            end_int = int(ipaddress.IPv4Address(end_ip))
-            
-            if start_int > end_int:
-                print(f"{Fore.RED}[!] Start IP must be less than End IP!{Style.RESET_ALL}")
-                ip_list = [start_ip]
+    if validate_ip(start_ip):
+        # Get end IP (optional)
+        end_ip = input(f"{Fore.GREEN}Enter End IP (press Enter for single IP): {Style.RESET_ALL}").strip()
+        
+        # Build the target range (addresses are generated lazily while scanning)
+        space = TargetSpace.from_specs([start_ip])
+        if end_ip:
+            if not validate_ip(end_ip):
+                print(f"{Fore.RED}[!] Invalid End IP! Scanning single IP only.{Style.RESET_ALL}")
             else:
-                for ip_int in range(start_int, end_int + 1):
-                    ip_list.append(str(ipaddress.IPv4Address(ip_int)))
+                try:
+                    space = TargetSpace.from_specs([f"{start_ip}-{end_ip}"])
+                except ValueError:
+                    print(f"{Fore.RED}[!] Start IP must be less than End IP!{Style.RESET_ALL}")
     
-    print(f"\n{Fore.GREEN}[✓] Total IPs to scan: {len(ip_list)}{Style.RESET_ALL}")
+    # Do-not-touch lists are cut out of the range before anything is probed
+    exclude_text = input(f"{Fore.GREEN}Exclusion list files, comma-separated (press Enter for none): "
+                         f"{Style.RESET_ALL}").strip()
+    try:
+        space, excluded = apply_target_lists(space, [path.strip() for path in exclude_text.split(',') if path.strip()])
+    except (ValueError, OSError) as e:
+        print(f"{Fore.RED}[!] Cannot load exclusion list: {e}{Style.RESET_ALL}")
+        return
+    if excluded:
+        print(f"{Fore.CYAN}[i] Excluded {excluded} IPs on do-not-touch lists{Style.RESET_ALL}")
     
-    # Auto-detect optimal thread count
-    cpu_count = multiprocessing.cpu_count()
-    max_threads = min(500, cpu_count * 50)  # Scale with CPU cores
+    print(f"\n{Fore.GREEN}[✓] Total IPs to scan: {len(space)}{Style.RESET_ALL}")
     
-    print(f"{Fore.CYAN}[i] CPU Cores: {cpu_count}{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}[i] Threads: {max_threads}{Style.RESET_ALL}")
-    print(f"{Fore.YELLOW}[*] Starting super fast scan...{Style.RESET_ALL}\n")
+    # Select probe engine
+    print(f"\n{Fore.CYAN}Engine:{Style.RESET_ALL}")
+    print(f"  1. Threads (default)")
+    print(f"  2. Asyncio (thousands of concurrent probes)")
+    print(f"  3. Multi-process (asyncio on all {SCAN_PROCESSES} cores)")
+    print(f"  4. Distributed (lease shards to --worker hosts)")
+    engine = input(f"{Fore.GREEN}Select engine (1-4): {Style.RESET_ALL}").strip()
     
-    ports = [80, 8080]
-    results = []
-    results_lock = threading.Lock()
-    scan_queue = Queue()
+    listen = None
+    if engine == '4':
+        print(f"{Fore.CYAN}[i] Use 0.0.0.0:{COORDINATOR_PORT} to accept workers from other hosts{Style.RESET_ALL}")
+        listen = input(f"{Fore.GREEN}Coordinator listen address [{COORDINATOR_HOST}:{COORDINATOR_PORT}]: "
+                       f"{Style.RESET_ALL}").strip()
+        listen = listen or f"{COORDINATOR_HOST}:{COORDINATOR_PORT}"
     
-    # Worker function for threading
-    def worker():
-        while True:
-            try:
-                ip, port = scan_queue.get(timeout=0.5)
-                
-                try:
-                    # Ultra-fast port check
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    sock.settimeout(0.5)  # Super fast timeout
-                    result = sock.connect_ex((ip, port))
-                    sock.close()
-                    
-                    if result == 0:
-                        # Port is open, get HTTP data
-                        try:
-                            http_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                            http_sock.settimeout(1)
-                            http_sock.connect((ip, port))
-                            
-                            request = f'GET / HTTP/1.1\r\nHost: {ip}\r\nConnection: close\r\n\r\n'
-                            http_sock.send(request.encode())
-                            
-                            response = b''
-                            http_sock.settimeout(2)
-                            while True:
-                                try:
-                                    data = http_sock.recv(4096)
-                                    if not data:
-                                        break
-                                    response += data
-                                    if len(response) > 30000:
-                                        break
-                                except:
-                                    break
-                            
-                            http_sock.close()
-                            
-                            if response:
-                                response_str = response.decode('utf-8', errors='ignore')
-                                title = extract_title(response_str)
-                                
-                                # Server header
-                                server_match = re.search(r'Server: ([^\r\n]+)', response_str, re.IGNORECASE)
-                                server = server_match.group(1) if server_match else "Unknown"
-                                
-                                url = f"http://{ip}:{port}" if port != 80 else f"http://{ip}"
-                                
-                                # Detect camera type based on title and content
-                                camera_type = None
-                                title_lower = title.lower()
-                                
-                                if 'web service' in title_lower or '<title>WEB SERVICE</title>' in response_str:
-                                    camera_type = "Camera - WEB SERVICE"
-                                elif 'web' in title_lower:
-                                    camera_type = "Camera - WEB"
-                                elif 'login' in title_lower:
-                                    camera_type = "Camera - Login"
-                                elif 'login.asp' in response_str:
-                                    camera_type = "Camera - HIK Vision"
-                                elif 'dvr' in title_lower or 'camera' in title_lower:
-                                    camera_type = "Camera - DVR"
-                                elif 'ipcam' in title_lower or 'ip cam' in title_lower:
-                                    camera_type = "Camera - IP Camera"
-                                
-                                # Only save and display if it's a camera (not regular web server)
-                                if camera_type:
-                                    with results_lock:
-                                        results.append({
-                                            'ip': ip,
-                                            'port': port,
-                                            'title': title,
-                                            'server': server,
-                                            'url': url,
-                                            'type': camera_type
-                                        })
-                                        print(f"{Fore.GREEN}[✓] Camera Found: {ip}:{port} - {title[:40]}{Style.RESET_ALL}")
-                        except:
-                            pass
-                except:
-                    pass
-                
-                scan_queue.task_done()
-            except:
-                break
+    # Probe plan: ports in order, and whether a camera ends the host
+    ports_text = input(f"{Fore.GREEN}Ports in probe order [{','.join(map(str, DEFAULT_PORTS))}] "
+                       f"('camera' = {','.join(map(str, CAMERA_PORTS))}): {Style.RESET_ALL}").strip()
+    try:
+        ports = parse_ports(ports_text) if ports_text else DEFAULT_PORTS
+    except ValueError as e:
+        print(f"{Fore.RED}[!] {e}, using {','.join(map(str, DEFAULT_PORTS))}{Style.RESET_ALL}")
+        ports = DEFAULT_PORTS
+    answer = input(f"{Fore.GREEN}Stop probing a host after its first camera? (Y/n): {Style.RESET_ALL}").strip().lower()
+    stop_on_hit = answer not in ('n', 'no')
+    answer = input(f"{Fore.GREEN}Confirm model/firmware with follow-up requests on the same connection? (y/N): "
+                   f"{Style.RESET_ALL}").strip().lower()
+    plan = ProbePlan(ports, stop_on_hit=stop_on_hit, follow_up=answer in ('y', 'yes'))
     
-    # Start threads
-    threads = []
-    for _ in range(max_threads):
-        t = threading.Thread(target=worker, daemon=True)
-        t.start()
-        threads.append(t)
+    # Select output format
+    fmt = input(f"{Fore.GREEN}Output format (txt/jsonl/csv/sqlite) [txt]: {Style.RESET_ALL}").strip().lower() or 'txt'
+    if fmt not in SINKS:
+        print(f"{Fore.RED}[!] Unknown format '{fmt}', using txt{Style.RESET_ALL}")
+        fmt = 'txt'
     
-    # Queue all IP:port combinations
-    start_time = time.time()
-    for ip in ip_list:
-        for port in ports:
-            scan_queue.put((ip, port))
+    # Incremental mode re-uses the host cache from earlier runs
+    answer = input(f"{Fore.GREEN}Incremental scan (only re-check changes since last run)? (y/N): {Style.RESET_ALL}").strip().lower()
+    incremental = answer in ('y', 'yes')
     
-    # Wait for completion
-    scan_queue.join()
-    elapsed = time.time() - start_time
+    # Sampling pre-pass: find blocks where nothing answers before the full scan
+    answer = input(f"{Fore.GREEN}Sample each /{SAMPLE_PREFIX} first and skip blocks where nothing answers? (y/N): "
+                   f"{Style.RESET_ALL}").strip().lower()
+    if answer in ('y', 'yes'):
+        answer = input(f"{Fore.GREEN}Skip dead blocks or probe them last? (S/l): {Style.RESET_ALL}").strip().lower()
+        plan.dead_blocks = sample_blocks(space, plan, demote=answer in ('l', 'last'))
+    
+    run_fast_scan(space, engine, fmt, plan, incremental=incremental, listen=listen, metrics=metrics,
+                  excluded=excluded)
+
+
+def run_fast_scan(space, engine='1', fmt='txt', plan=None, checkpoint=None, incremental=False, listen=None,
+                  metrics=None, excluded=0, quiet=False):
+    """Scan a target space, checkpointing progress so the scan can be resumed"""
+    plan = plan or ProbePlan()
+    ports = plan.ports
+    if checkpoint is None:
+        checkpoint = Checkpoint(FAST_CHECKPOINT, space, ports)
+        checkpoint.settings = {'mode': 'fast', 'engine': engine, 'format': fmt, 'incremental': incremental,
+                               'listen': listen, 'plan': plan.settings(), 'excluded': excluded}
+    
+    sink = open_sink(fmt)
+    
+    # Results from before a restart are rewritten to the new output; shards
+    # that were in flight are probed again, so the checkpoint's result index
+    # deduplicates their hits
+    results = checkpoint.results
+    for result in results:
+        sink.put(result)
+    
+    def report(result):
+        if cache is not None:
+            cache.add_result(ip_to_int(result['ip']), result)
+        if not checkpoint.add_result(result):
+            return
+        renderer.print(f"{Fore.GREEN}[✓] Camera Found: {result['ip']}:{result['port']} - {result['title'][:40]}{Style.RESET_ALL}")
+        sink.put(result)
+    
+    total_ips = len(space)
+    pending_ips = checkpoint.pending_addresses()
+    if pending_ips < total_ips:
+        print(f"{Fore.CYAN}[i] Resuming: {total_ips - pending_ips} IPs already done, {pending_ips} left{Style.RESET_ALL}")
+    
+    print(f"{Fore.CYAN}[i] Probe plan: {plan.describe()}{Style.RESET_ALL}")
+    # Hosts dropped by the plan still count as done for the checkpoint
+    scheduler = PlanScheduler(plan, on_skip=checkpoint.probe_done)
+    targets = scheduler.schedule(checkpoint.iter_targets())
+    
+    cache = None
+    if incremental and engine in ('3', '4'):
+        # The cache filter and diff need every probe outcome in one process
+        print(f"{Fore.YELLOW}[!] Incremental scans run in a single process, using the asyncio engine{Style.RESET_ALL}")
+        engine = '2'
+    
+    if incremental:
+        cache = HostCache()
+        cache.load(space, ports)
+        print(f"{Fore.CYAN}[i] Host cache: {len(cache.cameras)} known cameras, "
+              f"{len(cache.answered)} other hosts cached, {cache.evicted} expired{Style.RESET_ALL}")
+        # Skipped targets still count as done for the checkpoint
+        targets = cache.filter_targets(targets, on_skip=checkpoint.probe_done)
+    
+    counts = collections.Counter()
+    counts_lock = threading.Lock()
+    
+    def probe_done(ip_int, port, outcome):
+        scheduler.probe_done(ip_int, port, outcome)
+        checkpoint.probe_done(ip_int, port, outcome)
+        if cache is not None:
+            cache.probe_done(ip_int, port, outcome)
+        with counts_lock:
+            counts[outcome] += 1
+    
+    # Engines 3 and 4 only report outcome counts at the end, so progress
+    # comes from the checkpoint
+    def status():
+        with counts_lock:
+            probes = sum(counts.values())
+        state = {'done': total_ips - checkpoint.pending_addresses(), 'total': total_ips, 'unit': 'IPs',
+                 'hits': len(results)}
+        if probes:
+            state['probes'] = probes
+        return state
+    
+    # Hits and progress are written by the renderer's thread, never by a probe
+    renderer = ConsoleRenderer(status, quiet=quiet)
+    
+    # Worker processes share the control through multiprocessing events
+    control = ScanControl(multiprocessing if engine == '3' else threading)
+    handlers = install_signal_handlers(control)
+    print_controls()
+    try:
+        if engine == '4':
+            elapsed, counts = coordinate_scan(checkpoint, report, parse_address(listen or str(COORDINATOR_PORT)),
+                                              plan=plan, control=control, renderer=renderer)
+        elif engine == '3':
+            elapsed, counts = sharded_scan(checkpoint, report, plan=plan, control=control, renderer=renderer)
+        elif engine == '2':
+            renderer.print(f"{Fore.CYAN}[i] Engine: Asyncio{Style.RESET_ALL}")
+            renderer.print(f"{Fore.CYAN}[i] Concurrent probes: adaptive, {ASYNC_CONCURRENCY_START} growing up to {ASYNC_CONCURRENCY} connect + {ASYNC_BANNER_CONCURRENCY} banner{Style.RESET_ALL}")
+            renderer.print(f"{Fore.YELLOW}[*] Starting super fast scan...{Style.RESET_ALL}\n")
+            
+            start_time = time.time()
+            run_async_scan(targets, report, on_probe_done=probe_done, metrics=metrics, paths=plan.paths,
+                           control=control, follow_up=plan.follow_up, renderer=renderer)
+            elapsed = time.time() - start_time
+        else:
+            elapsed = thread_scan(targets, report, on_probe_done=probe_done, metrics=metrics, paths=plan.paths,
+                                  control=control, follow_up=plan.follow_up, renderer=renderer)
+    except KeyboardInterrupt:
+        # Second Ctrl+C: probes in flight are abandoned
+        renderer.stop()
+        sink.close()
+        if cache is not None:
+            cache.close()
+        checkpoint.save()
+        print(f"\n{Fore.YELLOW}[*] Progress saved to {checkpoint.path} - run with --resume to continue{Style.RESET_ALL}")
+        raise
+    finally:
+        renderer.stop()
+        restore_signal_handlers(handlers)
+    
+    sink.close()
+    stopped = control.stopped.is_set()
+    changes = None
+    if stopped:
+        # Every probe in flight has finished; unfinished shards are redone on resume
+        if cache is not None:
+            cache.close()
+        checkpoint.save()
+    else:
+        checkpoint.finish()
+        if cache is not None:
+            changes = cache.diff()
+            cache.close(gone=changes[2])
     
     # Display results
     print(f"\n{Fore.CYAN}{'═'*50}{Style.RESET_ALL}")
-    print(f"{Fore.GREEN}[✓] SUPER FAST SCAN COMPLETE!{Style.RESET_ALL}")
+    if stopped:
+        print(f"{Fore.YELLOW}[■] SUPER FAST SCAN STOPPED{Style.RESET_ALL}")
+    else:
+        print(f"{Fore.GREEN}[✓] SUPER FAST SCAN COMPLETE!{Style.RESET_ALL}")
     print(f"{Fore.CYAN}{'═'*50}{Style.RESET_ALL}\n")
     
     if results:
@@ -406,199 +4177,332 @@ def super_fast_scan():
             print(f"    Title: {Fore.YELLOW}{r['title']}{Style.RESET_ALL}")
             print(f"    Server: {Fore.YELLOW}{r['server']}{Style.RESET_ALL}")
             print(f"    Type: {Fore.RED}{r['type']}{Style.RESET_ALL}")
+            for field in DETAIL_FIELDS:
+                if r.get(field):
+                    print(f"    {field.title()}: {Fore.RED}{r[field]}{Style.RESET_ALL}")
             print(f"    URL: {Fore.WHITE}{r['url']}{Style.RESET_ALL}")
             print()
         
-        # Save to file
-        try:
-            with open("SuperFastScan_Results.txt", 'w', encoding='utf-8') as f:
-                f.write("="*60 + "\n")
-                f.write("SUPER FAST SCAN - CAMERAS FOUND\n")
-                f.write("="*60 + "\n\n")
-                for r in results:
-                    f.write(f"IP: {r['ip']}:{r['port']}\n")
-                    f.write(f"Title: {r['title']}\n")
-                    f.write(f"Server: {r['server']}\n")
-                    f.write(f"Type: {r['type']}\n")
-                    f.write(f"URL: {r['url']}\n")
-                    f.write("-"*60 + "\n\n")
-            print(f"{Fore.GREEN}[✓] Results saved to: SuperFastScan_Results.txt{Style.RESET_ALL}")
-        except:
-            pass
+        if sink.written:
+            print(f"{Fore.GREEN}[✓] Results saved to: {sink.path}{Style.RESET_ALL}")
     else:
         print(f"{Fore.YELLOW}[!] No cameras found{Style.RESET_ALL}")
     
-    print(f"\n{Fore.CYAN}[i] Total IPs scanned: {len(ip_list)}{Style.RESET_ALL}")
+    if changes is not None:
+        print_changes(*changes)
+    
+    if stopped:
+        print(f"\n{Fore.CYAN}[i] IPs scanned: {total_ips - checkpoint.pending_addresses()} of {total_ips}{Style.RESET_ALL}")
+        print(f"{Fore.YELLOW}[*] Progress saved to {checkpoint.path} - run with --resume to continue{Style.RESET_ALL}")
+    else:
+        print(f"\n{Fore.CYAN}[i] Total IPs scanned: {total_ips}{Style.RESET_ALL}")
+    if excluded:
+        print(f"{Fore.CYAN}[i] Excluded: {excluded * len(ports)} targets ({excluded} IPs on do-not-touch lists)"
+              f"{Style.RESET_ALL}")
     print(f"{Fore.CYAN}[i] Cameras found: {len(results)}{Style.RESET_ALL}")
+    probes = sum(counts.values())
+    if counts:
+        breakdown = ', '.join(f"{count} {outcome}" for outcome, count in counts.most_common())
+        print(f"{Fore.CYAN}[i] Probes: {probes} ({breakdown}){Style.RESET_ALL}")
     print(f"{Fore.CYAN}[i] Time taken: {elapsed:.2f} seconds{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}[i] Speed: {(len(ip_list)*2)/elapsed:.0f} ports/sec{Style.RESET_ALL}")
+    print(f"{Fore.CYAN}[i] Speed: {probes / max(elapsed, 1e-6):.0f} ports/sec{Style.RESET_ALL}")
 
 
-def scan(ip, port):
-    """Scan a specific IP and port for cameras"""
-    global stop_scan, pause_scan
-    
-    # Check if scan should stop
-    if stop_scan:
+def print_changes(new, changed, gone):
+    """Print the incremental-mode difference against the host cache"""
+    print(f"\n{Fore.CYAN}[i] Changes since last run: {len(new)} new, {len(changed)} changed, {len(gone)} gone{Style.RESET_ALL}")
+    for ip_int, port, camera_type, title, server in new:
+        print(f"  {Fore.GREEN}+ {int_to_ip(ip_int)}:{port} - {camera_type} ({title}){Style.RESET_ALL}")
+    for ip_int, port, old_type, old_title, old_server, camera_type, title, server in changed:
+        print(f"  {Fore.YELLOW}~ {int_to_ip(ip_int)}:{port} - {old_type} ({old_title}, {old_server})"
+              f" -> {camera_type} ({title}, {server}){Style.RESET_ALL}")
+    for ip_int, port, camera_type, title, server in gone:
+        print(f"  {Fore.RED}- {int_to_ip(ip_int)}:{port} - {camera_type} ({title}){Style.RESET_ALL}")
+
+
+def resume_scan(path=FAST_CHECKPOINT, metrics=None, quiet=False):
+    """Continue a scan from its checkpoint file without re-probing finished shards"""
+    try:
+        checkpoint = Checkpoint.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"{Fore.RED}[!] Cannot resume from {path}: {e}{Style.RESET_ALL}")
         return
     
-    # Wait while paused
-    while pause_scan and not stop_scan:
-        time.sleep(0.1)
+    settings = checkpoint.settings
+    print(f"{Fore.GREEN}[✓] Resuming scan from {path}{Style.RESET_ALL}")
     
-    if stop_scan:
-        return
+    # Checkpoints from before probe plans probed every port
+    if 'plan' in settings:
+        plan = ProbePlan.from_settings(settings['plan'])
+    else:
+        plan = ProbePlan(checkpoint.ports, stop_on_hit=False)
     
+    if settings.get('mode') == 'scanner':
+        run_scanner(checkpoint=checkpoint, plan=plan)
+    else:
+        run_fast_scan(checkpoint.space, settings.get('engine', '1'), settings.get('format', 'txt'),
+                      plan, checkpoint, settings.get('incremental', False), settings.get('listen'),
+                      metrics, settings.get('excluded', 0), quiet)
+
+
+def scan(ip, port, controller=None, rtt=None, renderer=None):
+    """Scan a specific IP and port for cameras; returns the saved record if one is found"""
     try:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            sock.connect((ip, port))
+            ip_int = ip_to_int(ip)
+            if rtt is not None:
+                sock.settimeout(rtt.connect_timeout(ip_int))
+            started = time.monotonic()
+            err = sock.connect_ex((ip, port))
+            elapsed = time.monotonic() - started
+            outcome = connect_outcome(err)
+            if rtt is not None and outcome in (OUTCOME_OPEN, OUTCOME_REFUSED):
+                rtt.sample(ip_int, elapsed)
+            if controller is not None:
+                controller.record(outcome, elapsed if err == 0 else None)
+            if err:
+                return None
+            if rtt is not None:
+                sock.settimeout(rtt.read_timeout(ip_int))
             sock.send(b'GET / HTTP/1.1\r\nHost: example.com\r\n\r\n')
-            response = sock.recv(4096).decode()
+            response = sock.recv(4096)
             
             camera_found = False
             camera_type = ""
             url = f"http://{ip}:{port}" if port == 8080 else f"http://{ip}"
             
-            if 'HTTP' in response and '<title>WEB SERVICE</title>' in response:
-                if ip not in detected_ips:
-                    detected_ips.add(ip)
-                    camera_type = "Anjhua-Dahua Technology Camera"
-                    camera_found = True
-                    print(f"{Fore.GREEN}[✓] {camera_type} Found!{Style.RESET_ALL} at {Fore.CYAN}{url}{Style.RESET_ALL}")
-                    
-            elif 'HTTP' in response and 'login.asp' in response:
-                if ip not in detected_ips:
-                    detected_ips.add(ip)
-                    camera_type = "HIK Vision Camera"
+            fingerprint = get_matcher().match(response, vendor_only=True)
+            if fingerprint['status'] is not None and fingerprint['vendor']:
+                if detected_ips.add(ip_int):
+                    camera_type = fingerprint['vendor']
                     camera_found = True
-                    print(f"{Fore.RED}[✓] {camera_type} Found!{Style.RESET_ALL} at {Fore.CYAN}{url}{Style.RESET_ALL}")
+                    color = Fore.RED if fingerprint['type'] == "Camera - HIK Vision" else Fore.GREEN
+                    message = f"{color}[✓] {camera_type} Found!{Style.RESET_ALL} at {Fore.CYAN}{url}{Style.RESET_ALL}"
+                    if renderer is not None:
+                        renderer.print(message)
+                    else:
+                        print(message)
             
-            # Live save to file
+            # Live save to file (written in batches by the sink's thread)
             if camera_found:
-                try:
-                    with open(CCTV_OUTPUT, 'a', encoding='utf-8') as file:
-                        file.write(f"{'='*60}\n")
-                        file.write(f"Camera Type: {camera_type}\n")
-                        file.write(f"IP Address: {ip}\n")
-                        file.write(f"Port: {port}\n")
-                        file.write(f"URL: {url}\n")
-                        file.write(f"Detection Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                        file.write(f"{'='*60}\n\n")
-                        file.flush()  # Force write to disk immediately (live save)
-                except Exception as e:
-                    pass
+                record = {
+                    'ip': ip,
+                    'port': port,
+                    'url': url,
+                    'type': camera_type,
+                    'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }
+                get_cctv_sink().put(record)
+                return record
                     
     except Exception as e:
         pass
 
 
-def execute(queue):
-    """Execute the scan from the queue"""
-    global stop_scan
-    try:
-        while not stop_scan:
-            try:
-                ip, port = queue.get(timeout=0.5)
-                scan(ip, port)
-                queue.task_done()
-            except:
-                if stop_scan:
+def get_cctv_sink():
+    """Return the CCTV_Found.txt writer, starting it on first use"""
+    global cctv_sink
+    with cctv_sink_lock:
+        if cctv_sink is None:
+            cctv_sink = CctvSink(CCTV_OUTPUT)
+        return cctv_sink
+
+
+def close_cctv_sink():
+    """Flush and close the CCTV_Found.txt writer"""
+    global cctv_sink
+    with cctv_sink_lock:
+        if cctv_sink is not None:
+            cctv_sink.close()
+            cctv_sink = None
+
+
+def execute(queue, checkpoint=None, controller=None, rtt=None, scheduler=None, control=None, sizer=None,
+            renderer=None):
+    """Execute the scan from the queue's work units until a None sentinel arrives"""
+    control = control or ScanControl()
+    while True:
+        chunk = queue.get()
+        try:
+            if chunk is None:
+                return
+            for ip_int, port in chunk:
+                # Blocks while paused; once stopped, queued targets are left for --resume
+                if not control.wait():
                     break
-                continue
-    except KeyboardInterrupt:
-        stop_scan = True
-        return
+                if controller is not None:
+                    controller.acquire()
+                try:
+                    record = scan(int_to_ip(ip_int), port, controller, rtt, renderer)
+                finally:
+                    if controller is not None:
+                        controller.release()
+                if scheduler is not None and record:
+                    scheduler.probe_done(ip_int, port, OUTCOME_CAMERA)
+                if checkpoint is not None:
+                    if record:
+                        checkpoint.add_result(record)
+                    checkpoint.probe_done(ip_int, port)
+            if sizer is not None:
+                sizer.chunk_done(len(chunk))
+        finally:
+            queue.task_done()
 
 
 def signal_handler_stop(signum, frame):
-    """Handle Ctrl+C - Immediate stop"""
-    global stop_scan
-    stop_scan = True
-    print(f"\n\n{Fore.RED}[!] Ctrl+C detected - STOPPING IMMEDIATELY...{Style.RESET_ALL}")
-    print(f"{Fore.YELLOW}[*] Cleaning up threads...{Style.RESET_ALL}")
-    sys.exit(0)
+    """Handle Ctrl+C - stop handing out probes and let the ones in flight finish"""
+    if scan_control is None or scan_control.stopped.is_set():
+        # Second Ctrl+C: give up on the drain
+        raise KeyboardInterrupt
+    signal_requests.put('stop')
 
 
 def signal_handler_pause(signum, frame):
     """Handle Ctrl+Z - Pause/Resume"""
-    global pause_scan
-    pause_scan = not pause_scan
-    if pause_scan:
-        print(f"\n\n{Fore.YELLOW}[⏸] SCAN PAUSED - Press Ctrl+Z again to resume...{Style.RESET_ALL}\n")
-    else:
-        print(f"\n\n{Fore.GREEN}[▶] SCAN RESUMED - Continuing...{Style.RESET_ALL}\n")
+    if scan_control is not None:
+        signal_requests.put('pause')
 
 
-def run_scanner(ip_list):
-    """Run the IP scanner"""
-    global stop_scan, pause_scan
-    
-    # Reset flags
-    stop_scan = False
-    pause_scan = False
-    
-    # Register signal handlers
+def apply_signal_requests(control, requests):
+    """Helper thread: apply Ctrl+C / Ctrl+Z requests to a scan's control until None arrives"""
+    # Messages go to stderr so headless JSON output on stdout stays clean
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        if request == 'stop' and not control.stopped.is_set():
+            control.stop()
+            print(f"\n\n{Fore.RED}[!] Ctrl+C detected - STOPPING...{Style.RESET_ALL}", file=sys.stderr)
+            print(f"{Fore.YELLOW}[*] Waiting for probes in flight to finish (Ctrl+C again to quit now)..."
+                  f"{Style.RESET_ALL}", file=sys.stderr)
+        elif request == 'pause' and not control.stopped.is_set():
+            if control.toggle_pause():
+                print(f"\n\n{Fore.YELLOW}[⏸] SCAN PAUSED - Press Ctrl+Z again to resume...{Style.RESET_ALL}\n",
+                      file=sys.stderr)
+            else:
+                print(f"\n\n{Fore.GREEN}[▶] SCAN RESUMED - Continuing...{Style.RESET_ALL}\n", file=sys.stderr)
+
+
+def install_signal_handlers(control):
+    """Route Ctrl+C and Ctrl+Z to a scan's control; returns the handlers to restore afterwards"""
+    global scan_control, signal_requests
+    scan_control = control
+    signal_requests = SimpleQueue()
+    threading.Thread(target=apply_signal_requests, args=(control, signal_requests), daemon=True).start()
+    previous = {}
     try:
-        signal.signal(signal.SIGINT, signal_handler_stop)  # Ctrl+C
+        previous[signal.SIGINT] = signal.signal(signal.SIGINT, signal_handler_stop)  # Ctrl+C
         if hasattr(signal, 'SIGTSTP'):  # Unix/Linux/Mac
-            signal.signal(signal.SIGTSTP, signal_handler_pause)  # Ctrl+Z
-    except:
-        pass  # Windows might not support SIGTSTP
+            previous[signal.SIGTSTP] = signal.signal(signal.SIGTSTP, signal_handler_pause)  # Ctrl+Z
+    except (ValueError, OSError):
+        pass  # Not the main thread, or Windows might not support SIGTSTP
+    return previous
+
+
+def restore_signal_handlers(previous):
+    """Put back the handlers replaced by install_signal_handlers()"""
+    global scan_control
+    for signum, handler in previous.items():
+        signal.signal(signum, handler)
+    scan_control = None
+    signal_requests.put(None)  # Ends the helper thread
+
+
+def print_controls():
+    """Print the keys that stop and pause a scan"""
+    print(f"{Fore.YELLOW}[*] Controls:{Style.RESET_ALL}")
+    print(f"  {Fore.RED}Ctrl+C{Style.RESET_ALL} - Stop scan (probes in flight finish, press again to quit now)")
+    if hasattr(signal, 'SIGTSTP'):
+        print(f"  {Fore.YELLOW}Ctrl+Z{Style.RESET_ALL} - Pause/Resume scan")
+    print()
+
+
+def run_scanner(ip_list=None, checkpoint=None, plan=None):
+    """Run the IP scanner (pass a loaded checkpoint to resume an earlier run)"""
+    plan = plan or ProbePlan()
+    if checkpoint is None:
+        space, excluded = apply_target_lists(TargetSpace.from_specs(ip_list))
+        if excluded:
+            print(f"{Fore.CYAN}[i] Excluded {excluded} IPs on do-not-touch lists{Style.RESET_ALL}")
+        checkpoint = Checkpoint(SCANNER_CHECKPOINT, space, plan.ports)
+        checkpoint.settings = {'mode': 'scanner', 'plan': plan.settings()}
+    else:
+        for record in checkpoint.results:
+            detected_ips.add(ip_to_int(record['ip']))
+    
+    control = ScanControl()
+    handlers = install_signal_handlers(control)
     
     print(f"\n{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
     print(f"{Fore.GREEN}[*] Starting Camera Scanner{Style.RESET_ALL}")
     print(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}\n")
     
-    print(f"{Fore.YELLOW}[*] Controls:{Style.RESET_ALL}")
-    print(f"  {Fore.RED}Ctrl+C{Style.RESET_ALL} - Stop scan immediately")
-    if hasattr(signal, 'SIGTSTP'):
-        print(f"  {Fore.YELLOW}Ctrl+Z{Style.RESET_ALL} - Pause/Resume scan")
-    print()
+    print_controls()
     
-    print(f"{Fore.YELLOW}[*]{Style.RESET_ALL} Starting scan on ports 80 and 8080...")
+    print(f"{Fore.YELLOW}[*]{Style.RESET_ALL} Starting scan: {plan.describe()}...")
     print(f"{Fore.CYAN}[i]{Style.RESET_ALL} Results will be saved to {Fore.GREEN}{CCTV_OUTPUT}{Style.RESET_ALL} (Live Save)\n")
     
-    queue = Queue()
+    # Work units of several targets; bounded so the target generator only
+    # runs a little ahead of the threads
+    queue = Queue(maxsize=THREAD_CONCURRENCY_MAX)
     start_time = time.time()
     
+    # 100 threads was the old fixed count; now it is where the adaptive limit starts
+    controller = ConcurrencyController(100, maximum=THREAD_CONCURRENCY_MAX)
+    rtt = RttEstimator()
+    sizer = ChunkSizer(controller)
+    total_ips = len(checkpoint.space)
+    renderer = ConsoleRenderer(lambda: {'done': total_ips - checkpoint.pending_addresses(), 'total': total_ips,
+                                        'unit': 'IPs', 'hits': len(detected_ips)})
+    renderer.controller = controller
+    
     # Create worker threads
     threads = []
-    for _ in range(100):
-        thread = threading.Thread(target=execute, args=(queue,), daemon=True)
+    scheduler = PlanScheduler(plan, on_skip=checkpoint.probe_done)
+    for _ in range(THREAD_CONCURRENCY_MAX):
+        thread = threading.Thread(target=execute,
+                                  args=(queue, checkpoint, controller, rtt, scheduler, control, sizer, renderer),
+                                  daemon=True)
         thread.start()
         threads.append(thread)
     
     # Enqueue IPs and ports for scanning
     try:
-        total_ips = 0
-        for ip in ip_list:
-                if stop_scan:
-                    break
-                queue.put((ip, 80))
-                queue.put((ip, 8080))
-                total_ips += 1
-        
-        if not stop_scan:
-            print(f"\n{Fore.GREEN}[✓]{Style.RESET_ALL} Queued {total_ips} IPs for scanning")
-            print(f"{Fore.YELLOW}[*]{Style.RESET_ALL} Scanning in progress...\n")
-            
-            # Wait for all tasks to complete or stop signal
-            while not stop_scan and not queue.empty():
-                time.sleep(0.5)
+        print(f"{Fore.YELLOW}[*]{Style.RESET_ALL} Scanning {checkpoint.pending_addresses()} IPs...\n")
+        renderer.start()
+        for chunk in sizer.chunks(control.gate(scheduler.schedule(checkpoint.iter_targets()))):
+            queue.put(chunk)
         
+        # Every thread finishes its probe in flight before taking its sentinel
+        for _ in threads:
+            queue.put(None)
+        for thread in threads:
+            thread.join()
     except KeyboardInterrupt:
-        stop_scan = True
-        print(f"\n\n{Fore.YELLOW}[!]{Style.RESET_ALL} Ctrl+C detected. Stopping...")
+        control.stop()
+        renderer.stop()
+        print(f"\n\n{Fore.YELLOW}[!]{Style.RESET_ALL} Ctrl+C detected again. Quitting without waiting...")
     except Exception as e:
+        control.stop()
+        renderer.stop()
         print(f"\n{Fore.RED}[!]{Style.RESET_ALL} Error: {e}")
+    finally:
+        restore_signal_handlers(handlers)
+        renderer.stop()
+        close_cctv_sink()
     
-    # Mark as stopped
-    stop_scan = True
-    time.sleep(1)  # Give threads time to finish
+    if checkpoint.pending_addresses() == 0:
+        checkpoint.finish()
+    else:
+        checkpoint.save()
+        print(f"{Fore.YELLOW}[*]{Style.RESET_ALL} Progress saved to {checkpoint.path} - run with --resume {checkpoint.path} to continue")
     
     elapsed_time = time.time() - start_time
     print(f"\n{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
-    print(f"{Fore.GREEN}[✓] Scan Complete!{Style.RESET_ALL}")
+    if control.stopped.is_set():
+        print(f"{Fore.YELLOW}[■] Scan Stopped{Style.RESET_ALL}")
+    else:
+        print(f"{Fore.GREEN}[✓] Scan Complete!{Style.RESET_ALL}")
     print(f"{Fore.CYAN}[i]{Style.RESET_ALL} Time taken: {elapsed_time:.2f} seconds")
     print(f"{Fore.CYAN}[i]{Style.RESET_ALL} Cameras found: {len(detected_ips)}")
     print(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}\n")
@@ -620,7 +4524,7 @@ def print_menu():
     print(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}\n")
 
 
-def main():
+def main(metrics=None):
     """Main function"""
     while True:
         try:
@@ -656,7 +4560,7 @@ def main():
                 
             elif choice == '2':
                 # Super Fast Scan
-                super_fast_scan()
+                super_fast_scan(metrics)
                 input(f"\n{Fore.CYAN}Press Enter to continue...{Style.RESET_ALL}")
                 
             elif choice == '3':
@@ -676,9 +4580,188 @@ def main():
             time.sleep(2)
 
 
+def run_headless(args, metrics=None):
+    """Batch scan from the command line: no banner, menu or network discovery"""
+    found = 0
+    
+    def status():
+        with scanner.counts_lock:
+            probes = sum(scanner.counts.values())
+        return {'done': probes, 'total': len(scanner.space) * len(scanner.plan.ports), 'unit': 'probes',
+                'hits': found}
+    
+    try:
+        plan = ProbePlan(args.ports, args.paths, args.stop_on_hit, args.stop_on_refused, follow_up=args.follow_up)
+        # Live status goes to stderr with the summary; stdout carries only
+        # results, so the status line is only redrawn in place when stdout
+        # is not the same terminal
+        renderer = ConsoleRenderer(status, quiet=args.quiet, stream=sys.stderr,
+                                   live=sys.stderr.isatty() and not sys.stdout.isatty())
+        scanner = Scanner(args.targets, engine=args.engine, concurrency=args.concurrency,
+                          connect_timeout=args.connect_timeout, read_timeout=args.read_timeout,
+                          metrics=metrics, plan=plan, renderer=renderer, exclude=args.exclude, include=args.include)
+        if args.sample:
+            plan.dead_blocks = sample_blocks(scanner.space, plan, args.sample_prefix, args.sample_confidence,
+                                             args.sample_density, args.demote_dead, file=sys.stderr, quiet=args.quiet)
+    except (ValueError, OSError) as e:
+        print(f"{Fore.RED}[!] {e}{Style.RESET_ALL}", file=sys.stderr)
+        return 2
+    
+    sink = None
+    if args.output:
+        fmt = args.format or os.path.splitext(args.output)[1].lstrip('.').lower()
+        fmt = {'db': 'sqlite', 'json': 'jsonl'}.get(fmt, fmt)
+        sink = open_sink(fmt if fmt in SINKS else 'txt', args.output)
+    
+    # Results go to stdout as JSON lines, everything else to stderr; Ctrl+C
+    # stops the scan and Ctrl+Z pauses it, as in the menu
+    start_time = time.time()
+    handlers = install_signal_handlers(scanner.control)
+    try:
+        for result in scanner:
+            found += 1
+            print(json.dumps(result), flush=True)
+            if sink is not None:
+                sink.put(result)
+    finally:
+        renderer.stop()
+        restore_signal_handlers(handlers)
+        if sink is not None:
+            sink.close()
+    
+    elapsed = time.time() - start_time
+    probes = sum(scanner.counts.values())
+    print(f"[i] {len(scanner.space)} IPs, {probes} probes, {found} cameras in {elapsed:.2f}s "
+          f"({probes / max(elapsed, 1e-6):.0f} ports/sec)", file=sys.stderr)
+    if scanner.excluded:
+        print(f"[i] Excluded: {scanner.excluded * len(plan.ports)} targets ({scanner.excluded} IPs on do-not-touch "
+              f"lists)", file=sys.stderr)
+    return 0
+
+
+def run_trace(args):
+    """Trace the path to every TARGET at once and print each trace as a JSON line"""
+    try:
+        targets = resolve_trace_targets(args.targets)
+        tracer = PathTracer()
+    except (ValueError, OSError) as e:
+        print(f"{Fore.RED}[!] {e}{Style.RESET_ALL}", file=sys.stderr)
+        return 2
+    
+    start_time = time.time()
+    try:
+        traces = tracer.trace(targets)
+    finally:
+        tracer.close()
+    elapsed = time.time() - start_time
+    
+    for trace in traces.values():
+        print(json.dumps(trace), flush=True)
+    reached = sum(1 for trace in traces.values() if trace['reached'])
+    print(f"[i] {reached}/{len(traces)} targets reached, {tracer.probes} probes in {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(
+        description="IP Range Camera Scanner",
+        epilog="With TARGETs the scan runs headless and prints results as JSON lines; without, the menu starts.")
+    parser.add_argument('targets', nargs='*', metavar='TARGET',
+                        help="IP, CIDR, start-end range or @file with one of those per line")
+    parser.add_argument('-p', '--ports', type=parse_ports, default=','.join(map(str, DEFAULT_PORTS)), metavar='PORTS',
+                        help="ports to probe in this order, e.g. 80,8080,8000-8010; 'camera' adds "
+                             f"{','.join(map(str, CAMERA_PORTS))}, 'https' adds {','.join(map(str, TLS_PORTS))} "
+                             "(probed over TLS) (default: %(default)s)")
+    parser.add_argument('--paths', type=lambda text: [path.strip() for path in text.split(',') if path.strip()],
+                        metavar='PATHS', help="HTTP paths to try in order on each open port (default: /)")
+    parser.add_argument('--exclude', action='append', default=[], metavar='FILE',
+                        help="never probe the IPs, CIDRs and ranges listed in FILE (repeatable; "
+                             f"{EXCLUDE_FILE} is always applied when it exists)")
+    parser.add_argument('--include', action='append', default=[], metavar='FILE',
+                        help="only probe TARGET addresses that are also listed in FILE (repeatable)")
+    parser.add_argument('--trace', action='store_true',
+                        help="trace the path to each TARGET (hostnames allowed) instead of scanning")
+    parser.add_argument('--follow-up', action='store_true',
+                        help="confirm model and firmware with the signature's follow-up paths, pipelined on the "
+                             "same keep-alive connection")
+    parser.add_argument('--all-ports', dest='stop_on_hit', action='store_false',
+                        help="keep probing a host's other ports after a camera is found")
+    parser.add_argument('--stop-on-refused', action='store_true',
+                        help="stop probing a host after its first refused port")
+    parser.add_argument('--sample', action='store_true',
+                        help="probe a sample of every block first and skip blocks where nothing answers")
+    parser.add_argument('--sample-prefix', type=int, default=SAMPLE_PREFIX, metavar='BITS',
+                        help="block size for --sample, as a prefix length (default: %(default)s)")
+    parser.add_argument('--sample-confidence', type=float, default=SAMPLE_CONFIDENCE, metavar='P',
+                        help="chance of keeping a block where --sample-density of addresses answer "
+                             "(default: %(default)s)")
+    parser.add_argument('--sample-density', type=float, default=SAMPLE_DENSITY, metavar='FRACTION',
+                        help="smallest fraction of answering addresses --sample must not miss (default: %(default)s)")
+    parser.add_argument('--demote-dead', action='store_true',
+                        help="probe dead blocks after everything else instead of skipping them")
+    parser.add_argument('-e', '--engine', choices=['asyncio', 'threads'], default='asyncio',
+                        help="probe engine (default: %(default)s)")
+    parser.add_argument('-c', '--concurrency', type=int, metavar='N',
+                        help=f"maximum probes in flight (default: {ASYNC_CONCURRENCY} asyncio, "
+                             f"{THREAD_CONCURRENCY_MAX} threads)")
+    parser.add_argument('--connect-timeout', type=float, default=INITIAL_RTO, metavar='SECONDS',
+                        help="connect timeout until a subnet's RTT is measured (default: %(default)s)")
+    parser.add_argument('--read-timeout', type=float, default=READ_TIMEOUT, metavar='SECONDS',
+                        help="banner read timeout until a subnet's RTT is measured (default: %(default)s)")
+    parser.add_argument('-o', '--output', metavar='PATH', help="also write results to this file")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="no live status line or per-camera lines while scanning, only results and the summary")
+    parser.add_argument('-f', '--format', choices=sorted(SINKS),
+                        help="output file format (default: from the file extension, else txt)")
+    parser.add_argument('--resume', nargs='?', const=FAST_CHECKPOINT, metavar='CHECKPOINT',
+                        help=f"continue an interrupted scan from its checkpoint (default: {FAST_CHECKPOINT})")
+    parser.add_argument('--worker', metavar='HOST:PORT',
+                        help="scan shards leased from a coordinator (Super Fast Scan engine 4)")
+    parser.add_argument('--token', default=os.environ.get(COORDINATOR_TOKEN_ENV), metavar='TOKEN',
+                        help=f"shared token printed by the coordinator (default: ${COORDINATOR_TOKEN_ENV})")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="serve Prometheus metrics at http://HOST:PORT/metrics while scanning")
+    parser.add_argument('--metrics-host', default='127.0.0.1', metavar='HOST',
+                        help="address for the metrics endpoint (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if not 0 <= args.sample_prefix <= 32:
+        parser.error("--sample-prefix must be between 0 and 32")
+    if not 0 < args.sample_confidence < 1:
+        parser.error("--sample-confidence must be between 0 and 1")
+    if not 0 < args.sample_density <= 1:
+        parser.error("--sample-density must be above 0 and at most 1")
+    return args
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    metrics = None
     try:
-        main()
+        if args.metrics_port is not None:
+            metrics = Metrics()
+            host, port = metrics.serve(args.metrics_port, args.metrics_host)
+            print(f"[i] Metrics at http://{host}:{port}/metrics", file=sys.stderr)
+        
+        if args.targets and args.trace:
+            sys.exit(run_trace(args))
+        elif args.targets:
+            sys.exit(run_headless(args, metrics))
+        elif args.worker:
+            if not args.token:
+                print(f"{Fore.RED}[!] --worker needs the coordinator's --token (or ${COORDINATOR_TOKEN_ENV})"
+                      f"{Style.RESET_ALL}", file=sys.stderr)
+                sys.exit(2)
+            control = ScanControl()
+            handlers = install_signal_handlers(control)
+            try:
+                run_worker(parse_address(args.worker), args.token, metrics=metrics, control=control)
+            finally:
+                restore_signal_handlers(handlers)
+        elif args.resume:
+            resume_scan(args.resume, metrics, args.quiet)
+        else:
+            main(metrics)
     except KeyboardInterrupt:
         print(f"\n\n{Fore.YELLOW}[!] Interrupted by user{Style.RESET_ALL}")
         sys.exit(0)
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark harness for CameraScanner
+Description: Scans a fleet of fake cameras on loopback addresses with every
+engine and reports throughput, probe latency, peak memory and detection
+accuracy as JSON, so performance changes can be tracked between commits.
+License: MIT
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import CameraScanner
+from CameraScanner import Checkpoint, Metrics, Scanner, TargetSpace, int_to_ip, ip_to_int, sharded_scan
+
+# The fleet lives on 127.77.0.0/16 (all of 127/8 is loopback on Linux)
+FLEET_BASE = "127.77.0.1"
+FLEET_PORT = 18000
+CLOSED_PORT = 18001  # Probed on every host, never listened on
+DEFAULT_HOSTS = 2000
+ENGINES = ['threads', 'asyncio', 'processes']
+
+# Every host gets one persona; the mix repeats every 20 hosts
+PERSONA_MIX = [
+    ('dahua', 2),      # "WEB SERVICE" page
+    ('hikvision', 2),  # 302 redirect to /doc/page/login.asp
+    ('slowdrip', 1),   # DVR page sent a few bytes at a time
+    ('oversized', 1),  # Ordinary page with a 1 MB body
+    ('web', 4),        # Ordinary web server
+    ('closed', 8),     # Nothing listening: connection refused
+    ('blackhole', 2),  # Full accept queue: SYNs are dropped, connect times out
+]
+PERSONAS = [name for name, weight in PERSONA_MIX for _ in range(weight)]
+
+EXPECTED = {
+    'dahua': 'Camera - WEB SERVICE',
+    'hikvision': 'Camera - HIK Vision',
+    'slowdrip': 'Camera - DVR',
+}
+
+SLOW_DRIP_BYTES = 8
+SLOW_DRIP_DELAY = 0.05
+OVERSIZED_BYTES = 1024 * 1024
+
+RESPONSES = {
+    'dahua': (b"HTTP/1.1 200 OK\r\nServer: Webs\r\nContent-Type: text/html\r\n\r\n"
+              b"<html><head><title>WEB SERVICE</title></head><body></body></html>"),
+    'hikvision': (b"HTTP/1.1 302 Found\r\nServer: App-webs/\r\nLocation: /doc/page/login.asp\r\n"
+                  b"Content-Length: 0\r\n\r\n"),
+    'slowdrip': (b"HTTP/1.1 200 OK\r\nServer: thttpd\r\nContent-Type: text/html\r\n\r\n"
+                 b"<html><head><title>Network DVR</title></head></html>"),
+    'oversized': (b"HTTP/1.1 200 OK\r\nServer: Apache\r\nContent-Type: text/html\r\n\r\n"
+                  b"<html><head><title>Apache2 Default Page</title></head><body>"
+                  + b"x" * OVERSIZED_BYTES + b"</body></html>"),
+    'web': (b"HTTP/1.1 200 OK\r\nServer: nginx\r\nContent-Type: text/html\r\n\r\n"
+            b"<html><head><title>Welcome to nginx!</title></head></html>"),
+}
+
+
+def persona_at(index):
+    return PERSONAS[index % len(PERSONAS)]
+
+
+def fleet_space(hosts):
+    first = ip_to_int(FLEET_BASE)
+    return TargetSpace([(first, first + hosts - 1)])
+
+
+async def handle(persona, reader, writer):
+    """Answer one connection the way the persona's device would"""
+    try:
+        await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+        response = RESPONSES[persona]
+        if persona == 'slowdrip':
+            for offset in range(0, len(response), SLOW_DRIP_BYTES):
+                writer.write(response[offset:offset + SLOW_DRIP_BYTES])
+                await writer.drain()
+                await asyncio.sleep(SLOW_DRIP_DELAY)
+        else:
+            writer.write(response)
+            await writer.drain()
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_fleet(hosts, ready):
+    blackholes = []
+    space = fleet_space(hosts)
+    for index, ip_int in enumerate(space.iter_addresses()):
+        persona = persona_at(index)
+        ip = int_to_ip(ip_int)
+        if persona == 'closed':
+            continue
+        if persona == 'blackhole':
+            # A listener that never accepts, with its one queue slot taken
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind((ip, FLEET_PORT))
+            sock.listen(0)
+            filler = socket.create_connection((ip, FLEET_PORT), timeout=1)
+            blackholes.append((sock, filler))
+            continue
+        await asyncio.start_server(lambda r, w, p=persona: handle(p, r, w), ip, FLEET_PORT, backlog=64)
+    ready.set()
+    await asyncio.Event().wait()
+
+
+def fleet_process(hosts, ready):
+    """Process entry point: serve the fleet until terminated"""
+    CameraScanner.raise_file_limit(hosts * 4 + 4096)
+    asyncio.run(serve_fleet(hosts, ready))
+
+
+class TimedScanner(Scanner):
+    """Scanner that records every probe's time from dispatch to completion"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started = {}
+        self.latencies = []
+    
+    def targets(self):
+        for target in super().targets():
+            self.started[target] = time.perf_counter()
+            yield target
+    
+    def probe_done(self, ip_int, port, outcome):
+        finished = time.perf_counter()
+        super().probe_done(ip_int, port, outcome)
+        started = self.started.pop((ip_int, port), None)
+        if started is not None:  # Targets skipped by the probe plan were never dispatched
+            with self.counts_lock:
+                self.latencies.append(finished - started)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and its finished children"""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(fraction * len(values)))], 6)
+
+
+def score(found, hosts):
+    """Compare detected camera types with what the fleet actually serves"""
+    expected = {}
+    for index, ip_int in enumerate(fleet_space(hosts).iter_addresses()):
+        persona = persona_at(index)
+        if persona in EXPECTED:
+            expected[(int_to_ip(ip_int), FLEET_PORT)] = EXPECTED[persona]
+    
+    correct = sum(1 for key, camera_type in expected.items() if found.get(key) == camera_type)
+    wrong_type = sum(1 for key, camera_type in expected.items() if key in found and found[key] != camera_type)
+    false_positives = sum(1 for key in found if key not in expected)
+    targets = hosts * 2
+    return {
+        'cameras_expected': len(expected),
+        'cameras_found': correct,
+        'missed': len(expected) - correct - wrong_type,
+        'wrong_type': wrong_type,
+        'false_positives': false_positives,
+        'accuracy': round((targets - len(expected) + correct - false_positives) / targets, 6),
+    }
+
+
+def run_engine(engine, hosts, concurrency, report):
+    """Child process entry point: scan the fleet with one engine and send back its numbers"""
+    space = fleet_space(hosts)
+    ports = [FLEET_PORT, CLOSED_PORT]
+    found = {}
+    
+    def on_result(result):
+        found[(result['ip'], result['port'])] = result['type']
+    
+    latencies = None
+    metrics = None
+    # The engines print progress for interactive use; keep stdout for the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        if engine == 'processes':
+            checkpoint = Checkpoint(os.devnull, space, ports, interval=float('inf'))
+            _, counts = sharded_scan(checkpoint, on_result)
+        else:
+            metrics = Metrics()
+            scanner = TimedScanner(space, ports, engine, concurrency, metrics=metrics)
+            scanner.run(on_result)
+            counts = scanner.counts
+            latencies = sorted(scanner.latencies)
+        elapsed = time.perf_counter() - start
+    
+    probes = sum(counts.values())
+    stats = {
+        'engine': engine,
+        'probes': probes,
+        'elapsed': round(elapsed, 3),
+        'probes_per_sec': round(probes / elapsed, 1),
+        'latency_p50': percentile(latencies, 0.50),
+        'latency_p99': percentile(latencies, 0.99),
+        'peak_rss_mb': peak_rss_mb(),
+        'outcomes': dict(counts),
+    }
+    stats.update(score(found, hosts))
+    if metrics is not None:
+        # Per-stage latency shows whether connects or banner reads dominate
+        stats['stages'] = metrics.snapshot()['histograms']
+    report.put(stats)
+
+
+def benchmark(hosts=DEFAULT_HOSTS, engines=ENGINES, concurrency=None):
+    """Start the fleet, scan it once per engine (each in a fresh process) and return the report"""
+    # Fresh interpreters so each engine's peak RSS is its own
+    context = multiprocessing.get_context('spawn')
+    ready = context.Event()
+    fleet = context.Process(target=fleet_process, args=(hosts, ready), daemon=True)
+    fleet.start()
+    try:
+        if not ready.wait(120):
+            raise RuntimeError("fleet did not start")
+        runs = []
+        for engine in engines:
+            print(f"[*] {engine}: scanning {hosts} hosts...", file=sys.stderr)
+            report = context.Queue()
+            child = context.Process(target=run_engine, args=(engine, hosts, concurrency, report))
+            child.start()
+            stats = report.get()
+            child.join()
+            print(f"[i] {engine}: {stats['probes_per_sec']} probes/sec, accuracy {stats['accuracy']}",
+                  file=sys.stderr)
+            runs.append(stats)
+    finally:
+        fleet.terminate()
+        fleet.join()
+    
+    mix = {}
+    for index in range(hosts):
+        persona = persona_at(index)
+        mix[persona] = mix.get(persona, 0) + 1
+    return {
+        'hosts': hosts,
+        'ports': [FLEET_PORT, CLOSED_PORT],
+        'personas': mix,
+        'cpu_count': multiprocessing.cpu_count(),
+        'python': sys.version.split()[0],
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'runs': runs,
+    }
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the scan engines against a loopback camera fleet")
+    parser.add_argument('--hosts', type=int, default=DEFAULT_HOSTS,
+                        help="number of fake hosts (default: %(default)s)")
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help="comma-separated engines to run (default: %(default)s)")
+    parser.add_argument('-c', '--concurrency', type=int, metavar='N',
+                        help="maximum probes in flight for the threads and asyncio engines")
+    parser.add_argument('-o', '--output', metavar='PATH', help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    args.engines = [engine.strip() for engine in args.engines.split(',') if engine.strip()]
+    for engine in args.engines:
+        if engine not in ENGINES:
+            parser.error(f"unknown engine {engine!r} (choose from {', '.join(ENGINES)})")
+    if not 0 < args.hosts <= 65534:
+        parser.error("--hosts must be between 1 and 65534")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = benchmark(args.hosts, args.engines, args.concurrency)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
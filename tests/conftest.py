@@ -0,0 +1,62 @@
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+# CameraScanner is a script, not a package: import it from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def read_request(conn):
+    """Read one request head from a connection"""
+    data = b''
+    while b'\r\n\r\n' not in data:
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+@pytest.fixture
+def serve():
+    """Start loopback TCP servers that run `handler(conn)` for every connection; returns the port"""
+    listeners = []
+    
+    def start(handler):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.settimeout(None)  # CameraScanner sets a short default timeout
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(64)
+        listeners.append(listener)
+        
+        def handle(conn):
+            conn.settimeout(None)
+            try:
+                handler(conn)
+            except OSError:
+                pass
+            finally:
+                conn.close()
+        
+        def accept():
+            while True:
+                try:
+                    conn, _ = listener.accept()
+                except OSError:
+                    return
+                threading.Thread(target=handle, args=(conn,), daemon=True).start()
+        
+        threading.Thread(target=accept, daemon=True).start()
+        return listener.getsockname()[1]
+    
+    yield start
+    for listener in listeners:
+        try:
+            listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        listener.close()
@@ -0,0 +1,84 @@
+import os
+import threading
+
+from CameraScanner import Checkpoint, TargetSpace, ip_to_int
+
+
+def checkpoint(tmp_path, addresses=10, ports=(80,), shard_size=4, interval=3600):
+    first = ip_to_int('10.0.0.0')
+    space = TargetSpace([(first, first + addresses - 1)])
+    return Checkpoint(str(tmp_path / 'scan.json'), space, ports, shard_size=shard_size, interval=interval)
+
+
+def finish_shard(state, shard):
+    for ip_int in state.space.iter_addresses(shard * state.shard_size, (shard + 1) * state.shard_size):
+        for port in state.ports:
+            state.probe_done(ip_int, port)
+
+
+def test_watermark_waits_for_out_of_order_shards(tmp_path):
+    state = checkpoint(tmp_path)
+    finish_shard(state, 1)
+    assert (state.watermark, state.completed) == (0, {1})
+    assert state.pending_shards() == [(0, 0), (2, 2)]
+    finish_shard(state, 0)
+    assert (state.watermark, state.completed) == (2, set())
+    assert state.pending_shards() == [(2, 2)]
+
+
+def test_shard_completes_after_every_port(tmp_path):
+    state = checkpoint(tmp_path, ports=(80, 8080))
+    for ip_int in state.space.iter_addresses(0, 4):
+        state.probe_done(ip_int, 80)
+    assert state.watermark == 0
+    for ip_int in state.space.iter_addresses(0, 4):
+        state.probe_done(ip_int, 8080)
+    assert state.watermark == 1
+
+
+def test_pending_addresses_counts_the_short_last_shard(tmp_path):
+    state = checkpoint(tmp_path)
+    assert state.pending_addresses() == 10
+    finish_shard(state, 2)
+    assert state.pending_addresses() == 8
+    finish_shard(state, 0)
+    assert state.pending_addresses() == 4
+    finish_shard(state, 1)
+    assert state.pending_addresses() == 0
+
+
+def test_resume_skips_finished_shards(tmp_path):
+    state = checkpoint(tmp_path)
+    finish_shard(state, 0)
+    finish_shard(state, 2)
+    state.add_result({'ip': '10.0.0.1', 'port': 80, 'title': 't', 'server': 's', 'url': 'u', 'type': 'Camera'})
+    state.save()
+    resumed = Checkpoint.load(state.path)
+    assert [ip_int for ip_int, port in resumed.iter_targets()] == list(state.space.iter_addresses(4, 8))
+    assert [r['ip'] for r in resumed.results] == ['10.0.0.1']
+
+
+def test_periodic_save_runs_off_the_probe_thread(tmp_path):
+    state = checkpoint(tmp_path, interval=0)
+    saved = threading.Event()
+    writers = []
+    write = state._write
+    
+    def record():
+        writers.append(threading.current_thread())
+        write()
+        saved.set()
+    
+    state._write = record
+    state.probe_done(ip_to_int('10.0.0.0'), 80)
+    assert saved.wait(5)
+    assert writers[0] is not threading.current_thread()
+    assert os.path.exists(state.path)
+
+
+def test_finish_removes_the_file_for_good(tmp_path):
+    state = checkpoint(tmp_path)
+    state.save()
+    state.finish()
+    state.save()
+    assert not os.path.exists(state.path)
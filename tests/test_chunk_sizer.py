@@ -0,0 +1,54 @@
+import CameraScanner
+from CameraScanner import CHUNK_MAX, CHUNK_START, ChunkSizer, ConcurrencyController, ip_to_int, thread_scan
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def monotonic(self):
+        return self.now
+
+
+def test_chunks_cover_every_target_in_order():
+    sizer = ChunkSizer(ConcurrencyController(10, minimum=1, maximum=10))
+    chunks = list(sizer.chunks(iter(range(20))))
+    assert [len(chunk) for chunk in chunks] == [CHUNK_START, CHUNK_START, 20 - 2 * CHUNK_START]
+    assert [target for chunk in chunks for target in chunk] == list(range(20))
+
+
+def test_unit_size_follows_the_probe_rate(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(CameraScanner.time, 'monotonic', clock.monotonic)
+    sizer = ChunkSizer(ConcurrencyController(10, minimum=10, maximum=10))
+    chunks = sizer.chunks(iter(range(10000)))
+    next(chunks)
+    # 4000 probes/sec over 10 workers is 400/sec each; a unit should last CHUNK_SECONDS
+    sizer.chunk_done(2000)
+    clock.now = 0.5
+    next(chunks)
+    assert sizer.size == 100
+    sizer.chunk_done(1)
+    clock.now = 1.0
+    next(chunks)
+    assert sizer.size == 1
+
+
+def test_unit_size_is_capped(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(CameraScanner.time, 'monotonic', clock.monotonic)
+    sizer = ChunkSizer(ConcurrencyController(1, minimum=1, maximum=1))
+    chunks = sizer.chunks(iter(range(10000)))
+    next(chunks)
+    sizer.chunk_done(100000)
+    clock.now = 1.0
+    next(chunks)
+    assert sizer.size == CHUNK_MAX
+
+
+def test_thread_engine_probes_every_target_once():
+    done = []
+    targets = [(ip_to_int('127.0.0.1') + i, 1) for i in range(50)]
+    thread_scan(iter(targets), lambda result: None, on_probe_done=lambda ip_int, port, outcome: done.append(ip_int),
+                max_threads=4)
+    assert sorted(done) == [ip_int for ip_int, _ in targets]
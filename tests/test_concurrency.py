@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+from CameraScanner import OUTCOME_OPEN, OUTCOME_RESOURCE, OUTCOME_TIMEOUT, ConcurrencyController
+
+
+def window(controller, outcome=OUTCOME_OPEN, latency=0.01):
+    for _ in range(max(10, int(controller.limit))):
+        controller.record(outcome, latency if outcome == OUTCOME_OPEN else None)
+
+
+def test_limit_grows_while_the_network_keeps_up():
+    controller = ConcurrencyController(20, minimum=10, maximum=30)
+    window(controller)
+    assert controller.limit == 22
+    for _ in range(10):
+        window(controller)
+    assert controller.limit == 30
+
+
+def test_resource_errors_halve_the_limit_at_once():
+    controller = ConcurrencyController(100, minimum=10, maximum=200)
+    controller.record(OUTCOME_RESOURCE)
+    assert controller.limit == 50
+    for _ in range(5):
+        controller.record(OUTCOME_RESOURCE)
+    assert controller.limit == 10
+
+
+def test_timeout_spike_above_the_baseline_backs_off():
+    controller = ConcurrencyController(20, minimum=10, maximum=100)
+    window(controller)
+    limit = controller.limit
+    window(controller, OUTCOME_TIMEOUT)
+    assert controller.limit == limit / 2
+
+
+def test_steady_timeouts_from_dead_space_do_not_back_off():
+    controller = ConcurrencyController(20, minimum=10, maximum=100)
+    for _ in range(3):
+        for i in range(int(controller.limit)):
+            controller.record(OUTCOME_TIMEOUT if i % 2 else OUTCOME_OPEN, None if i % 2 else 0.01)
+    assert controller.limit > 20
+
+
+def test_latency_spike_backs_off():
+    controller = ConcurrencyController(20, minimum=10, maximum=100)
+    window(controller, latency=0.01)
+    limit = controller.limit
+    window(controller, latency=0.1)
+    assert controller.limit == limit / 2
+
+
+def test_acquire_blocks_at_the_limit_until_release():
+    controller = ConcurrencyController(1, minimum=1, maximum=1)
+    controller.acquire()
+    assert not controller.try_acquire()
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (controller.acquire(), acquired.set()))
+    thread.start()
+    assert not acquired.wait(0.05)
+    controller.release()
+    assert acquired.wait(5)
+    thread.join()
+    assert controller.in_flight == 1
+
+
+def test_async_waiters_wake_on_release():
+    controller = ConcurrencyController(1, minimum=1, maximum=1)
+    
+    async def run():
+        await controller.acquire_async()
+        waiter = asyncio.ensure_future(controller.acquire_async())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        controller.release()
+        await asyncio.wait_for(waiter, 5)
+    
+    asyncio.run(run())
+    assert controller.in_flight == 1
@@ -0,0 +1,43 @@
+import io
+
+from CameraScanner import ConsoleRenderer, ProbePlan, TargetSpace, ip_to_int, sample_blocks, thread_scan
+
+
+def test_queued_lines_are_written_by_the_renderer_thread():
+    stream = io.StringIO()
+    renderer = ConsoleRenderer(stream=stream, interval=0.01, live=False).start()
+    renderer.print("[✓] 10.0.0.1:80 - camera")
+    renderer.print("[✓] 10.0.0.2:80 - camera")
+    renderer.stop()
+    assert stream.getvalue() == "[✓] 10.0.0.1:80 - camera\n[✓] 10.0.0.2:80 - camera\n"
+
+
+def test_status_line_reports_progress_and_rate():
+    renderer = ConsoleRenderer(lambda: {'done': 50, 'total': 200, 'unit': 'IPs', 'hits': 3}, stream=io.StringIO())
+    line = renderer._status_line()
+    assert line.startswith("[i] 50/200 IPs (25.0%)")
+    assert "3 cameras" in line
+
+
+def test_quiet_renderer_writes_nothing():
+    stream = io.StringIO()
+    renderer = ConsoleRenderer(lambda: {'done': 0, 'total': 1, 'unit': 'IPs', 'hits': 0}, quiet=True, stream=stream,
+                               interval=0.01, live=False).start()
+    renderer.print("hidden")
+    renderer.stop()
+    assert stream.getvalue() == ""
+
+
+def test_quiet_scan_prints_nothing(capsys):
+    renderer = ConsoleRenderer(lambda: {'done': 0, 'total': 1, 'unit': 'IPs', 'hits': 0}, quiet=True)
+    thread_scan(iter([(ip_to_int('127.0.0.1'), 1)]), lambda result: None, max_threads=2, renderer=renderer)
+    renderer.stop()
+    assert capsys.readouterr().out == ""
+
+
+def test_quiet_sampling_prints_nothing(capsys):
+    stream = io.StringIO()
+    dead = sample_blocks(TargetSpace.from_specs(['127.0.0.1-127.0.0.4']), ProbePlan([1]), file=stream, quiet=True)
+    assert not dead
+    assert stream.getvalue() == ""
+    assert capsys.readouterr().out == ""
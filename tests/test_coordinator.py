@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from CameraScanner import (COORDINATOR_HOST, Checkpoint, Coordinator, CoordinatorClient, CoordinatorServer,
+                           TargetSpace, ip_to_int, parse_address)
+
+
+@pytest.fixture
+def coordinator(tmp_path):
+    first = ip_to_int('10.0.0.0')
+    checkpoint = Checkpoint(str(tmp_path / 'scan.json'), TargetSpace([(first, first + 511)]), [80], shard_size=256)
+    coordinator = Coordinator(checkpoint, lambda result: None, token='secret')
+    server = CoordinatorServer(('127.0.0.1', 0), coordinator)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield coordinator, server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+def test_default_address_is_loopback():
+    assert COORDINATOR_HOST == '127.0.0.1'
+    assert parse_address('7878') == ('127.0.0.1', 7878)
+    assert parse_address('0.0.0.0:9000') == ('0.0.0.0', 9000)
+
+
+def test_worker_with_the_token_gets_shards(coordinator):
+    coordinator, address = coordinator
+    client = CoordinatorClient(address, 'w1', 'secret')
+    try:
+        assert client.call({'op': 'hello'})['shard_size'] == 256
+        assert client.call({'op': 'lease'}) == {'shard': 0}
+    finally:
+        client.close()
+
+
+@pytest.mark.parametrize('token', [None, '', 'wrong'])
+def test_requests_without_the_token_are_refused(coordinator, token):
+    coordinator, address = coordinator
+    client = CoordinatorClient(address, 'intruder', token)
+    try:
+        with pytest.raises(ValueError, match='invalid token'):
+            client.call({'op': 'lease'})
+    finally:
+        client.close()
+    assert not coordinator.leases
+    assert 'intruder' not in coordinator.workers
+
+
+def test_each_run_gets_its_own_token(tmp_path, monkeypatch):
+    monkeypatch.delenv('CAMERASCANNER_TOKEN', raising=False)
+    checkpoint = Checkpoint(str(tmp_path / 'scan.json'), TargetSpace([(1, 1)]), [80])
+    first = Coordinator(checkpoint, lambda result: None).token
+    second = Coordinator(checkpoint, lambda result: None).token
+    assert first and second and first != second
+    monkeypatch.setenv('CAMERASCANNER_TOKEN', 'fixed')
+    assert Coordinator(checkpoint, lambda result: None).token == 'fixed'
@@ -0,0 +1,58 @@
+import ipaddress
+
+from CameraScanner import (OUTCOME_DEAD, DeadBlocks, PlanScheduler, ProbePlan, TargetSpace, ip_to_int, iter_blocks,
+                           iter_probe_targets, sample_addresses, sample_blocks, sample_size)
+
+from conftest import read_request
+
+
+def test_sample_size_follows_confidence_and_density():
+    # 1 - 0.9 ** 29 >= 0.95 but 1 - 0.9 ** 28 is not
+    assert sample_size(256, 0.95, 0.1) == 29
+    assert sample_size(256, 0.99, 0.5) == 7
+    assert sample_size(10, 0.95, 0.1) == 10
+    assert sample_size(256, 0.95, 1.0) == 1
+
+
+def test_blocks_are_clipped_to_the_space():
+    space = TargetSpace.from_specs(['10.0.0.250-10.0.1.5', '10.0.3.0/25'])
+    blocks = [(block, parts) for block, parts in iter_blocks(space, 24)]
+    assert [block for block, _ in blocks] == [ip_to_int('10.0.0.0') >> 8, ip_to_int('10.0.1.0') >> 8,
+                                              ip_to_int('10.0.3.0') >> 8]
+    assert blocks[1][1] == [(ip_to_int('10.0.1.0'), ip_to_int('10.0.1.5'))]
+
+
+def test_samples_are_spread_over_the_block():
+    first = ip_to_int('10.0.0.0')
+    picks = sample_addresses([(first, first + 255)], 4)
+    assert [ip_int - first for ip_int in picks] == [32, 96, 160, 224]
+
+
+def test_dead_blocks_round_trip_through_settings():
+    dead = DeadBlocks(24, [ip_to_int('10.0.0.0') >> 8, ip_to_int('10.0.1.0') >> 8, ip_to_int('10.0.5.0') >> 8])
+    assert ip_to_int('10.0.1.77') in dead
+    assert ip_to_int('10.0.2.1') not in dead
+    assert list(dead.networks()) == [ipaddress.IPv4Network('10.0.0.0/23'), ipaddress.IPv4Network('10.0.5.0/24')]
+    restored = DeadBlocks.from_settings(dead.settings())
+    assert restored.blocks == dead.blocks
+
+
+def test_dead_blocks_are_skipped_or_probed_last():
+    space = TargetSpace.from_specs(['10.0.0.1-10.0.0.2', '10.0.1.1-10.0.1.2'])
+    targets = list(iter_probe_targets(space, [80]))
+    dead = ip_to_int('10.0.0.0') >> 8
+    skipped = []
+    scheduler = PlanScheduler(ProbePlan([80], stop_on_hit=False, dead_blocks=DeadBlocks(24, [dead])),
+                              on_skip=lambda ip_int, port, outcome: skipped.append((ip_int, outcome)))
+    assert list(scheduler.schedule(iter(targets))) == targets[2:]
+    assert skipped == [(targets[0][0], OUTCOME_DEAD), (targets[1][0], OUTCOME_DEAD)]
+    
+    scheduler = PlanScheduler(ProbePlan([80], stop_on_hit=False, dead_blocks=DeadBlocks(24, [dead], demote=True)))
+    assert list(scheduler.schedule(iter(targets))) == targets[2:] + targets[:2]
+
+
+def test_sampling_keeps_blocks_that_answer(serve):
+    port = serve(read_request)
+    # Loopback addresses either accept or refuse, and both prove the block is alive
+    dead = sample_blocks(TargetSpace.from_specs(['127.0.0.1-127.0.0.4']), ProbePlan([port]), quiet=True)
+    assert len(dead) == 0
@@ -0,0 +1,86 @@
+import sqlite3
+import time
+
+from CameraScanner import HostCache, TargetSpace, ip_to_int
+
+CAMERA = ip_to_int('10.0.0.1')
+WEB = ip_to_int('10.0.0.2')
+SILENT = ip_to_int('10.0.0.3')
+SPACE = TargetSpace([(CAMERA, SILENT)])
+
+
+def result(ip_int, title='WEB SERVICE'):
+    return {'ip': f'10.0.0.{ip_int & 0xFF}', 'port': 80, 'title': title, 'server': 'Webs',
+            'url': f'http://10.0.0.{ip_int & 0xFF}', 'type': 'Camera - WEB SERVICE'}
+
+
+def first_run(path):
+    cache = HostCache(path)
+    cache.load(SPACE, [80, 8080])
+    cache.add_result(CAMERA, result(CAMERA))
+    cache.probe_done(CAMERA, 80, 'camera')
+    cache.probe_done(WEB, 80, 'web')
+    cache.probe_done(SILENT, 80, 'timeout')
+    cache.close()
+
+
+def test_known_hosts_are_skipped_and_cameras_reverified(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first_run(path)
+    cache = HostCache(path)
+    cache.load(SPACE, [80, 8080])
+    skipped = []
+    targets = [(ip_int, port) for ip_int in (CAMERA, WEB, SILENT) for port in (80, 8080)]
+    kept = list(cache.filter_targets(targets, lambda ip_int, port, outcome: skipped.append((ip_int, port))))
+    # The camera is only re-checked on its own port; silent hosts are never cached
+    assert kept == [(CAMERA, 80), (WEB, 8080), (SILENT, 80), (SILENT, 8080)]
+    assert skipped == [(CAMERA, 8080), (WEB, 80)]
+    cache.close()
+
+
+def test_diff_reports_new_changed_and_gone(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first_run(path)
+    cache = HostCache(path)
+    cache.load(SPACE, [80])
+    list(cache.filter_targets([(CAMERA, 80)]))
+    cache.add_result(WEB, result(WEB))
+    new, changed, gone = cache.diff()
+    assert [entry[:2] for entry in new] == [(WEB, 80)]
+    assert changed == []
+    assert [entry[:2] for entry in gone] == [(CAMERA, 80)]
+    cache.close(gone)
+    
+    cache = HostCache(path)
+    cache.load(SPACE, [80])
+    assert list(cache.cameras) == [(WEB, 80)]
+    cache.close()
+
+
+def test_changed_fingerprints_are_reported(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first_run(path)
+    cache = HostCache(path)
+    cache.load(SPACE, [80])
+    list(cache.filter_targets([(CAMERA, 80)]))
+    cache.add_result(CAMERA, result(CAMERA, title='Login'))
+    new, changed, gone = cache.diff()
+    assert (new, gone) == ([], [])
+    assert changed == [(CAMERA, 80, 'Camera - WEB SERVICE', 'WEB SERVICE', 'Webs',
+                        'Camera - WEB SERVICE', 'Login', 'Webs')]
+    cache.close()
+
+
+def test_expired_entries_are_evicted(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first_run(path)
+    db = sqlite3.connect(path)
+    with db:
+        db.execute("UPDATE hosts SET last_seen = ? WHERE ip = ?", (time.time() - 3600, WEB))
+    db.close()
+    cache = HostCache(path, ttl=60)
+    assert cache.evicted == 1
+    cache.load(SPACE, [80])
+    assert cache.answered == set()
+    assert list(cache.cameras) == [(CAMERA, 80)]
+    cache.close()
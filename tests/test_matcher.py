@@ -0,0 +1,75 @@
+from CameraScanner import SignatureMatcher, load_signatures
+
+RULES = [
+    {'type': 'Camera - Branded', 'vendor': 'Acme', 'header': {'Server': ['acme-httpd']}, 'status': [200]},
+    {'type': 'Camera - Login', 'title': ['login']},
+    {'type': 'Camera - Player', 'body': ['NetVideoPlayer']},
+    {'type': 'Camera - TLS', 'cert': ['o=acme']},
+]
+
+
+def response(title='', server='nginx', body='', status='200 OK'):
+    return (f"HTTP/1.1 {status}\r\nServer: {server}\r\n\r\n<html><head><title>{title}</title></head>"
+            f"<body>{body}</body></html>").encode('utf-8')
+
+
+def test_first_matching_rule_wins():
+    matcher = SignatureMatcher(RULES)
+    fingerprint = matcher.match(response('User Login', server='ACME-httpd/2.0'))
+    assert (fingerprint['type'], fingerprint['vendor']) == ('Camera - Branded', 'Acme')
+    assert fingerprint['title'] == 'User Login'
+    assert fingerprint['server'] == 'ACME-httpd/2.0'
+
+
+def test_every_field_of_a_rule_must_match():
+    matcher = SignatureMatcher(RULES)
+    # The header matches but the status does not, so the next rule decides
+    assert matcher.match(response('Login', server='acme-httpd', status='401 Unauthorized'))['type'] == 'Camera - Login'
+
+
+def test_titles_are_case_insensitive_and_bodies_are_not():
+    matcher = SignatureMatcher(RULES)
+    assert matcher.match(response('SYSTEM LOGIN'))['type'] == 'Camera - Login'
+    assert matcher.match(response('Home', body='<object id="NetVideoPlayer">'))['type'] == 'Camera - Player'
+    assert matcher.match(response('Home', body='<object id="netvideoplayer">'))['type'] is None
+
+
+def test_certificate_rules_only_match_with_a_certificate():
+    matcher = SignatureMatcher(RULES)
+    certificate = {'subject': 'C=CN, O=Acme, CN=192.168.1.64', 'issuer': None}
+    assert matcher.match(response('Home'))['type'] is None
+    assert matcher.match(response('Home'), certificate=certificate)['type'] == 'Camera - TLS'
+
+
+def test_vendor_only_skips_generic_rules():
+    matcher = SignatureMatcher(RULES)
+    assert matcher.match(response('Login'), vendor_only=True)['type'] is None
+
+
+def test_non_camera_pages_have_no_type():
+    fingerprint = SignatureMatcher(RULES).match(response('Welcome to nginx!'))
+    assert fingerprint['type'] is None
+    assert fingerprint['server'] == 'nginx'
+
+
+def test_follow_up_paths_and_details_come_from_the_first_rule_of_a_type():
+    matcher = SignatureMatcher([
+        {'type': 'Camera - X', 'title': ['x'], 'follow_up': ['/info'], 'details': {'model': ['model=(\\w+)']}},
+        {'type': 'Camera - X', 'body': ['x-cam'], 'follow_up': ['/ignored']},
+    ])
+    assert matcher.follow_up_paths('Camera - X') == ['/info']
+    assert matcher.follow_up_paths('Camera - Y') == []
+    assert matcher.details('Camera - X', [b'nothing', b'model=XC100\n']) == {'model': 'XC100'}
+
+
+def test_shipped_signatures_fingerprint_known_cameras():
+    matcher = load_signatures()
+    assert matcher.match(response('WEB SERVICE'))['type'] == 'Camera - WEB SERVICE'
+    assert matcher.match(response('Index', body='<a href="/doc/page/login.asp">'))['type'] == 'Camera - HIK Vision'
+    assert matcher.match(response('Welcome to nginx!'))['type'] is None
+
+
+def test_missing_signature_file_gives_an_empty_matcher(tmp_path, capsys):
+    matcher = load_signatures(str(tmp_path / 'missing.json'))
+    assert matcher.match(response('Login'))['type'] is None
+    assert 'Could not load signatures' in capsys.readouterr().out
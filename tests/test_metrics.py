@@ -0,0 +1,49 @@
+import urllib.request
+
+from CameraScanner import Metrics, Scanner
+
+
+def test_counters_gauges_and_histograms_in_a_snapshot():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.inc('probes_total', outcome='open')
+    metrics.inc('probes_total', 2, outcome='open')
+    metrics.gauge('in_flight', lambda: 7)
+    metrics.gauge('broken', lambda: 1 / 0)
+    for value in (0.05, 0.5, 5.0):
+        metrics.observe('connect_seconds', value)
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {'probes_total{outcome="open"}': 3}
+    assert snapshot['gauges'] == {'in_flight': 7}
+    assert snapshot['histograms']['connect_seconds'] == {'buckets': {'0.1': 1, '1.0': 2, 'inf': 3}, 'sum': 5.55,
+                                                         'count': 3}
+
+
+def test_prometheus_exposition():
+    metrics = Metrics(buckets=(0.1,))
+    metrics.inc('probes_total', outcome='open')
+    metrics.observe('connect_seconds', 0.05)
+    lines = metrics.prometheus().splitlines()
+    assert '# TYPE camerascanner_probes_total counter' in lines
+    assert 'camerascanner_probes_total{outcome="open"} 1' in lines
+    assert 'camerascanner_connect_seconds_bucket{le="+Inf"} 1' in lines
+    assert 'camerascanner_connect_seconds_count 1' in lines
+
+
+def test_metrics_endpoint_and_final_callback():
+    metrics = Metrics()
+    snapshots = []
+    metrics.add_callback(snapshots.append, interval=60)
+    metrics.inc('probes_total', outcome='refused')
+    host, port = metrics.serve(0)
+    try:
+        with urllib.request.urlopen(f'http://{host}:{port}/metrics', timeout=5) as response:
+            assert b'camerascanner_probes_total{outcome="refused"} 1' in response.read()
+    finally:
+        metrics.close()
+    assert snapshots[-1]['counters'] == {'probes_total{outcome="refused"}': 1}
+
+
+def test_scans_count_their_probes():
+    metrics = Metrics()
+    list(Scanner('127.0.0.1-127.0.0.3', ports=[1], concurrency=2, metrics=metrics))
+    assert metrics.snapshot()['counters']['probes_total{outcome="refused"}'] == 3
@@ -0,0 +1,54 @@
+from CameraScanner import PathTracer, SimulatedTraceBackend, resolve_trace_targets
+
+GATEWAY, ISP, CORE, EDGE = '192.168.1.1', '100.64.0.1', '203.0.113.1', '192.0.2.1'
+
+
+def tracer(paths, **options):
+    options.setdefault('max_hops', 10)
+    options.setdefault('timeout', 0.05)
+    options.setdefault('rate', 100000)
+    return PathTracer(SimulatedTraceBackend(paths, hop_delay=0.0001), **options)
+
+
+def addresses(trace):
+    return [hop['address'] for hop in trace['hops']]
+
+
+def test_reached_target_reports_every_hop():
+    result = tracer({'198.51.100.7': [GATEWAY, ISP, CORE, '198.51.100.7']}).trace(['198.51.100.7'])
+    trace = result['198.51.100.7']
+    assert trace['reached'] and trace['distance'] == 4
+    assert addresses(trace) == [GATEWAY, ISP, CORE, '198.51.100.7']
+    assert all(hop['rtt'] is not None and not hop['shared'] for hop in trace['hops'])
+
+
+def test_silent_hops_and_unreached_targets():
+    trace = tracer({'198.51.100.7': [GATEWAY, None, CORE]}).trace(['198.51.100.7'])['198.51.100.7']
+    assert not trace['reached'] and trace['distance'] is None
+    assert addresses(trace) == [GATEWAY, None, CORE]
+
+
+def test_neighbours_share_the_hops_below_where_they_join():
+    paths = {f'198.51.100.{last}': [GATEWAY, ISP, CORE, EDGE, f'198.51.100.{last}'] for last in range(1, 21)}
+    traced = tracer(paths)
+    result = traced.trace(list(paths))
+    for target, trace in result.items():
+        assert addresses(trace) == paths[target]
+    follower = result['198.51.100.20']
+    assert follower['hops'][0]['shared']
+    assert not follower['hops'][-1]['shared']
+    # The reference probes every TTL; the followers only a window around the shared distance
+    assert traced.probes < 20 * 10
+
+
+def test_followers_on_a_different_path_trace_it_themselves():
+    paths = {'198.51.100.1': [GATEWAY, ISP, '198.51.100.1'],
+             '198.51.100.2': ['10.9.9.9', '10.9.9.10', '10.9.9.11', '10.9.9.12', '198.51.100.2']}
+    result = tracer(paths).trace(list(paths))
+    assert addresses(result['198.51.100.2']) == paths['198.51.100.2']
+    assert not any(hop['shared'] for hop in result['198.51.100.2']['hops'])
+
+
+def test_targets_expand_and_are_capped():
+    assert resolve_trace_targets(['10.0.0.1-10.0.0.3', '10.0.0.2']) == ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+    assert len(resolve_trace_targets(['10.0.0.0/16'], limit=5)) == 5
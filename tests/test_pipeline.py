@@ -0,0 +1,94 @@
+import socket
+
+import pytest
+
+from CameraScanner import PipelineReader, dechunk, fetch_banner, keeps_alive, response_end
+
+from conftest import read_request
+
+FIXED = b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhello"
+CHUNKED = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n2;x=1\r\nde\r\n0\r\n\r\n"
+
+
+def test_response_end_frames_by_length_and_chunks():
+    assert response_end(FIXED + b"HTTP/1.1") == len(FIXED)
+    assert response_end(CHUNKED) == len(CHUNKED)
+    assert response_end(b"HTTP/1.1 304 Not Modified\r\n\r\nnext") == len(b"HTTP/1.1 304 Not Modified\r\n\r\n")
+    assert response_end(b"xx" + FIXED, 2) == len(FIXED) + 2
+
+
+@pytest.mark.parametrize('cut', [10, len(FIXED) - 1])
+def test_response_end_waits_for_more_bytes(cut):
+    assert response_end(FIXED[:cut]) is None
+    assert response_end(CHUNKED[:-3]) is None
+
+
+def test_unframed_responses_cannot_keep_alive():
+    with pytest.raises(ValueError):
+        response_end(b"HTTP/1.1 200 OK\r\nServer: x\r\n\r\nbody")
+    assert keeps_alive(FIXED)
+    assert not keeps_alive(b"HTTP/1.1 200 OK\r\nServer: x\r\n\r\nbody")
+    assert not keeps_alive(b"HTTP/1.1 200 OK\r\nConnection: close\r\nContent-Length: 0\r\n\r\n")
+    assert not keeps_alive(b"HTTP/1.0 200 OK\r\nContent-Length: 0\r\n\r\n")
+
+
+def test_dechunk_joins_the_body():
+    assert dechunk(CHUNKED) == b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nabcde"
+    assert dechunk(FIXED) == FIXED
+
+
+def test_pipeline_splits_responses_across_reads():
+    pipeline = PipelineReader(2)
+    stream = FIXED + CHUNKED
+    assert not pipeline.feed(stream[:7])
+    assert not pipeline.feed(stream[7:40])
+    assert pipeline.feed(stream[40:])
+    assert pipeline.responses == [FIXED, dechunk(CHUNKED)]
+
+
+def test_pipeline_stops_at_its_budget_or_on_close():
+    pipeline = PipelineReader(2, budget=10)
+    assert pipeline.feed(FIXED[:12])
+    assert pipeline.responses == []
+    pipeline = PipelineReader(2)
+    pipeline.feed(FIXED)
+    assert pipeline.feed(b'')
+    assert pipeline.responses == [FIXED]
+
+
+def hik(conn):
+    # Answers each request on the connection, including pipelined ones
+    pending = b''
+    while True:
+        while b'\r\n\r\n' not in pending:
+            chunk = conn.recv(4096)
+            if not chunk:
+                return
+            pending += chunk
+        head, pending = pending.split(b'\r\n\r\n', 1)
+        path = head.split(b' ')[1]
+        if path == b'/':
+            body = b'<html><head><title>Index</title></head><script src="/doc/page/login.asp"></script></html>'
+        else:
+            body = b'<DeviceInfo><model>DS-2CD2142FWD-I</model><firmwareVersion>V5.4.5</firmwareVersion></DeviceInfo>'
+        conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+
+
+def test_follow_ups_read_model_and_firmware_on_one_connection(serve):
+    port = serve(hik)
+    sock = socket.create_connection(('127.0.0.1', port), timeout=2)
+    outcome, result = fetch_banner(sock, '127.0.0.1', port, 2, follow_up=True)
+    assert result['type'] == 'Camera - HIK Vision'
+    assert (result['model'], result['firmware']) == ('DS-2CD2142FWD-I', 'V5.4.5')
+
+
+def test_follow_ups_are_skipped_when_the_server_closes(serve):
+    def closing(conn):
+        read_request(conn)
+        conn.sendall(b"HTTP/1.1 200 OK\r\nConnection: close\r\n\r\n<html><a href='login.asp'></a></html>")
+    
+    port = serve(closing)
+    sock = socket.create_connection(('127.0.0.1', port), timeout=2)
+    outcome, result = fetch_banner(sock, '127.0.0.1', port, 2, follow_up=True)
+    assert result['type'] == 'Camera - HIK Vision'
+    assert 'model' not in result
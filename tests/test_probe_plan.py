@@ -0,0 +1,95 @@
+import asyncio
+import socket
+
+from CameraScanner import (OUTCOME_CAMERA, OUTCOME_SKIPPED, ConcurrencyController, ProbePlan, PlanScheduler,
+                           RttEstimator, async_fetch_banner, async_scan, fetch_banner, ip_to_int)
+
+from conftest import read_request
+
+PAGES = {
+    b'/': b"HTTP/1.1 200 OK\r\nServer: nginx\r\n\r\n<html><head><title>Welcome</title></head></html>",
+    b'/web': b"HTTP/1.1 200 OK\r\nServer: Webs\r\n\r\n<html><head><title>WEB SERVICE</title></head></html>",
+}
+
+
+def page_server(conn):
+    path = read_request(conn).split(b' ')[1]
+    conn.sendall(PAGES[path])
+
+
+class CountingController(ConcurrencyController):
+    def __init__(self):
+        super().__init__(1, minimum=1, maximum=1)
+        self.acquired = 0
+    
+    def acquire(self):
+        super().acquire()
+        self.acquired += 1
+    
+    async def acquire_async(self):
+        await super().acquire_async()
+        self.acquired += 1
+
+
+def test_rounds_give_every_host_its_first_port_first():
+    scheduler = PlanScheduler(ProbePlan([80, 8080]))
+    targets = [(1, 80), (1, 8080), (2, 80), (2, 8080)]
+    assert list(scheduler.schedule(iter(targets))) == [(1, 80), (2, 80), (1, 8080), (2, 8080)]
+
+
+def test_camera_skips_the_rest_of_the_host():
+    skipped = []
+    scheduler = PlanScheduler(ProbePlan([80, 8080]), on_skip=lambda ip_int, port, outcome: skipped.append(
+        (ip_int, port, outcome)))
+    probed = []
+    for ip_int, port in scheduler.schedule(iter([(1, 80), (1, 8080), (2, 80), (2, 8080)])):
+        probed.append((ip_int, port))
+        scheduler.probe_done(ip_int, port, OUTCOME_CAMERA if ip_int == 1 else 'refused')
+    assert probed == [(1, 80), (2, 80), (2, 8080)]
+    assert skipped == [(1, 8080, OUTCOME_SKIPPED)]
+
+
+def test_later_paths_connect_under_the_controller(serve):
+    port = serve(page_server)
+    controller = CountingController()
+    rtt = RttEstimator()
+    sock = socket.create_connection(('127.0.0.1', port), timeout=2)
+    outcome, result = fetch_banner(sock, '127.0.0.1', port, 2, paths=['/', '/web'], controller=controller, rtt=rtt)
+    assert result['type'] == "Camera - WEB SERVICE"
+    assert controller.acquired == 1
+    assert controller.in_flight == 0
+    assert rtt.rto(ip_to_int('127.0.0.1')) is not None
+
+
+def test_async_later_paths_connect_under_the_controller(serve):
+    port = serve(page_server)
+    controller = CountingController()
+    
+    async def fetch():
+        sock = socket.create_connection(('127.0.0.1', port), timeout=2)
+        sock.setblocking(False)
+        return await async_fetch_banner(sock, '127.0.0.1', port, 2, paths=['/', '/web'], controller=controller,
+                                        rtt=RttEstimator())
+    
+    outcome, result = asyncio.run(fetch())
+    assert result['type'] == "Camera - WEB SERVICE"
+    assert controller.acquired == 1
+    assert controller.in_flight == 0
+
+
+def test_async_scan_with_later_paths_and_a_full_banner_pool(serve):
+    port = serve(page_server)
+    controller = ConcurrencyController(2, minimum=2, maximum=2)
+    probes = []
+    results = []
+    targets = [(ip_to_int('127.0.0.1'), port)] * 50
+    
+    async def scan():
+        await asyncio.wait_for(async_scan(targets, results.append, connect_concurrency=2, banner_concurrency=1,
+                                          on_probe_done=lambda *probe: probes.append(probe), controller=controller,
+                                          paths=['/', '/web']), 10)
+    
+    asyncio.run(scan())
+    assert len(probes) == 50
+    assert len(results) == 50
+    assert controller.in_flight == 0
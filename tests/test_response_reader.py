@@ -0,0 +1,71 @@
+import socket
+import time
+
+import CameraScanner
+from CameraScanner import ResponseReader, fetch_banner, get_matcher
+
+from conftest import read_request
+
+HIK_HEAD = b"HTTP/1.1 200 OK\r\nServer: App-webs/\r\nContent-Type: text/html\r\n\r\n"
+HIK_BODY = b"<html><head><title></title></head><script>location.href='/doc/page/login.asp'</script></html>"
+
+
+def feed(reader, data, step):
+    """Write data into the reader `step` bytes at a time, as recv_into() would"""
+    for start in range(0, len(data), step):
+        piece = data[start:start + step]
+        reader.free()[:len(piece)] = piece
+        if reader.feed(len(piece)):
+            break
+
+
+def connect(port):
+    return socket.create_connection(('127.0.0.1', port), timeout=2)
+
+
+def test_body_rule_after_the_title_still_matches(serve):
+    def handler(conn):
+        read_request(conn)
+        conn.sendall(HIK_HEAD + b"<html><head><title></title></head>")
+        time.sleep(0.05)
+        conn.sendall(b"<script>location.href='/doc/page/login.asp'</script></html>")
+    
+    port = serve(handler)
+    outcome, result = fetch_banner(connect(port), '127.0.0.1', port, read_timeout=2)
+    assert outcome == CameraScanner.OUTCOME_CAMERA
+    assert result['type'] == "Camera - HIK Vision"
+
+
+def test_settled_title_stops_before_the_server_closes(serve):
+    def handler(conn):
+        read_request(conn)
+        conn.sendall(b"HTTP/1.1 200 OK\r\nServer: Webs\r\n\r\n<html><head><title>WEB SERVICE</title>")
+        time.sleep(3)
+    
+    port = serve(handler)
+    started = time.monotonic()
+    outcome, result = fetch_banner(connect(port), '127.0.0.1', port, read_timeout=5)
+    assert result['type'] == "Camera - WEB SERVICE"
+    assert time.monotonic() - started < 1
+
+
+def test_unsettled_response_reads_to_content_length():
+    body = b"<html><head><title>Welcome to nginx!</title></head>" + b"x" * 5000 + b"</html>"
+    response = b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % len(body) + body
+    reader = ResponseReader(65536, get_matcher())
+    feed(reader, response, 1000)
+    assert reader.done
+    assert reader.length == len(response)
+
+
+def test_body_literal_split_across_reads_is_found():
+    reader = ResponseReader(65536, get_matcher())
+    feed(reader, HIK_HEAD + HIK_BODY, 3)
+    assert b'login.asp' in reader.progress.found_body
+    assert get_matcher().match(reader.response())['type'] == "Camera - HIK Vision"
+
+
+def test_without_headers_nothing_is_settled():
+    reader = ResponseReader(65536, get_matcher())
+    feed(reader, b"HTTP/1.1 200 OK\r\nServer: Webs\r\n<title>WEB SERVICE</title>", 10)
+    assert not reader.done
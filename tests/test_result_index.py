@@ -0,0 +1,56 @@
+import threading
+
+from CameraScanner import AddressBitmap, ResultIndex, ip_to_int
+
+RESULT = {'ip': '10.0.0.5', 'port': 80, 'title': 'WEB SERVICE', 'server': 'Webs', 'url': 'http://10.0.0.5:80/',
+          'type': 'Camera - WEB SERVICE'}
+
+
+def test_bitmap_of_addresses():
+    bitmap = AddressBitmap()
+    assert bitmap.add(ip_to_int('10.0.0.1'))
+    assert not bitmap.add(ip_to_int('10.0.0.1'))
+    assert ip_to_int('10.0.0.1') in bitmap
+    assert ip_to_int('10.0.0.2') not in bitmap
+    assert len(bitmap) == 1
+
+
+def test_bitmap_of_pairs_keeps_unlisted_ports_aside():
+    bitmap = AddressBitmap([80, 8080])
+    ip_int = ip_to_int('10.0.0.1')
+    assert bitmap.add((ip_int, 8080))
+    assert bitmap.add((ip_int, 9000))
+    assert not bitmap.add((ip_int, 9000))
+    assert (ip_int, 8080) in bitmap and (ip_int, 9000) in bitmap
+    assert (ip_int, 80) not in bitmap
+    assert len(bitmap) == 2
+
+
+def test_bitmap_counts_each_key_once_across_threads():
+    bitmap = AddressBitmap()
+    keys = range(ip_to_int('10.0.0.0'), ip_to_int('10.0.0.0') + 2000)
+    threads = [threading.Thread(target=lambda: [bitmap.add(key) for key in keys]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(bitmap) == 2000
+
+
+def test_result_index_round_trips_and_dedupes():
+    index = ResultIndex([80])
+    assert index.add(RESULT)
+    assert not index.add(dict(RESULT, title='other'))
+    assert index.add(dict(RESULT, ip='10.0.0.6', url='http://10.0.0.6:80/', model='DS-2CD'))
+    assert list(index) == [RESULT, dict(RESULT, ip='10.0.0.6', url='http://10.0.0.6:80/', model='DS-2CD')]
+    assert (ip_to_int('10.0.0.6'), 80) in index
+    assert len(index) == 2
+
+
+def test_result_index_interns_repeated_strings():
+    index = ResultIndex([80])
+    for last in range(1, 101):
+        ip = f'10.0.0.{last}'
+        index.add(dict(RESULT, ip=ip, url=f'http://{ip}:80/'))
+    # One id for "no value" plus one per distinct title, server, url template and type
+    assert len(index.values) == 5
@@ -0,0 +1,42 @@
+import pytest
+
+from CameraScanner import (MAX_CONNECT_TIMEOUT, MAX_READ_TIMEOUT, MIN_CONNECT_TIMEOUT, MIN_READ_TIMEOUT,
+                           READ_RTO_FACTOR, RttEstimator, ip_to_int)
+
+
+def test_defaults_until_the_subnet_has_samples():
+    rtt = RttEstimator(connect_timeout=1.5, read_timeout=2.5)
+    assert rtt.rto(ip_to_int('10.0.0.1')) is None
+    assert rtt.connect_timeout(ip_to_int('10.0.0.1')) == 1.5
+    assert rtt.read_timeout(ip_to_int('10.0.0.1')) == 2.5
+
+
+def test_first_sample_sets_srtt_and_variance():
+    rtt = RttEstimator()
+    rtt.sample(ip_to_int('10.0.0.1'), 0.1)
+    # SRTT = R, RTTVAR = R / 2, RTO = SRTT + 4 * RTTVAR (RFC 6298)
+    assert rtt.rto(ip_to_int('10.0.0.200')) == pytest.approx(0.3)
+    assert rtt.connect_timeout(ip_to_int('10.0.0.9')) == pytest.approx(0.3)
+    assert rtt.read_timeout(ip_to_int('10.0.0.9')) == pytest.approx(0.3 * READ_RTO_FACTOR)
+    assert rtt.rto(ip_to_int('10.0.1.1')) is None
+
+
+def test_later_samples_are_smoothed():
+    rtt = RttEstimator()
+    ip_int = ip_to_int('10.0.0.1')
+    rtt.sample(ip_int, 0.1)
+    rtt.sample(ip_int, 0.2)
+    srtt = 0.875 * 0.1 + 0.125 * 0.2
+    rttvar = 0.75 * 0.05 + 0.25 * 0.1
+    assert rtt.rto(ip_int) == pytest.approx(srtt + 4 * rttvar)
+
+
+def test_timeouts_are_clamped():
+    rtt = RttEstimator()
+    fast, slow = ip_to_int('10.0.0.1'), ip_to_int('10.0.1.1')
+    rtt.sample(fast, 0.0001)
+    rtt.sample(slow, 10.0)
+    assert rtt.connect_timeout(fast) == MIN_CONNECT_TIMEOUT
+    assert rtt.read_timeout(fast) == MIN_READ_TIMEOUT
+    assert rtt.connect_timeout(slow) == MAX_CONNECT_TIMEOUT
+    assert rtt.read_timeout(slow) == MAX_READ_TIMEOUT
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from CameraScanner import ScanControl, Scanner
+
+
+def test_gate_holds_targets_while_paused():
+    control = ScanControl()
+    control.pause()
+    taken = []
+    thread = threading.Thread(target=lambda: taken.extend(control.gate(iter(range(3)))))
+    thread.start()
+    thread.join(0.05)
+    assert thread.is_alive() and taken == []
+    control.resume()
+    thread.join(5)
+    assert taken == [0, 1, 2]
+
+
+def test_stop_ends_the_gate_and_wakes_a_pause():
+    control = ScanControl()
+    gate = control.gate(iter(range(10)))
+    assert next(gate) == 0
+    control.pause()
+    control.stop()
+    assert not control.paused
+    assert list(gate) == []
+
+
+def test_a_stopped_scan_cannot_be_paused():
+    control = ScanControl()
+    control.stop()
+    control.pause()
+    assert not control.paused
+    assert control.wait() is False
+
+
+def test_toggle_pause_reports_the_new_state():
+    control = ScanControl()
+    assert control.toggle_pause() is True
+    assert control.toggle_pause() is False
+
+
+@pytest.mark.parametrize('engine', ['asyncio', 'threads'])
+def test_stopping_before_the_scan_starts_probes_nothing(engine):
+    scanner = Scanner('127.0.0.1-127.0.0.20', ports=[1], engine=engine, concurrency=2)
+    scanner.stop()
+    assert list(scanner) == []
+    assert sum(scanner.counts.values()) == 0
@@ -0,0 +1,40 @@
+import threading
+
+from CameraScanner import ProbePlan, TargetSpace, ip_to_int, scan_shards
+
+CLOSED_PORT = 1  # Nothing listens here: every probe is refused at once
+
+
+def run_shards(shards, shard_size=4):
+    first = ip_to_int('127.0.0.1')
+    space = TargetSpace([(first, first + shards * shard_size - 1)])
+    queue = list(range(shards))
+    done = []
+    claims = []
+    
+    def claim():
+        claims.append((len(done), threading.current_thread()))
+        return queue.pop(0) if queue else None
+    
+    scan_shards(space, ProbePlan([CLOSED_PORT]), shard_size, claim, lambda result: None,
+                lambda shard, counts: done.append(shard), concurrency=1)
+    return claims, done
+
+
+def test_every_shard_is_scanned_once():
+    claims, done = run_shards(6)
+    assert sorted(done) == list(range(6))
+    assert len(claims) == 7  # The last claim finds nothing left
+
+
+def test_shards_are_claimed_one_at_a_time():
+    claims, _ = run_shards(6)
+    # A shard is only claimed once the previous one's targets are out, so at
+    # most the shard just handed out can still be unfinished
+    for index, (finished, _) in enumerate(claims):
+        assert finished >= index - 2
+
+
+def test_claims_run_off_the_event_loop():
+    claims, _ = run_shards(2)
+    assert all(thread is not threading.current_thread() for _, thread in claims)
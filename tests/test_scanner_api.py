@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from CameraScanner import CAMERA_PORTS, DEFAULT_PORTS, TLS_PORTS, Scanner, parse_args, parse_ports
+
+from conftest import read_request
+
+CAMERA_PAGE = b"HTTP/1.1 200 OK\r\nServer: Webs\r\n\r\n<html><head><title>WEB SERVICE</title></head></html>"
+
+
+def camera(conn):
+    read_request(conn)
+    conn.sendall(CAMERA_PAGE)
+
+
+def test_ports_keep_their_order_without_duplicates():
+    assert parse_ports('8080, 80,8000-8002,80') == [8080, 80, 8000, 8001, 8002]
+    assert parse_ports('https') == TLS_PORTS
+    assert parse_ports('80,camera')[1:] == [port for port in CAMERA_PORTS if port != 80]
+
+
+@pytest.mark.parametrize('text', ['', '0', '8010-8000', '70000', 'http'])
+def test_bad_port_lists_are_rejected(text):
+    with pytest.raises(ValueError):
+        parse_ports(text)
+
+
+def test_command_line_defaults():
+    args = parse_args(['10.0.0.0/24', '@sites.txt'])
+    assert args.targets == ['10.0.0.0/24', '@sites.txt']
+    assert args.ports == DEFAULT_PORTS
+    assert args.engine == 'asyncio'
+    assert args.stop_on_hit and not args.quiet
+
+
+def test_command_line_rejects_bad_sampling_options(capsys):
+    with pytest.raises(SystemExit):
+        parse_args(['10.0.0.0/24', '--sample-confidence', '1.5'])
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        Scanner('127.0.0.1', engine='processes')
+
+
+@pytest.mark.parametrize('engine', ['asyncio', 'threads'])
+def test_iterating_a_scanner_yields_cameras(serve, engine):
+    port = serve(camera)
+    results = list(Scanner('127.0.0.1', ports=[port, 1], engine=engine, concurrency=4))
+    assert [(r['ip'], r['port'], r['type']) for r in results] == [('127.0.0.1', port, 'Camera - WEB SERVICE')]
+
+
+def test_async_iteration_runs_on_the_callers_loop(serve):
+    port = serve(camera)
+    
+    async def scan():
+        return [result async for result in Scanner('127.0.0.1', ports=[port], concurrency=4)]
+    
+    results = asyncio.run(scan())
+    assert [r['type'] for r in results] == ['Camera - WEB SERVICE']
+
+
+def test_leaving_the_loop_early_stops_the_scan(serve):
+    port = serve(camera)
+    scanner = Scanner('127.0.0.1-127.0.0.50', ports=[port], engine='threads', concurrency=2)
+    for result in scanner:
+        break
+    assert scanner.control.stopped.is_set()
@@ -0,0 +1,31 @@
+from CameraScanner import Checkpoint, ConsoleRenderer, ProbePlan, TargetSpace, ip_to_int, sharded_scan
+
+from conftest import read_request
+
+
+def camera(conn):
+    read_request(conn)
+    conn.sendall(b"HTTP/1.1 200 OK\r\nServer: Webs\r\n\r\n<html><head><title>WEB SERVICE</title></head></html>")
+
+
+def test_worker_processes_cover_every_shard(serve, tmp_path):
+    port = serve(camera)
+    first = ip_to_int('127.0.0.1')
+    checkpoint = Checkpoint(str(tmp_path / 'scan.json'), TargetSpace([(first, first + 15)]), [port, 1],
+                            shard_size=4)
+    results = []
+    elapsed, counts = sharded_scan(checkpoint, results.append, processes=2, plan=ProbePlan([port, 1]))
+    assert checkpoint.pending_addresses() == 0
+    # Only 127.0.0.1 listens; every other target is refused
+    assert [(r['ip'], r['port']) for r in results] == [('127.0.0.1', port)]
+    assert counts['camera'] == 1
+    assert sum(counts.values()) == 32
+
+
+def test_quiet_renderer_silences_the_engine(tmp_path, capsys):
+    first = ip_to_int('127.0.0.1')
+    checkpoint = Checkpoint(str(tmp_path / 'scan.json'), TargetSpace([(first, first + 3)]), [1], shard_size=2)
+    renderer = ConsoleRenderer(lambda: {'done': 0, 'total': 4, 'unit': 'IPs', 'hits': 0}, quiet=True)
+    sharded_scan(checkpoint, lambda result: None, processes=2, renderer=renderer)
+    renderer.stop()
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,122 @@
+import csv
+import json
+import sqlite3
+import threading
+import time
+
+from CameraScanner import RESULTS_BASENAME, CsvSink, JsonlSink, SqliteSink, TextSink, open_sink
+
+RESULT = {'ip': '10.0.0.5', 'port': 80, 'title': 'WEB SERVICE', 'server': 'Webs', 'url': 'http://10.0.0.5:80',
+          'type': 'Camera - WEB SERVICE', 'model': 'DS-2CD2142FWD-I', 'firmware': 'V5.4.5'}
+
+
+def test_csv_keeps_detail_fields(tmp_path):
+    path = tmp_path / 'out.csv'
+    with CsvSink(str(path)) as sink:
+        sink.put(RESULT)
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]['model'] == 'DS-2CD2142FWD-I'
+    assert rows[0]['firmware'] == 'V5.4.5'
+
+
+def test_sqlite_keeps_detail_fields(tmp_path):
+    path = tmp_path / 'out.db'
+    with SqliteSink(str(path)) as sink:
+        sink.put(RESULT)
+        sink.put(dict(RESULT, ip='10.0.0.6', model=None, firmware=None))
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT ip, port, model, firmware FROM results ORDER BY ip").fetchall() == [
+        ('10.0.0.5', 80, 'DS-2CD2142FWD-I', 'V5.4.5'), ('10.0.0.6', 80, None, None)]
+
+
+def test_sqlite_adds_missing_columns_to_an_old_database(tmp_path):
+    path = tmp_path / 'old.db'
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE results (ip TEXT, port INTEGER, title TEXT, server TEXT, url TEXT, type TEXT, "
+               "found_at REAL)")
+    db.execute("INSERT INTO results VALUES ('10.0.0.1', 80, 't', 's', 'u', 'Camera', 0)")
+    db.commit()
+    db.close()
+    with SqliteSink(str(path)) as sink:
+        sink.put(RESULT)
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT ip, type, model FROM results ORDER BY ip").fetchall() == [
+        ('10.0.0.1', 'Camera', None), ('10.0.0.5', 'Camera - WEB SERVICE', 'DS-2CD2142FWD-I')]
+
+
+def test_csv_and_sqlite_keep_certificate_names(tmp_path):
+    result = dict(RESULT, port=443, tls_subject='CN=IPC', tls_issuer='CN=Hikvision CA')
+    with CsvSink(str(tmp_path / 'out.csv')) as sink:
+        sink.put(result)
+    with open(tmp_path / 'out.csv', newline='', encoding='utf-8') as f:
+        row = next(csv.DictReader(f))
+    assert (row['tls_subject'], row['tls_issuer']) == ('CN=IPC', 'CN=Hikvision CA')
+    with SqliteSink(str(tmp_path / 'out.db')) as sink:
+        sink.put(result)
+    db = sqlite3.connect(tmp_path / 'out.db')
+    assert db.execute("SELECT tls_subject, tls_issuer FROM results").fetchall() == [('CN=IPC', 'CN=Hikvision CA')]
+
+
+def test_jsonl_writes_one_object_per_line(tmp_path):
+    path = tmp_path / 'out.jsonl'
+    with JsonlSink(str(path)) as sink:
+        sink.put(RESULT)
+        sink.put(dict(RESULT, ip='10.0.0.6'))
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line) for line in lines] == [RESULT, dict(RESULT, ip='10.0.0.6')]
+
+
+def test_text_report_lists_details(tmp_path):
+    path = tmp_path / 'out.txt'
+    with TextSink(str(path)) as sink:
+        sink.put(RESULT)
+    text = path.read_text(encoding='utf-8')
+    assert "IP: 10.0.0.5:80\n" in text
+    assert "Model: DS-2CD2142FWD-I\n" in text
+
+
+def test_empty_scan_leaves_no_file(tmp_path):
+    path = tmp_path / 'out.csv'
+    with CsvSink(str(path)) as sink:
+        pass
+    assert sink.written == 0
+    assert not path.exists()
+
+
+def test_batches_flush_by_count_before_close(tmp_path):
+    path = tmp_path / 'out.jsonl'
+    sink = JsonlSink(str(path), flush_count=2, flush_interval=60)
+    flushed = threading.Event()
+    flush = sink._flush
+    
+    def record(batch):
+        flush(batch)
+        flushed.set()
+    
+    sink._flush = record
+    sink.put(RESULT)
+    sink.put(dict(RESULT, ip='10.0.0.6'))
+    assert flushed.wait(5)
+    assert len(path.read_text(encoding='utf-8').splitlines()) == 2
+    sink.close()
+
+
+def test_batches_flush_by_interval(tmp_path):
+    path = tmp_path / 'out.jsonl'
+    sink = JsonlSink(str(path), flush_count=100, flush_interval=0.05)
+    sink.put(RESULT)
+    deadline = time.monotonic() + 5
+    while sink.written == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sink.written == 1
+    sink.close()
+
+
+def test_open_sink_picks_the_default_file_name():
+    sink = open_sink('csv')
+    try:
+        assert isinstance(sink, CsvSink)
+        assert sink.path == RESULTS_BASENAME + '.csv'
+    finally:
+        sink.close()
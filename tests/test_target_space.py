@@ -0,0 +1,97 @@
+import pytest
+
+from CameraScanner import (EXCLUDE_FILE, Scanner, TargetSpace, apply_target_lists, ip_to_int, iter_probe_targets,
+                           parse_target_spec, read_target_file)
+
+
+def space(*specs):
+    return TargetSpace.from_specs(specs)
+
+
+def test_subtract_cuts_whole_ranges():
+    result = space('10.0.0.0/24').subtract(space('10.0.0.10-10.0.0.19', '10.0.0.200/29'))
+    assert result.ranges == [(ip_to_int('10.0.0.0'), ip_to_int('10.0.0.9')),
+                             (ip_to_int('10.0.0.20'), ip_to_int('10.0.0.199')),
+                             (ip_to_int('10.0.0.208'), ip_to_int('10.0.0.255'))]
+    assert len(result) == 256 - 10 - 8
+
+
+def test_subtract_everything_leaves_an_empty_space():
+    result = space('10.0.0.0/24').subtract(space('10.0.0.0/16'))
+    assert len(result) == 0
+    assert list(result.iter_addresses()) == []
+
+
+def test_intersect_keeps_only_shared_addresses():
+    result = space('10.0.0.0/24', '10.0.2.0/24').intersect(space('10.0.0.250-10.0.2.4'))
+    assert result.ranges == [(ip_to_int('10.0.0.250'), ip_to_int('10.0.0.255')),
+                             (ip_to_int('10.0.2.0'), ip_to_int('10.0.2.4'))]
+
+
+def test_apply_target_lists_reads_the_default_exclude_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / EXCLUDE_FILE).write_text("10.0.0.0/25  # lab\n")
+    result, excluded = apply_target_lists(space('10.0.0.0/24'))
+    assert excluded == 128
+    assert ip_to_int('10.0.0.127') not in result
+    assert ip_to_int('10.0.0.128') in result
+
+
+def test_scanner_never_probes_excluded_addresses(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'skip.txt').write_text("127.0.0.1-127.0.0.4\n")
+    scanner = Scanner('127.0.0.1-127.0.0.4', ports=[1], exclude=[str(tmp_path / 'skip.txt')])
+    assert scanner.excluded == 4
+    assert list(scanner) == []
+    assert sum(scanner.counts.values()) == 0
+
+
+def test_scanner_applies_the_default_exclude_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / EXCLUDE_FILE).write_text("127.0.0.2\n")
+    scanner = Scanner('127.0.0.1-127.0.0.3', ports=[1], engine='threads', concurrency=2)
+    list(scanner)
+    assert list(scanner.space.iter_addresses()) == [ip_to_int('127.0.0.1'), ip_to_int('127.0.0.3')]
+    assert sum(scanner.counts.values()) == 2
+
+
+def test_specs_parse_single_ips_cidrs_and_ranges():
+    assert parse_target_spec('10.0.0.7') == (ip_to_int('10.0.0.7'),) * 2
+    assert parse_target_spec(' 10.0.0.0/30 ') == (ip_to_int('10.0.0.0'), ip_to_int('10.0.0.3'))
+    assert parse_target_spec('10.0.0.5/30') == (ip_to_int('10.0.0.4'), ip_to_int('10.0.0.7'))
+    assert parse_target_spec('10.0.0.9 - 10.0.1.2') == (ip_to_int('10.0.0.9'), ip_to_int('10.0.1.2'))
+
+
+@pytest.mark.parametrize('spec', ['10.0.0.9-10.0.0.1', '10.0.0.256', '10.0.0.0/33', 'camera'])
+def test_bad_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        parse_target_spec(spec)
+
+
+def test_file_targets_allow_comments_and_several_per_line(tmp_path):
+    path = tmp_path / 'sites.txt'
+    path.write_text("# lab\n10.0.0.1, 10.0.0.2 10.0.1.0/31  # rack 2\n\n10.0.2.1-10.0.2.2\n")
+    assert list(read_target_file(str(path))) == ['10.0.0.1', '10.0.0.2', '10.0.1.0/31', '10.0.2.1-10.0.2.2']
+    assert len(TargetSpace.from_specs(['@' + str(path), '10.0.0.3'])) == 7
+
+
+def test_overlapping_and_adjacent_ranges_merge():
+    result = space('10.0.0.0/25', '10.0.0.100-10.0.0.200', '10.0.0.201', '10.0.0.210')
+    assert result.ranges == [(ip_to_int('10.0.0.0'), ip_to_int('10.0.0.201')),
+                             (ip_to_int('10.0.0.210'), ip_to_int('10.0.0.210'))]
+    assert len(result) == 203
+
+
+def test_flat_indexes_map_to_addresses_and_back():
+    result = space('10.0.0.0/30', '10.0.1.0/30')
+    addresses = list(result.iter_addresses())
+    assert addresses == [result.address_at(index) for index in range(len(result))]
+    assert [result.index_of(ip_int) for ip_int in addresses] == list(range(8))
+    assert list(result.iter_addresses(3, 6)) == addresses[3:6]
+    assert ip_to_int('10.0.0.4') not in result
+
+
+def test_probe_targets_cover_every_port_of_every_address():
+    targets = list(iter_probe_targets(space('10.0.0.1-10.0.0.2'), [80, 554]))
+    assert targets == [(ip_to_int('10.0.0.1'), 80), (ip_to_int('10.0.0.1'), 554),
+                       (ip_to_int('10.0.0.2'), 80), (ip_to_int('10.0.0.2'), 554)]
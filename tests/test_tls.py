@@ -0,0 +1,76 @@
+from CameraScanner import TlsSessionCache, certificate_names, der_oid
+
+
+def test_sessions_are_kept_per_host_port_and_name():
+    cache = TlsSessionCache()
+    cache.put('10.0.0.1', 443, 'session-a')
+    cache.put('10.0.0.1', 443, 'session-b', server_hostname='cam.example')
+    assert cache.get('10.0.0.1', 443) == 'session-a'
+    assert cache.get('10.0.0.1', 443, server_hostname='cam.example') == 'session-b'
+    assert cache.get('10.0.0.1', 8443) is None
+    # A neighbour in the same subnet is a different server
+    assert cache.get('10.0.0.2', 443) is None
+
+
+def test_least_recently_used_session_is_dropped():
+    cache = TlsSessionCache(capacity=2)
+    cache.put('10.0.0.1', 443, 'one')
+    cache.put('10.0.0.2', 443, 'two')
+    cache.get('10.0.0.1', 443)
+    cache.put('10.0.0.3', 443, 'three')
+    assert len(cache) == 2
+    assert cache.get('10.0.0.2', 443) is None
+    assert cache.get('10.0.0.1', 443) == 'one'
+
+
+def test_missing_session_is_not_stored():
+    cache = TlsSessionCache()
+    cache.put('10.0.0.1', 443, None)
+    assert len(cache) == 0
+
+
+def der(tag, content):
+    if len(content) < 0x80:
+        return bytes([tag, len(content)]) + content
+    length = len(content).to_bytes((len(content).bit_length() + 7) // 8, 'big')
+    return bytes([tag, 0x80 | len(length)]) + length + content
+
+
+def name(*pairs):
+    oids = {'CN': b'\x55\x04\x03', 'C': b'\x55\x04\x06', 'O': b'\x55\x04\x0a', 'serial': b'\x55\x04\x05'}
+    rdns = b''
+    for field, value, tag in pairs:
+        encoded = value.encode('utf-16-be' if tag == 0x1e else 'utf-8')
+        rdns += der(0x31, der(0x30, der(0x06, oids[field]) + der(tag, encoded)))
+    return der(0x30, rdns)
+
+
+def certificate(subject, issuer, version=True, padding=0):
+    algorithm = der(0x30, der(0x06, b'\x2a\x86\x48\x86\xf7\x0d\x01\x01\x0b'))
+    validity = der(0x30, der(0x17, b'240101000000Z') + der(0x17, b'340101000000Z'))
+    tbs = (der(0xa0, der(0x02, b'\x02')) if version else b'') + der(0x02, b'\x01') + algorithm + issuer + validity \
+        + subject + der(0x30, b'\x00' * padding)
+    return der(0x30, der(0x30, tbs) + algorithm + der(0x03, b'\x00' * 16))
+
+
+def test_certificate_names_read_subject_and_issuer():
+    subject = name(('C', 'CN', 0x13), ('O', 'Hikvision', 0x0c), ('CN', '192.168.1.64', 0x0c))
+    issuer = name(('O', 'Camera CA', 0x0c), ('serial', '42', 0x13))
+    assert certificate_names(certificate(subject, issuer)) == ('C=CN, O=Hikvision, CN=192.168.1.64', 'O=Camera CA')
+
+
+def test_certificate_names_handle_long_lengths_and_v1_certificates():
+    subject = name(('CN', 'cam', 0x1e))
+    der_bytes = certificate(subject, name(('O', 'x' * 200, 0x0c)), version=False, padding=300)
+    assert certificate_names(der_bytes) == ('CN=cam', 'O=' + 'x' * 200)
+
+
+def test_broken_certificates_give_no_names():
+    der_bytes = certificate(name(('CN', 'cam', 0x0c)), name(('CN', 'ca', 0x0c)))
+    assert certificate_names(der_bytes[:40]) == (None, None)
+    assert certificate_names(b'\x30\x00') == (None, None)
+
+
+def test_object_identifiers_decode_multibyte_arcs():
+    assert der_oid(b'\x2a\x86\x48\x86\xf7\x0d\x01\x01\x0b') == '1.2.840.113549.1.1.11'
+    assert der_oid(b'\x55\x04\x03') == '2.5.4.3'